@@ -7,13 +7,19 @@ from rest_framework.exceptions import APIException
 import seaserv
 from seahub.base.accounts import User
 from seahub.constants import GUEST_USER
-from seahub.api2.models import Token, TokenV2
+from seahub.api2.models import Token, TokenV2, get_token_auth_cache, \
+    set_token_auth_cache
 from seahub.api2.utils import get_client_ip
 from seahub.utils import within_time_range
+from seahub.utils.user_context import CachedOrg
 try:
     from seahub.settings import MULTI_TENANCY
 except ImportError:
     MULTI_TENANCY = False
+try:
+    from seahub.settings import TOKEN_AUTH_CACHE_TIMEOUT
+except ImportError:
+    TOKEN_AUTH_CACHE_TIMEOUT = 5 * 60
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +37,24 @@ class AuthenticationFailed(APIException):
 class DeviceRemoteWipedException(AuthenticationFailed):
     pass
 
+# Attributes of user kept in the token authentication cache. Password hash of
+# user is never cached.
+CACHED_USER_ATTRS = ('id', 'is_staff', 'is_active', 'ctime', 'source', 'role')
+
+def user_to_cache(user):
+    ret = dict((attr, getattr(user, attr, None)) for attr in CACHED_USER_ATTRS)
+    ret['email'] = user.username
+    ret['org'] = CachedOrg(user.org) if user.org is not None else None
+    return ret
+
+def user_from_cache(info):
+    user = User(info['email'])
+    for attr in CACHED_USER_ATTRS:
+        setattr(user, attr, info[attr])
+    user.org = info['org']
+    user.enc_password = None
+    return user
+
 class TokenAuthentication(BaseAuthentication):
     """
     Simple token based authentication.
@@ -59,12 +83,39 @@ class TokenAuthentication(BaseAuthentication):
             raise AuthenticationFailed(msg)
 
         key = auth[1]
+        cached = get_token_auth_cache(key)
+        if cached is not None:
+            return self.authenticate_cached(request, cached)
+
         ret = self.authenticate_v2(request, key)
         if ret:
             return ret
 
         return self.authenticate_v1(request, key)
 
+    def authenticate_cached(self, request, cached):
+        """Authenticate with (token, user) resolved by an earlier request.
+
+        Cached entries are dropped when the token is deleted or wiped, and
+        when the user is changed or deleted, see `seahub.api2.models`.
+        """
+        token = cached['token']
+        user = user_from_cache(cached['user'])
+        self._populate_user_permissions(user)
+
+        if isinstance(token, TokenV2):
+            if token.wiped_at:
+                raise DeviceRemoteWipedException('Device set to be remote wiped')
+            self._update_token_v2(request, token)
+
+        return (user, token)
+
+    def _cache_auth(self, token, user):
+        set_token_auth_cache(token.key, {
+            'token': token,
+            'user': user_to_cache(user),
+        }, TOKEN_AUTH_CACHE_TIMEOUT)
+
     def _populate_user_permissions(self, user):
         """Disable some operations if ``user`` is a guest.
         """
@@ -94,6 +145,7 @@ class TokenAuthentication(BaseAuthentication):
         self._populate_user_permissions(user)
 
         if user.is_active:
+            self._cache_auth(token, user)
             return (user, token)
 
     def authenticate_v2(self, request, key):
@@ -119,32 +171,44 @@ class TokenAuthentication(BaseAuthentication):
         self._populate_user_permissions(user)
 
         if user.is_active:
-            need_save = False
-
-            # We update the device's last_login_ip, client_version, platform_version if changed
-            ip = get_client_ip(request)
-            if ip and ip != token.last_login_ip:
-                token.last_login_ip = ip
-                need_save = True
-
-            client_version = request.META.get(HEADER_CLIENT_VERSION, '')
-            if client_version and client_version != token.client_version:
-                token.client_version = client_version
-                need_save = True
-
-            platform_version = request.META.get(HEADER_PLATFORM_VERSION, '')
-            if platform_version and platform_version != token.platform_version:
-                token.platform_version = platform_version
-                need_save = True
-
-            if not within_time_range(token.last_accessed, datetime.datetime.now(), 10 * 60):
-                # We only need 10min precision for the last_accessed field
-                need_save = True
-
-            if need_save:
-                try:
-                    token.save()
-                except:
-                    logger.exception('error when save token v2:')
-
+            self._update_token_v2(request, token)
+            self._cache_auth(token, user)
             return (user, token)
+
+    def _update_token_v2(self, request, token):
+        """Update the device's last_login_ip, client_version,
+        platform_version and last_accessed if changed.
+        """
+        need_save = False
+        # Only save changed fields, ``token`` may come from cache and be
+        # older than the row, e.g. wiped_at may be set in the meantime.
+        update_fields = ['last_accessed']
+
+        ip = get_client_ip(request)
+        if ip and ip != token.last_login_ip:
+            token.last_login_ip = ip
+            update_fields.append('last_login_ip')
+            need_save = True
+
+        client_version = request.META.get(HEADER_CLIENT_VERSION, '')
+        if client_version and client_version != token.client_version:
+            token.client_version = client_version
+            update_fields.append('client_version')
+            need_save = True
+
+        platform_version = request.META.get(HEADER_PLATFORM_VERSION, '')
+        if platform_version and platform_version != token.platform_version:
+            token.platform_version = platform_version
+            update_fields.append('platform_version')
+            need_save = True
+
+        if not within_time_range(token.last_accessed, datetime.datetime.now(), 10 * 60):
+            # We only need 10min precision for the last_accessed field
+            need_save = True
+
+        if need_save:
+            try:
+                # this also drops the token from authentication cache
+                token.save(update_fields=update_fields)
+            except:
+                logger.exception('error when save token v2:')
@@ -18,6 +18,7 @@ from seahub.api2.throttling import UserRateThrottle
 from seahub.api2.utils import api_error, to_python_boolean
 from seahub.api2.status import HTTP_520_OPERATION_FAILED
 from seahub.base.accounts import User
+from seahub.group.signals import group_members_changed
 from seahub.profile.models import Profile
 from seahub.profile.utils import refresh_cache as refresh_profile_cache
 from seahub.utils import is_valid_username
@@ -202,6 +203,8 @@ class Account(APIView):
                     # add new user to the group on behalf of the group creator
                     ccnet_threaded_rpc.group_add_member(g.id, g.creator_name,
                                                         to_user)
+                    group_members_changed.send(sender=None, group_id=g.id,
+                                               usernames=[to_user])
 
                 if from_user == g.creator_name:
                     ccnet_threaded_rpc.set_group_creator(g.id, to_user)
@@ -10,8 +10,7 @@ from rest_framework import status
 from seahub.api2.throttling import UserRateThrottle
 from seahub.api2.authentication import TokenAuthentication
 from seahub.api2.utils import api_error
-from seahub.api2.views import reloaddir, get_dir_recursively, \
-    get_dir_entrys_by_id
+from seahub.api2.views import reloaddir, get_dir_tree, get_dir_entrys_by_id
 
 from seahub.views import check_folder_permission
 from seahub.utils import check_filename_with_rename, is_pro_version
@@ -74,14 +73,7 @@ class DirView(APIView):
                     return api_error(status.HTTP_400_BAD_REQUEST, error_msg)
 
                 if recursive == '1':
-                    username = request.user.username
-                    dir_list = get_dir_recursively(username, repo_id, path, [])
-                    dir_list.sort(lambda x, y: cmp(x['name'].lower(), y['name'].lower()))
-
-                    resp = Response(dir_list)
-                    resp["oid"] = dir_id
-                    resp["dir_perm"] = seafile_api.check_permission_by_path(repo_id, path, username)
-                    return resp
+                    return get_dir_tree(request, repo, path, dir_id)
 
             return get_dir_entrys_by_id(request, repo, path, dir_id, request_type)
 
@@ -1,4 +1,3 @@
-import stat
 import logging
 import json
 import posixpath
@@ -16,6 +15,7 @@ from seahub.api2.authentication import TokenAuthentication
 from seahub.api2.utils import api_error
 
 from seahub.utils import string2list, get_fileserver_root
+from seahub.utils.dir_size import get_dirents_size
 from seahub.views import check_folder_permission
 from seahub.views.file import send_file_access_msg
 
@@ -54,7 +54,8 @@ class DirentsDownloadLinkView(APIView):
             return api_error(status.HTTP_400_BAD_REQUEST, error_msg)
 
         # folder exist checking
-        if not seafile_api.get_dir_id_by_path(repo_id, parent_dir):
+        parent_dir_id = seafile_api.get_dir_id_by_path(repo_id, parent_dir)
+        if not parent_dir_id:
             error_msg = 'Folder %s not found.' % parent_dir
             return api_error(status.HTTP_404_NOT_FOUND, error_msg)
 
@@ -63,20 +64,20 @@ class DirentsDownloadLinkView(APIView):
             error_msg = 'Permission denied.'
             return api_error(status.HTTP_403_FORBIDDEN, error_msg)
 
-        dirent_name_list = string2list(dirent_name_string)
-        dirent_list = []
-        total_size = 0
-        for dirent_name in dirent_name_list:
-            dirent_name = dirent_name.strip('/')
-            dirent_list.append(dirent_name)
-
-            full_dirent_path = posixpath.join(parent_dir, dirent_name)
-            current_dirent = seafile_api.get_dirent_by_path(repo_id, full_dirent_path)
-            if stat.S_ISDIR(current_dirent.mode):
-                total_size += seafile_api.get_dir_size(repo.store_id,
-                    repo.version, current_dirent.obj_id)
-            else:
-                total_size += current_dirent.size
+        dirent_list = [dirent_name.strip('/') for dirent_name in
+                       string2list(dirent_name_string)]
+        try:
+            total_size, not_found = get_dirents_size(repo, parent_dir_id,
+                                                     dirent_list)
+        except SearpcError as e:
+            logger.error(e)
+            error_msg = 'Internal Server Error'
+            return api_error(status.HTTP_500_INTERNAL_SERVER_ERROR, error_msg)
+
+        if not_found:
+            error_msg = 'File or folder %s not found.' % \
+                        posixpath.join(parent_dir, not_found[0])
+            return api_error(status.HTTP_404_NOT_FOUND, error_msg)
 
         if total_size > seaserv.MAX_DOWNLOAD_DIR_SIZE:
             error_msg = _('Total size exceeds limit.')
@@ -11,7 +11,7 @@ from pysearpc import SearpcError
 from seahub.api2.authentication import TokenAuthentication
 from seahub.api2.permissions import IsRepoAccessible
 from seahub.api2.throttling import UserRateThrottle
-from seahub.api2.utils import api_error, user_to_dict
+from seahub.api2.utils import api_error, user_to_dict, users_to_dicts
 from seahub.avatar.settings import AVATAR_DEFAULT_SIZE
 from seahub.base.models import FileComment
 from seahub.utils.repo import get_repo_owner
@@ -38,11 +38,13 @@ class FileCommentsView(APIView):
         except ValueError:
             avatar_size = AVATAR_DEFAULT_SIZE
 
+        file_comments = list(FileComment.objects.get_by_file_path(repo_id, path))
+        users = users_to_dicts([o.author for o in file_comments],
+                               request=request, avatar_size=avatar_size)
         comments = []
-        for o in FileComment.objects.get_by_file_path(repo_id, path):
+        for o in file_comments:
             comment = o.to_dict()
-            comment.update(user_to_dict(o.author, request=request,
-                                        avatar_size=avatar_size))
+            comment.update(users[o.author])
             comments.append(comment)
 
         return Response({
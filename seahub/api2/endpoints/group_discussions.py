@@ -13,6 +13,7 @@ from seahub.api2.authentication import TokenAuthentication
 from seahub.api2.permissions import IsGroupMember
 from seahub.api2.throttling import UserRateThrottle
 from seahub.api2.utils import api_error, get_user_common_info
+from seahub.utils.user_info import get_user_infos
 from seahub.group.models import GroupMessage
 from seahub.group.signals import grpmsg_added 
 from seahub.utils.paginator import Paginator
@@ -61,9 +62,11 @@ class GroupDiscussions(APIView):
         except ValueError:
             avatar_size = AVATAR_DEFAULT_SIZE
 
+        infos = get_user_infos([msg.from_email for msg in group_msgs],
+                               avatar_size)
         msgs = []
         for msg in group_msgs:
-            info = get_user_common_info(msg.from_email, avatar_size)
+            info = infos[msg.from_email]
             isoformat_timestr = datetime_to_isoformat_timestr(msg.timestamp)
             msgs.append({
                 "id": msg.pk,
@@ -18,9 +18,10 @@ from seahub.api2.authentication import TokenAuthentication
 from seahub.avatar.settings import AVATAR_DEFAULT_SIZE
 from seahub.utils import string2list, is_org_context
 from seahub.base.accounts import User
-from seahub.group.signals import add_user_to_group
+from seahub.group.signals import add_user_to_group, group_members_changed
 from seahub.group.utils import is_group_member, is_group_admin, \
-    is_group_owner, is_group_admin_or_owner, get_group_member_info
+    is_group_owner, is_group_admin_or_owner, get_group_member_info, \
+    get_group_members_info
 
 from .utils import api_check_group
 
@@ -56,15 +57,13 @@ class GroupMembers(APIView):
             error_msg = 'Internal Server Error'
             return api_error(status.HTTP_500_INTERNAL_SERVER_ERROR, error_msg)
 
-        group_members = []
         is_admin = request.GET.get('is_admin', 'false')
-        for m in members:
+        if is_admin == 'true':
             # only return group admins
-            if is_admin == 'true' and not m.is_staff:
-                continue
+            members = [m for m in members if m.is_staff]
 
-            member_info = get_group_member_info(request, group_id, m.user_name, avatar_size)
-            group_members.append(member_info)
+        group_members = get_group_members_info(request, group_id, members,
+                                               avatar_size)
 
         return Response(group_members)
 
@@ -204,6 +203,8 @@ class GroupMember(APIView):
         if username == email:
             try:
                 seaserv.ccnet_threaded_rpc.quit_group(group_id, username)
+                group_members_changed.send(sender=None, group_id=group_id,
+                                           usernames=[username])
                 # remove repo-group share info of all 'email' owned repos
                 seafile_api.remove_group_repos_by_owner(group_id, email)
                 return Response({'success': True})
@@ -217,6 +218,8 @@ class GroupMember(APIView):
             if is_group_owner(group_id, username):
                 # group owner can delete all group member
                 seaserv.ccnet_threaded_rpc.group_remove_member(group_id, username, email)
+                group_members_changed.send(sender=None, group_id=group_id,
+                                           usernames=[email])
                 seafile_api.remove_group_repos_by_owner(group_id, email)
                 return Response({'success': True})
 
@@ -224,6 +227,8 @@ class GroupMember(APIView):
                 # group admin can NOT delete group owner/admin
                 if not is_group_admin_or_owner(group_id, email):
                     seaserv.ccnet_threaded_rpc.group_remove_member(group_id, username, email)
+                    group_members_changed.send(sender=None, group_id=group_id,
+                                               usernames=[email])
                     seafile_api.remove_group_repos_by_owner(group_id, email)
                     return Response({'success': True})
                 else:
@@ -306,6 +311,8 @@ class GroupMembersBulk(APIView):
             try:
                 seaserv.ccnet_threaded_rpc.group_add_member(group_id,
                     username, email)
+                group_members_changed.send(sender=None, group_id=group_id,
+                                           usernames=[email])
                 member_info = get_group_member_info(request, group_id, email)
                 result['success'].append(member_info)
             except SearpcError as e:
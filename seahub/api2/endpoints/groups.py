@@ -24,6 +24,7 @@ from seahub.utils.timeutils import timestamp_to_isoformat_timestr
 from seahub.group.utils import validate_group_name, check_group_name_conflict, \
     is_group_member, is_group_admin, is_group_owner, is_group_admin_or_owner
 from seahub.group.views import remove_group_common
+from seahub.group.signals import group_members_changed, group_updated
 from seahub.base.templatetags.seahub_tags import email2nickname, \
     translate_seahub_time
 from seahub.views.modules import is_wiki_mod_enabled_for_group, \
@@ -167,6 +168,8 @@ class Groups(APIView):
             logger.error(e)
             error_msg = 'Internal Server Error'
             return api_error(status.HTTP_500_INTERNAL_SERVER_ERROR, error_msg)
+        group_members_changed.send(sender=None, group_id=group_id,
+                                   usernames=[username])
 
         # get info of new group
         group_info = get_group_info(request, group_id)
@@ -230,6 +233,7 @@ class Group(APIView):
                     return api_error(status.HTTP_400_BAD_REQUEST, error_msg)
 
                 seaserv.ccnet_threaded_rpc.set_group_name(group_id, new_group_name)
+                group_updated.send(sender=None, group_id=group_id)
 
             except SearpcError as e:
                 logger.error(e)
@@ -257,6 +261,8 @@ class Group(APIView):
                 # transfer a group
                 if not is_group_member(group_id, new_owner):
                     ccnet_api.group_add_member(group_id, username, new_owner)
+                    group_members_changed.send(sender=None, group_id=group_id,
+                                               usernames=[new_owner])
 
                 if not is_group_admin(group_id, new_owner):
                     ccnet_api.group_set_admin(group_id, new_owner)
@@ -3,9 +3,13 @@ import hmac
 import datetime
 import time
 from hashlib import sha1
+from django.core.cache import cache
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 
 from seahub.base.fields import LowerCaseCharField
+from seahub.signals import user_updated
 
 DESKTOP_PLATFORMS = ('windows', 'linux', 'mac')
 MOBILE_PLATFORMS = ('ios', 'android')
@@ -178,3 +182,37 @@ class TokenV2(models.Model):
                     last_accessed=self.last_accessed,
                     last_login_ip=self.last_login_ip,
                     wiped_at=self.wiped_at)
+
+
+###### Cache of resolved token authentication, see TokenAuthentication.
+TOKEN_AUTH_CACHE_KEY = 'api2_token_auth_%s'
+
+def get_token_auth_cache(key):
+    return cache.get(TOKEN_AUTH_CACHE_KEY % key)
+
+def set_token_auth_cache(key, value, timeout):
+    cache.set(TOKEN_AUTH_CACHE_KEY % key, value, timeout)
+
+def clear_token_auth_cache(keys):
+    if keys:
+        cache.delete_many([TOKEN_AUTH_CACHE_KEY % k for k in keys])
+
+def clear_user_token_auth_cache(username):
+    """Drop cached authentication of every token of ``username``.
+    """
+    keys = list(Token.objects.filter(user=username).values_list('key',
+                                                                flat=True))
+    keys += list(TokenV2.objects.filter(user=username).values_list('key',
+                                                                   flat=True))
+    clear_token_auth_cache(keys)
+
+@receiver(post_delete, sender=Token, dispatch_uid="clear_token_auth_cache_v1")
+@receiver(post_save, sender=TokenV2, dispatch_uid="clear_token_auth_cache_v2_save")
+@receiver(post_delete, sender=TokenV2, dispatch_uid="clear_token_auth_cache_v2_delete")
+def token_changed_cb(sender, instance, **kwargs):
+    # wiped_at is set through save()
+    clear_token_auth_cache([instance.key])
+
+@receiver(user_updated)
+def user_updated_cb(sender, **kwargs):
+    clear_user_token_auth_cache(kwargs['email'])
@@ -55,7 +55,10 @@ class SimpleRateThrottle(BaseThrottle):
 
     Period should be one of: ('s', 'sec', 'm', 'min', 'h', 'hour', 'd', 'day')
 
-    Previous request information used for throttling is stored in the cache.
+    Requests are counted with a sliding window approximated by two fixed
+    windows: the count of the previous window is weighted by how much of it
+    still overlaps the sliding window. Each window is a single integer in the
+    cache, updated with atomic `incr`.
     """
 
     cache = default_cache
@@ -105,6 +108,13 @@ class SimpleRateThrottle(BaseThrottle):
         duration = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
         return (num_requests, duration)
 
+    def get_window_keys(self):
+        """
+        Return cache keys of the current and the previous fixed window.
+        """
+        window = int(self.now // self.duration)
+        return ('%s_%d' % (self.key, window), '%s_%d' % (self.key, window - 1))
+
     def allow_request(self, request, view):
         """
         Implement the check to see if the request should be throttled.
@@ -119,24 +129,47 @@ class SimpleRateThrottle(BaseThrottle):
         if self.key is None:
             return True
 
-        self.history = self.cache.get(self.key, [])
         self.now = self.timer()
+        self.elapsed = self.now % self.duration
+        cur_key, prev_key = self.get_window_keys()
 
-        # Drop any requests from the history which have now passed the
-        # throttle duration
-        while self.history and self.history[-1] <= self.now - self.duration:
-            self.history.pop()
-        if len(self.history) >= self.num_requests:
+        # Count this request first, so that concurrent requests can not all
+        # slip in under the limit.
+        try:
+            self.cur_count = self.cache.incr(cur_key)
+        except ValueError:
+            # Keep the window until the next one is over, it is used as the
+            # previous window there.
+            self.cache.add(cur_key, 0, self.duration * 2)
+            try:
+                self.cur_count = self.cache.incr(cur_key)
+            except ValueError:
+                # cache is not available, do not throttle
+                return True
+
+        self.prev_count = self.cache.get(prev_key, 0)
+        if self.get_count() > self.num_requests:
+            # Rejected requests are not counted.
+            try:
+                self.cache.decr(cur_key)
+            except ValueError:
+                pass
+            self.cur_count -= 1
             return self.throttle_failure()
         return self.throttle_success()
 
+    def get_count(self):
+        """
+        Return estimated number of requests in the sliding window.
+        """
+        weight = (self.duration - self.elapsed) / float(self.duration)
+        return self.prev_count * weight + self.cur_count
+
     def throttle_success(self):
         """
-        Inserts the current request's timestamp along with the key
-        into the cache.
+        Called when a request to the API is allowed, the request is already
+        counted.
         """
-        self.history.insert(0, self.now)
-        self.cache.set(self.key, self.history, self.duration)
         return True
 
     def throttle_failure(self):
@@ -149,16 +182,22 @@ class SimpleRateThrottle(BaseThrottle):
         """
         Returns the recommended next request time in seconds.
         """
-        if self.history:
-            remaining_duration = self.duration - (self.now - self.history[-1])
-        else:
-            remaining_duration = self.duration
-
-        available_requests = self.num_requests - len(self.history) + 1
-        if available_requests <= 0:
-            return None
-
-        return remaining_duration / float(available_requests)
+        available_requests = self.num_requests - self.get_count()
+        if available_requests >= 1:
+            return (self.duration - self.elapsed) / float(available_requests)
+
+        # Requests left in the current window besides the next one.
+        free = self.num_requests - self.cur_count - 1
+        if free >= 0:
+            # Wait until the previous window has faded out enough.
+            return max(0, self.duration * (1 - free / float(self.prev_count)) -
+                       self.elapsed)
+
+        # Wait until the next window, and for the current window to fade out
+        # enough there.
+        return (self.duration - self.elapsed) + max(
+            0, self.duration * (1 - (self.num_requests - 1) /
+                                float(self.cur_count)))
 
 
 class AnonRateThrottle(SimpleRateThrottle):
@@ -5,13 +5,15 @@ import os
 import time
 import json
 import re
+import hashlib
 
 from collections import defaultdict
 from functools import wraps
 from seahub import settings
 
 from django.core.paginator import EmptyPage, InvalidPage
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
 from rest_framework.response import Response
 from rest_framework import status, serializers
 import seaserv
@@ -30,7 +32,9 @@ from seahub.message.models import UserMessage, UserMsgAttachment
 from seahub.notifications.models import UserNotification
 from seahub.utils import api_convert_desc_link, get_file_type_and_ext, \
     gen_file_get_url, is_org_context, get_site_scheme_and_netloc
+from seahub.utils.commit_diff import get_commit_diff
 from seahub.utils.paginator import Paginator
+from seahub.utils.user_info import get_user_infos
 from seahub.utils.file_types import IMAGE
 from seahub.api2.models import Token, TokenV2, DESKTOP_PLATFORMS
 from seahub.avatar.settings import AVATAR_DEFAULT_SIZE
@@ -43,6 +47,36 @@ def api_error(code, msg):
     err_resp = {'error_msg': msg}
     return Response(err_resp, status=code)
 
+def gen_etag(*parts):
+    """Return a quoted ETag made of ``parts``, e.g. object id, permission and
+    request arguments.
+    """
+    value = '\0'.join([p if isinstance(p, basestring) else str(p)
+                       for p in parts])
+    if isinstance(value, unicode):
+        value = value.encode('utf-8')
+    return quote_etag(hashlib.sha1(value).hexdigest())
+
+def etag_matches(request, etag):
+    """Return True if ``If-None-Match`` header of ``request`` matches ``etag``.
+    """
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header or etag is None:
+        return False
+
+    # weak comparison as required for If-None-Match, ``W/`` is dropped by
+    # parse_etags
+    etags = parse_etags(header)
+    return '*' in etags or parse_etags(etag)[0] in etags
+
+def not_modified_response(etag, oid):
+    """Return ``304 Not Modified`` with ``etag`` and ``oid`` headers.
+    """
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    response['oid'] = oid
+    return response
+
 def get_file_size(store_id, repo_version, file_id):
     size = seafile_api.get_file_size(store_id, repo_version, file_id)
     return size if size else 0
@@ -438,7 +472,7 @@ def get_client_ip(request):
 def get_diff_details(repo_id, commit1, commit2):
     result = defaultdict(list)
 
-    diff_result = seafserv_threaded_rpc.get_diff(repo_id, commit1, commit2)
+    diff_result = get_commit_diff(repo_id, commit1, commit2)
     if not diff_result:
         return result
 
@@ -653,7 +687,18 @@ def get_user_common_info(email, avatar_size=AVATAR_DEFAULT_SIZE):
     }
 
 def user_to_dict(email, request=None, avatar_size=AVATAR_DEFAULT_SIZE):
-    d = get_user_common_info(email, avatar_size)
+    return user_info_to_dict(get_user_common_info(email, avatar_size),
+                             request)
+
+def users_to_dicts(emails, request=None, avatar_size=AVATAR_DEFAULT_SIZE):
+    """Return a dict of ``email -> user_to_dict(email)``, with profiles and
+    avatars of all ``emails`` looked up at once.
+    """
+    infos = get_user_infos(emails, avatar_size)
+    return dict((email, user_info_to_dict(info, request))
+                for email, info in infos.iteritems())
+
+def user_info_to_dict(d, request=None):
     if request is None:
         avatar_url = '%s%s' % (get_site_scheme_and_netloc(), d['avatar_url'])
     else:
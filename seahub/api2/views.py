@@ -21,7 +21,7 @@ from django.contrib.auth.hashers import check_password
 from django.contrib.sites.models import RequestSite
 from django.db import IntegrityError
 from django.db.models import F, Q
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.template import RequestContext
 from django.template.loader import render_to_string
 from django.template.defaultfilters import filesizeformat
@@ -37,11 +37,13 @@ from .utils import get_diff_details, \
     get_groups, get_group_and_contacts, prepare_events, \
     api_group_check, get_timestamp, json_response, is_seafile_pro, \
     api_repo_user_folder_perm_check, api_repo_setting_permission_check, \
-    api_repo_group_folder_perm_check
+    api_repo_group_folder_perm_check, gen_etag, etag_matches, \
+    not_modified_response
 
 from seahub.api2.base import APIView
 from seahub.api2.models import TokenV2
-from seahub.avatar.templatetags.avatar_tags import api_avatar_url, avatar
+from seahub.avatar.templatetags.avatar_tags import api_avatar_url, \
+    get_default_avatar_url
 from seahub.avatar.templatetags.group_avatar_tags import api_grp_avatar_url, \
         grp_avatar
 from seahub.base.accounts import User
@@ -50,9 +52,10 @@ from seahub.base.templatetags.seahub_tags import email2nickname, \
     translate_seahub_time, translate_commit_desc_escape
 from seahub.group.views import remove_group_common, \
     rename_group_with_new_name, is_group_staff
+from seahub.group.signals import group_members_changed
 from seahub.group.utils import BadGroupNameError, ConflictGroupNameError, \
     validate_group_name
-from seahub.thumbnail.utils import generate_thumbnail
+from seahub.thumbnail.utils import generate_thumbnail, get_thumbnail_path
 from seahub.notifications.models import UserNotification
 from seahub.options.models import UserOptions
 from seahub.contacts.models import Contact
@@ -65,9 +68,17 @@ from seahub.utils import gen_file_get_url, gen_token, gen_file_upload_url, \
     gen_block_get_url, get_file_type_and_ext, HAS_FILE_SEARCH, \
     gen_file_share_link, gen_dir_share_link, is_org_context, gen_shared_link, \
     get_org_user_events, calculate_repos_last_modify, send_perm_audit_msg, \
-    gen_shared_upload_link, convert_cmmt_desc_link, is_org_repo_creation_allowed
+    gen_shared_upload_link, convert_cmmt_desc_link, is_org_repo_creation_allowed, \
+    get_user_events_by_cursor, decode_events_cursor, InvalidEventsCursor
 from seahub.utils.devices import get_user_devices, do_unlink_device
+from seahub.utils.dir_size import get_dir_size
 from seahub.utils.repo import get_sub_repo_abbrev_origin_path
+from seahub.utils.repo_list import RepoList
+from seahub.utils.user_info import get_user_infos
+from seahub.utils.dir_listing import list_dir_for_user, page_dir_for_user, \
+    SORT_KEYS, InvalidCursor
+from seahub.utils.dir_tree import DirTreeWalker, dir_tree_entry, \
+    iter_dir_tree_ndjson, DIR_TREE_MAX_NODES
 from seahub.utils.star import star_file, unstar_file
 from seahub.utils.file_types import DOCUMENT
 from seahub.utils.file_size import get_file_size_unit
@@ -76,8 +87,7 @@ from seahub.views import is_registered_user, check_file_lock, \
     group_events_data, get_diff, create_default_library, \
     list_inner_pub_repos, get_virtual_repos_by_owner, \
     check_folder_permission
-from seahub.views.ajax import get_share_in_repo_list, get_groups_by_user, \
-    get_group_repos
+from seahub.views.ajax import get_groups_by_user
 from seahub.views.file import get_file_view_path_and_perm, send_file_access_msg
 if HAS_FILE_SEARCH:
     from seahub_extra.search.views import search_keyword
@@ -85,7 +95,7 @@ from seahub.utils import HAS_OFFICE_CONVERTER
 if HAS_OFFICE_CONVERTER:
     from seahub.utils import query_office_convert_status, prepare_converted_html
 import seahub.settings as settings
-from seahub.settings import THUMBNAIL_EXTENSION, THUMBNAIL_ROOT, \
+from seahub.settings import THUMBNAIL_EXTENSION, \
     ENABLE_GLOBAL_ADDRESSBOOK, FILE_LOCK_EXPIRATION_DAYS, \
     ENABLE_THUMBNAIL, ENABLE_FOLDER_PERM
 try:
@@ -111,6 +121,11 @@ try:
 except ImportError:
     OFFICE_WEB_APP_FILE_EXTENSION = ()
 
+try:
+    from seahub.settings import DIR_PAGE_MAX_LIMIT
+except ImportError:
+    DIR_PAGE_MAX_LIMIT = 1000
+
 from pysearpc import SearpcError, SearpcObjEncoder
 import seaserv
 from seaserv import seafserv_threaded_rpc, \
@@ -401,22 +416,14 @@ class Repos(APIView):
         if not UserOptions.objects.is_sub_lib_enabled(email):
             filter_by['sub'] = False
 
+        # All sections share one repo table, so a repo is only resolved once
+        # however many sections and groups it shows up in.
+        repo_list = RepoList(request)
+
         repos_json = []
         if filter_by['mine']:
-            if is_org_context(request):
-                org_id = request.user.org.org_id
-                owned_repos = seafile_api.get_org_owned_repo_list(org_id,
-                        email, ret_corrupted=True)
-            else:
-                owned_repos = seafile_api.get_owned_repo_list(email,
-                        ret_corrupted=True)
-
-            owned_repos.sort(lambda x, y: cmp(y.last_modify, x.last_modify))
-            for r in owned_repos:
-                # do not return virtual repos
-                if r.is_virtual:
-                    continue
-
+            # virtual repos are excluded
+            for r in repo_list.owned():
                 repo = {
                     "type": "repo",
                     "id": r.id,
@@ -442,13 +449,11 @@ class Repos(APIView):
 
         if filter_by['sub']:
             # compose abbrev origin path for display
-            sub_repos = []
-            sub_repos = get_virtual_repos_by_owner(request)
+            sub_repos = repo_list.sub()
             for repo in sub_repos:
                 repo.abbrev_origin_path = get_sub_repo_abbrev_origin_path(
                     repo.origin_repo_name, repo.origin_path)
 
-            sub_repos.sort(lambda x, y: cmp(y.last_modify, x.last_modify))
             for r in sub_repos:
                 # print r._dict
                 repo = {
@@ -477,9 +482,7 @@ class Repos(APIView):
                 repos_json.append(repo)
 
         if filter_by['shared']:
-            shared_repos = get_share_in_repo_list(request, -1, -1)
-            shared_repos.sort(lambda x, y: cmp(y.last_modify, x.last_modify))
-            for r in shared_repos:
+            for r in repo_list.shared():
                 r.password_need = is_passwd_set(r.repo_id, email)
                 repo = {
                     "type": "srepo",
@@ -507,20 +510,18 @@ class Repos(APIView):
 
         if filter_by['group']:
             groups = get_groups_by_user(request)
-            group_repos = get_group_repos(request, groups)
-            group_repos.sort(lambda x, y: cmp(y.last_modify, x.last_modify))
-            for r in group_repos:
+            for grp, r, perm in repo_list.group(groups):
                 repo = {
                     "type": "grepo",
                     "id": r.id,
-                    "owner": r.group.group_name,
-                    "groupid": r.group.id,
+                    "owner": grp.group_name,
+                    "groupid": grp.id,
                     "name": r.name,
                     "desc": r.desc,
                     "mtime": r.last_modify,
                     "size": r.size,
                     "encrypted": r.encrypted,
-                    "permission": check_permission(r.id, email),
+                    "permission": perm,
                     "root": r.root,
                     "head_commit_id": r.head_cmmt_id,
                     "version": r.version,
@@ -532,8 +533,7 @@ class Repos(APIView):
                 repos_json.append(repo)
 
         if filter_by['org'] and request.user.permissions.can_view_org():
-            public_repos = list_inner_pub_repos(request)
-            for r in public_repos:
+            for r in repo_list.public():
                 repo = {
                     "type": "grepo",
                     "id": r.repo_id,
@@ -1301,26 +1301,50 @@ class UpdateBlksLinkView(APIView):
         url = gen_file_upload_url(token, 'update-blks-api')
         return Response(url)
 
-def get_dir_recursively(username, repo_id, path, all_dirs):
-    path_id = seafile_api.get_dir_id_by_path(repo_id, path)
-    dirs = seafserv_threaded_rpc.list_dir_with_perm(repo_id, path,
-            path_id, username, -1, -1)
+def get_dir_etag(dir_id, dir_perm, *args):
+    """ETag of a dir listing, made of dir id, permission of the user and
+    ``args``. Return None in pro edition, where lock state and folder
+    permissions of entries can change while dir id is the same.
+    """
+    if is_pro_version():
+        return None
+    return gen_etag(dir_id, dir_perm, *args)
+
+def dirent_to_dict(dirent, username, is_pro):
+    if dirent.is_dir():
+        return {
+            "type": "dir",
+            "name": dirent.obj_name,
+            "id": dirent.obj_id,
+            "mtime": dirent.mtime,
+            "permission": dirent.permission,
+        }
 
-    for dirent in dirs:
-        if stat.S_ISDIR(dirent.mode):
-            entry = {}
-            entry["type"] = 'dir'
-            entry["parent_dir"] = path
-            entry["id"] = dirent.obj_id
-            entry["name"] = dirent.obj_name
-            entry["mtime"] = dirent.mtime
-            entry["permission"] = dirent.permission
-            all_dirs.append(entry)
+    entry = {}
+    entry["size"] = dirent.size
+    if is_pro:
+        entry["is_locked"] = dirent.is_locked
+        entry["lock_owner"] = dirent.lock_owner
+        entry["lock_time"] = dirent.lock_time
+        if username == dirent.lock_owner:
+            entry["locked_by_me"] = True
+        else:
+            entry["locked_by_me"] = False
 
-            sub_path = posixpath.join(path, dirent.obj_name)
-            get_dir_recursively(username, repo_id, sub_path, all_dirs)
+    entry["type"] = "file"
+    entry["name"] = dirent.obj_name
+    entry["id"] = dirent.obj_id
+    entry["mtime"] = dirent.mtime
+    entry["permission"] = dirent.permission
+    return entry
 
-    return all_dirs
+def iter_json_array(entries, to_dict):
+    """Serialize ``entries`` as a JSON array, one entry at a time.
+    """
+    yield '['
+    for i, e in enumerate(entries):
+        yield (',' if i else '') + json.dumps(to_dict(e))
+    yield ']'
 
 def get_dir_entrys_by_id(request, repo, path, dir_id, request_type=None):
     """ Get dirents in a dir
@@ -1328,51 +1352,30 @@ def get_dir_entrys_by_id(request, repo, path, dir_id, request_type=None):
     if request_type is 'f', only return file list,
     if request_type is 'd', only return dir list,
     else, return both.
+
+    If ``limit`` is given, only return a page of dirents, see
+    `get_dir_entrys_page`.
     """
     username = request.user.username
+    dir_perm = seafile_api.check_permission_by_path(repo.id, path, username)
+    if 'limit' in request.GET:
+        return get_dir_entrys_page(request, repo, path, dir_id, dir_perm,
+                                   request_type)
+
+    etag = get_dir_etag(dir_id, dir_perm, request_type or '')
+    if etag_matches(request, etag):
+        return not_modified_response(etag, dir_id)
+
     try:
-        dirs = seafserv_threaded_rpc.list_dir_with_perm(repo.id, path, dir_id,
-                username, -1, -1)
-        dirs = dirs if dirs else []
+        dirs, files = list_dir_for_user(repo, path, dir_id, username, dir_perm)
     except SearpcError, e:
         logger.error(e)
         return api_error(HTTP_520_OPERATION_FAILED,
                          "Failed to list dir.")
 
-    dir_list, file_list = [], []
-    for dirent in dirs:
-        dtype = "file"
-        entry = {}
-        if stat.S_ISDIR(dirent.mode):
-            dtype = "dir"
-        else:
-            if repo.version == 0:
-                entry["size"] = get_file_size(repo.store_id, repo.version,
-                                              dirent.obj_id)
-            else:
-                entry["size"] = dirent.size
-
-            if is_pro_version():
-                entry["is_locked"] = dirent.is_locked
-                entry["lock_owner"] = dirent.lock_owner
-                entry["lock_time"] = dirent.lock_time
-                if username == dirent.lock_owner:
-                    entry["locked_by_me"] = True
-                else:
-                    entry["locked_by_me"] = False
-
-        entry["type"] = dtype
-        entry["name"] = dirent.obj_name
-        entry["id"] = dirent.obj_id
-        entry["mtime"] = dirent.mtime
-        entry["permission"] = dirent.permission
-        if dtype == 'dir':
-            dir_list.append(entry)
-        else:
-            file_list.append(entry)
-
-    dir_list.sort(lambda x, y: cmp(x['name'].lower(), y['name'].lower()))
-    file_list.sort(lambda x, y: cmp(x['name'].lower(), y['name'].lower()))
+    is_pro = is_pro_version()
+    dir_list = [dirent_to_dict(d, username, is_pro) for d in dirs]
+    file_list = [dirent_to_dict(f, username, is_pro) for f in files]
 
     if request_type == 'f':
         dentrys = file_list
@@ -1384,7 +1387,122 @@ def get_dir_entrys_by_id(request, repo, path, dir_id, request_type=None):
     response = HttpResponse(json.dumps(dentrys), status=200,
                             content_type=json_content_type)
     response["oid"] = dir_id
-    response["dir_perm"] = seafile_api.check_permission_by_path(repo.id, path, username)
+    response["dir_perm"] = dir_perm
+    if etag:
+        response["ETag"] = etag
+    return response
+
+def get_dir_entrys_page(request, repo, path, dir_id, dir_perm,
+                        request_type=None):
+    """ Get a page of dirents in a dir, streamed as a JSON array.
+
+    Arguments in query string:
+    - `limit`: max number of dirents, at most ``DIR_PAGE_MAX_LIMIT``.
+    - `cursor`: value of ``next_cursor`` header of the previous page.
+    - `sort`: 'name' (default), 'mtime' or 'size', dirs always come first,
+      'mtime' and 'size' are in descending order.
+    """
+    username = request.user.username
+    try:
+        limit = int(request.GET.get('limit'))
+    except ValueError:
+        limit = 0
+    if limit <= 0 or limit > DIR_PAGE_MAX_LIMIT:
+        return api_error(status.HTTP_400_BAD_REQUEST,
+                         "'limit' should be between 1 and %d." % DIR_PAGE_MAX_LIMIT)
+
+    sort = request.GET.get('sort', 'name')
+    if sort not in SORT_KEYS:
+        return api_error(status.HTTP_400_BAD_REQUEST,
+                         "'sort' should be 'name', 'mtime' or 'size'.")
+    cursor = request.GET.get('cursor', None)
+
+    etag = get_dir_etag(dir_id, dir_perm, request_type or '', sort,
+                        cursor or '', limit)
+    if etag_matches(request, etag):
+        return not_modified_response(etag, dir_id)
+
+    try:
+        dirents, next_cursor = page_dir_for_user(
+            repo, path, dir_id, username, dir_perm, sort=sort, cursor=cursor,
+            limit=limit, request_type=request_type)
+    except InvalidCursor:
+        return api_error(status.HTTP_400_BAD_REQUEST, "'cursor' is invalid.")
+    except SearpcError, e:
+        logger.error(e)
+        return api_error(HTTP_520_OPERATION_FAILED,
+                         "Failed to list dir.")
+
+    is_pro = is_pro_version()
+    response = StreamingHttpResponse(
+        iter_json_array(dirents, lambda d: dirent_to_dict(d, username, is_pro)),
+        status=200, content_type=json_content_type)
+    response["oid"] = dir_id
+    response["dir_perm"] = dir_perm
+    if next_cursor:
+        response["next_cursor"] = next_cursor
+    if etag:
+        response["ETag"] = etag
+    return response
+
+def get_dir_tree(request, repo, path, dir_id):
+    """ Get all sub dirs of a dir.
+
+    Arguments in query string:
+    - `max_depth`: only return sub dirs up to this depth, no limit if missing.
+    - `max_nodes`: max number of sub dirs, at most ``DIR_TREE_MAX_NODES``.
+    - `stream`: '1' to stream dirs as newline delimited JSON in the order they
+      are found, otherwise a JSON array sorted by name is returned.
+
+    If the tree has more dirs than allowed, the response has a
+    ``truncated`` header, or a last ``{"truncated": true}`` line if streamed.
+    """
+    username = request.user.username
+    try:
+        # no limit if missing, 0 returns no sub dirs
+        max_depth = request.GET.get('max_depth', None)
+        if max_depth is not None:
+            max_depth = int(max_depth)
+        max_nodes = int(request.GET.get('max_nodes', DIR_TREE_MAX_NODES))
+    except ValueError:
+        return api_error(status.HTTP_400_BAD_REQUEST,
+                         "'max_depth' and 'max_nodes' should be integers.")
+    if (max_depth is not None and max_depth < 0) or \
+       not 0 < max_nodes <= DIR_TREE_MAX_NODES:
+        return api_error(status.HTTP_400_BAD_REQUEST,
+                         "'max_nodes' should be between 1 and %d." % DIR_TREE_MAX_NODES)
+    stream = request.GET.get('stream', '0') == '1'
+
+    dir_perm = seafile_api.check_permission_by_path(repo.id, path, username)
+    etag = get_dir_etag(dir_id, dir_perm, 'recursive',
+                        '' if max_depth is None else max_depth,
+                        max_nodes, stream)
+    if etag_matches(request, etag):
+        return not_modified_response(etag, dir_id)
+
+    walker = DirTreeWalker(repo, path, dir_id, username, dir_perm,
+                           max_depth=max_depth, max_nodes=max_nodes)
+    if stream:
+        response = StreamingHttpResponse(iter_dir_tree_ndjson(walker),
+                                         status=200,
+                                         content_type='application/x-ndjson')
+    else:
+        try:
+            dir_list = [dir_tree_entry(p, d) for p, d in walker]
+        except SearpcError as e:
+            logger.error(e)
+            return api_error(HTTP_520_OPERATION_FAILED,
+                             "Failed to list dir.")
+        dir_list.sort(key=lambda x: x['name'].lower())
+        response = HttpResponse(json.dumps(dir_list), status=200,
+                                content_type=json_content_type)
+        if walker.truncated:
+            response["truncated"] = "true"
+
+    response["oid"] = dir_id
+    response["dir_perm"] = dir_perm
+    if etag:
+        response["ETag"] = etag
     return response
 
 def get_shared_link(request, repo_id, path):
@@ -1427,6 +1545,11 @@ def get_repo_file(request, repo_id, file_id, file_name, op, use_onetime=True):
         return response
 
     if op == 'downloadblks':
+        # block list only depends on file id
+        etag = gen_etag(file_id, op)
+        if etag_matches(request, etag):
+            return not_modified_response(etag, file_id)
+
         blklist = []
         encrypted = False
         enc_version = 0
@@ -1453,6 +1576,7 @@ def get_repo_file(request, repo_id, file_id, file_name, op, use_onetime=True):
         response = HttpResponse(json.dumps(res), status=200,
                                 content_type=json_content_type)
         response["oid"] = file_id
+        response["ETag"] = etag
         return response
 
     if op == 'sharelink':
@@ -2427,14 +2551,7 @@ class DirView(APIView):
                             "If you want to get recursive dir entries, you should set 'recursive' argument as '1'.")
 
                 if recursive == '1':
-                    username = request.user.username
-                    dir_list = get_dir_recursively(username, repo_id, path, [])
-                    dir_list.sort(lambda x, y: cmp(x['name'].lower(), y['name'].lower()))
-                    response = HttpResponse(json.dumps(dir_list), status=200,
-                                            content_type=json_content_type)
-                    response["oid"] = dir_id
-                    response["dir_perm"] = seafile_api.check_permission_by_path(repo_id, path, username)
-                    return response
+                    return get_dir_tree(request, repo, path, dir_id)
 
             return get_dir_entrys_by_id(request, repo, path, dir_id, request_type)
 
@@ -2605,8 +2722,7 @@ class DirDownloadView(APIView):
             return api_error(status.HTTP_404_NOT_FOUND, "Path does not exist")
 
         try:
-            total_size = seafserv_threaded_rpc.get_dir_size(repo.store_id, repo.version,
-                                                            dir_id)
+            total_size = get_dir_size(repo, dir_id)
         except Exception, e:
             logger.error(str(e))
             return api_error(HTTP_520_OPERATION_FAILED, "Internal error")
@@ -3302,6 +3418,14 @@ class EventsView(APIView):
             events = None
             return api_error(status.HTTP_404_NOT_FOUND, 'Events not enabled.')
 
+        # ``cursor`` is preferred, ``start`` is kept for old clients
+        cursor = request.GET.get('cursor', None)
+        if cursor:
+            try:
+                decode_events_cursor(cursor)
+            except InvalidEventsCursor:
+                return api_error(status.HTTP_400_BAD_REQUEST, 'Invalid cursor.')
+
         start = request.GET.get('start', '')
 
         if not start:
@@ -3314,9 +3438,14 @@ class EventsView(APIView):
 
         email = request.user.username
         events_count = 15
-
-        if is_org_context(request):
-            org_id = request.user.org.org_id
+        org_id = request.user.org.org_id if is_org_context(request) else None
+
+        events_next_cursor = None
+        if cursor is not None:
+            events, events_more_offset, events_next_cursor = \
+                get_user_events_by_cursor(email, cursor or None,
+                                          events_count, org_id=org_id)
+        elif org_id:
             events, events_more_offset = get_org_user_events(org_id, email,
                                                              start,
                                                              events_count)
@@ -3325,6 +3454,11 @@ class EventsView(APIView):
                                                          events_count)
         events_more = True if len(events) == events_count else False
 
+        try:
+            size = int(request.GET.get('size', 36))
+        except ValueError:
+            size = 36
+
         l = []
         for e in events:
             d = dict(etype=e.etype)
@@ -3352,19 +3486,23 @@ class EventsView(APIView):
                 time_diff = local - epoch
                 d['time'] = time_diff.seconds + (time_diff.days * 24 * 3600)
 
-            size = request.GET.get('size', 36)
-            url, is_default, date_uploaded = api_avatar_url(d['author'], size)
-            d['nick'] = email2nickname(d['author'])
-            d['name'] = email2nickname(d['author'])
-            d['avatar'] = avatar(d['author'], size)
-            d['avatar_url'] = request.build_absolute_uri(url)
             d['time_relative'] = translate_seahub_time(utc_to_local(e.timestamp))
             d['date'] = utc_to_local(e.timestamp).strftime("%Y-%m-%d")
 
+        user_infos = get_user_infos([d['author'] for d in l], size)
+        for d in l:
+            info = user_infos.get(d['author'])
+            url = info['avatar_url'] if info else get_default_avatar_url()
+            d['nick'] = d['name'] = info['name'] if info else ''
+            d['avatar'] = '<img src="%s" width="%s" height="%s" class="avatar" />' % \
+                          (url, size, size)
+            d['avatar_url'] = request.build_absolute_uri(url)
+
         ret = {
             'events': l,
             'more': events_more,
             'more_offset': events_more_offset,
+            'next_cursor': events_next_cursor,
             }
         return Response(ret)
 
@@ -3461,6 +3599,8 @@ class Groups(APIView):
         try:
             group_id = ccnet_threaded_rpc.create_group(group_name.encode('utf-8'),
                                                        username)
+            group_members_changed.send(sender=None, group_id=group_id,
+                                       usernames=[username])
             return HttpResponse(json.dumps({'success': True, 'group_id': group_id}),
                                 content_type=content_type)
         except SearpcError, e:
@@ -3558,6 +3698,8 @@ class GroupMembers(APIView):
             ccnet_threaded_rpc.group_add_member(group.id, request.user.username, user_name)
         except SearpcError, e:
             return api_error(status.HTTP_500_INTERNAL_SERVER_ERROR, 'Unable to add user to group')
+        group_members_changed.send(sender=None, group_id=group.id,
+                                   usernames=[user_name])
 
         return HttpResponse(json.dumps({'success': True}), status=200, content_type=json_content_type)
 
@@ -3583,6 +3725,8 @@ class GroupMembers(APIView):
             ccnet_threaded_rpc.group_remove_member(group.id, request.user.username, user_name)
         except SearpcError, e:
             return api_error(status.HTTP_500_INTERNAL_SERVER_ERROR, 'Unable to add user to group')
+        group_members_changed.send(sender=None, group_id=group.id,
+                                   usernames=[user_name])
 
         return HttpResponse(json.dumps({'success': True}), status=200, content_type=json_content_type)
 
@@ -3879,8 +4023,7 @@ class ThumbnailView(APIView):
 
         success, status_code = generate_thumbnail(request, repo_id, size, path)
         if success:
-            thumbnail_dir = os.path.join(THUMBNAIL_ROOT, str(size))
-            thumbnail_file = os.path.join(thumbnail_dir, obj_id)
+            thumbnail_file = get_thumbnail_path(size, obj_id)
             try:
                 with open(thumbnail_file, 'rb') as f:
                     thumbnail = f.read()
@@ -110,12 +110,26 @@ def logout(request):
         request.user = AnonymousUser()
 
 def get_user(request):
+    """Return user of the session. While the session's password hash is
+    verified recently and the user is not updated, the user is served from
+    cache instead of ccnet.
+    """
     from seahub.auth.models import AnonymousUser
+    from seahub.password_session.handlers import is_session_verified, \
+        get_cached_user, cache_user
     try:
         username = request.session[SESSION_KEY]
         backend_path = request.session[BACKEND_SESSION_KEY]
+        if is_session_verified(request, username):
+            user = get_cached_user(username)
+            if user is not None:
+                return user
+
         backend = load_backend(backend_path)
-        user = backend.get_user(username) or AnonymousUser()
+        user = backend.get_user(username)
+        if user is None:
+            return AnonymousUser()
+        cache_user(user)
     except KeyError:
         user = AnonymousUser()
     return user
@@ -14,6 +14,7 @@ from seaserv import ccnet_threaded_rpc, unset_repo_passwd, is_passwd_set, \
     seafile_api
 
 from seahub.profile.models import Profile, DetailedProfile
+from seahub.signals import user_updated
 from seahub.utils import is_valid_username, is_user_password_strong, \
     clear_token, get_system_admins
 from seahub.utils.mail import send_html_email_with_dj_template, MAIL_PRIORITY
@@ -52,6 +53,7 @@ class UserManager(object):
         If user has a role, update it; or create a role for user.
         """
         ccnet_threaded_rpc.update_role_emailuser(email, role)
+        user_updated.send(sender=User, email=email)
         return self.get(email=email)
 
     def create_superuser(self, email, password):
@@ -168,6 +170,7 @@ class User(object):
                                                               self.password,
                                                               int(self.is_staff),
                                                               int(self.is_active))
+            user_updated.send(sender=User, email=self.username)
         else:
             result_code = ccnet_threaded_rpc.add_emailuser(self.username,
                                                            self.password,
@@ -199,6 +202,7 @@ class User(object):
 
         clear_token(self.username)
         ccnet_threaded_rpc.remove_emailuser(source, self.username)
+        user_updated.send(sender=User, email=self.username)
         Profile.objects.delete_profile_by_user(self.username)
 
     def get_and_delete_messages(self):
@@ -1,5 +1,36 @@
+import logging
+import uuid
+
 from django.apps import AppConfig
-from django.core.cache import cache
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+def check_cache_health():
+    """Write, read back and delete a random key on every configured cache.
+
+    Returns a list of ``(alias, error message)`` for caches which failed.
+    """
+    errors = []
+    for alias in settings.CACHES:
+        key = 'seahub_cache_probe_%s' % uuid.uuid4().hex
+        value = uuid.uuid4().hex
+        try:
+            cache = caches[alias]
+            cache.set(key, value, 60)
+            if hasattr(cache, 'clear_local'):
+                # make sure the value is read back from the shared tier
+                cache.clear_local()
+            got = cache.get(key)
+            cache.delete(key)
+        except Exception as e:
+            errors.append((alias, str(e)))
+            continue
+
+        if got != value:
+            errors.append((alias, 'value written could not be read back'))
+    return errors
 
 class BaseConfig(AppConfig):
     name = "seahub.base"
@@ -7,10 +38,10 @@ class BaseConfig(AppConfig):
 
     def ready(self):
         super(BaseConfig, self).ready()
-        cache.set('test_cache', 'worked')
-        if cache.get('test_cache') != 'worked':
+        for alias, err in check_cache_health():
+            logger.error('Cache "%s" is not working: %s' % (alias, err))
             print '''
-Warning: Cache is not working, please check memcached is running if you are using
-memcached backend, otherwise, please check permission of cache directory on your
-file system.
-            '''
+Warning: Cache "%s" is not working (%s), please check memcached is running if
+you are using memcached backend, otherwise, please check permission of cache
+directory on your file system.
+            ''' % (alias, err)
@@ -0,0 +1,348 @@
+"""
+Cache backends for seahub.
+
+`TieredCache` puts a small process-local LRU with a short TTL in front of a
+shared cache (memcached by default), so hot keys like nicknames, avatars and
+throttle history are served from memory, while every worker process still
+sees the same data within `LOCAL_TIMEOUT` seconds.
+
+`LocalSharedCache` is an in-process stand-in for the shared tier, for
+development and tests where memcached is not available.
+
+Example::
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'seahub.base.cache_backends.TieredCache',
+            'OPTIONS': {
+                'SHARED': 'shared',         # alias of the shared tier
+                'LOCAL_MAX_ENTRIES': 10000,
+                'LOCAL_TIMEOUT': 5,
+            },
+        },
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': '127.0.0.1:11211',
+        },
+    }
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.utils.six.moves import cPickle as pickle
+
+class LocalLRU(object):
+    """Thread-safe LRU dict with per-entry expiry, values are pickled so
+    callers never share mutable objects.
+    """
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return ``(found, value)``.
+        """
+        with self._lock:
+            try:
+                expire_at, pickled = self._data.pop(key)
+            except KeyError:
+                return False, None
+            if expire_at <= time.time():
+                return False, None
+            self._data[key] = (expire_at, pickled)
+        return True, pickle.loads(pickled)
+
+    def set(self, key, value, timeout=None):
+        if self.max_entries <= 0:
+            return
+
+        ttl = self.timeout
+        if timeout is not None:
+            ttl = min(ttl, timeout)
+        if ttl <= 0:
+            self.delete(key)
+            return
+
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (time.time() + ttl, pickled)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+# Local tiers of TieredCache, keyed by location.
+_local_tiers = {}
+_local_tiers_lock = threading.Lock()
+
+class TieredCache(BaseCache):
+    """Process-local LRU in front of a shared cache backend.
+    """
+    def __init__(self, location, params):
+        super(TieredCache, self).__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = options.get('SHARED', 'shared')
+
+        # Django creates a backend instance per thread, keep the local tier
+        # and its counters per process instead.
+        with _local_tiers_lock:
+            if location not in _local_tiers:
+                _local_tiers[location] = (
+                    LocalLRU(int(options.get('LOCAL_MAX_ENTRIES', 10000)),
+                             float(options.get('LOCAL_TIMEOUT', 5))),
+                    {}, threading.Lock())
+            self._local, self._stats, self._stats_lock = _local_tiers[location]
+        if not self._stats:
+            self.reset_stats()
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def _count(self, name, n=1):
+        if n:
+            with self._stats_lock:
+                self._stats[name] += n
+
+    def stats(self):
+        """Return hit/miss counters of both tiers since the last reset.
+        """
+        with self._stats_lock:
+            ret = dict(self._stats)
+        ret['local_entries'] = len(self._local)
+        return ret
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats.update({
+                'local_hits': 0,
+                'shared_hits': 0,
+                'misses': 0,
+            })
+
+    def _local_key(self, key, version):
+        return self.make_key(key, version=version)
+
+    def _local_timeout(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return None
+        return timeout - time.time()
+
+    def get(self, key, default=None, version=None):
+        local_key = self._local_key(key, version)
+        found, value = self._local.get(local_key)
+        if found:
+            self._count('local_hits')
+            return value
+
+        value = self.shared.get(key, self, version=version)
+        if value is self:
+            self._count('misses')
+            return default
+
+        self._count('shared_hits')
+        self._local.set(local_key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        ret = {}
+        missing = []
+        for key in keys:
+            found, value = self._local.get(self._local_key(key, version))
+            if found:
+                ret[key] = value
+            else:
+                missing.append(key)
+        self._count('local_hits', len(ret))
+
+        if missing:
+            fetched = self.shared.get_many(missing, version=version)
+            for key, value in fetched.iteritems():
+                self._local.set(self._local_key(key, version), value)
+            ret.update(fetched)
+            self._count('shared_hits', len(fetched))
+            self._count('misses', len(missing) - len(fetched))
+        return ret
+
+    def has_key(self, key, version=None):
+        return self.get(key, self, version=version) is not self
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._local.set(self._local_key(key, version), value,
+                            self._local_timeout(timeout))
+        return added
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self._local.set(self._local_key(key, version), value,
+                        self._local_timeout(timeout))
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set_many(data, timeout, version=version)
+        local_timeout = self._local_timeout(timeout)
+        for key, value in data.iteritems():
+            self._local.set(self._local_key(key, version), value,
+                            local_timeout)
+
+    def delete(self, key, version=None):
+        self._local.delete(self._local_key(key, version))
+        self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self._local.delete(self._local_key(key, version))
+        self.shared.delete_many(keys, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        # Counters must be atomic across processes, never serve them locally.
+        self._local.delete(self._local_key(key, version))
+        return self.shared.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        self._local.delete(self._local_key(key, version))
+        return self.shared.decr(key, delta, version=version)
+
+    def clear(self):
+        self._local.clear()
+        self.shared.clear()
+
+    def clear_local(self):
+        """Drop the process-local tier only.
+        """
+        self._local.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+# Storage of LocalSharedCache, shared by every instance with the same location.
+_shared_stores = {}
+_shared_stores_lock = threading.Lock()
+
+class LocalSharedCache(BaseCache):
+    """In-process stand-in of a shared cache, with batched `get_many` and
+    `set_many` and atomic `incr`. Data is only shared by threads of one
+    process, use memcached in production.
+    """
+    def __init__(self, location, params):
+        super(LocalSharedCache, self).__init__(params)
+        with _shared_stores_lock:
+            self._store, self._lock = _shared_stores.setdefault(
+                location, ({}, threading.Lock()))
+        # number of round-trips, to let tests check batching
+        self.calls = 0
+
+    def _get(self, key):
+        """Return pickled value of `key`, caller must hold the lock.
+        """
+        try:
+            expire_at, pickled = self._store[key]
+        except KeyError:
+            return None
+        if expire_at is not None and expire_at <= time.time():
+            del self._store[key]
+            return None
+        return pickled
+
+    def _set(self, key, value, timeout):
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        self._store[key] = (self.get_backend_timeout(timeout), pickled)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        with self._lock:
+            self.calls += 1
+            if self._get(key) is not None:
+                return False
+            self._set(key, value, timeout)
+            return True
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        with self._lock:
+            self.calls += 1
+            pickled = self._get(key)
+        if pickled is None:
+            return default
+        return pickle.loads(pickled)
+
+    def get_many(self, keys, version=None):
+        key_map = dict((self.make_key(k, version=version), k) for k in keys)
+        ret = {}
+        with self._lock:
+            self.calls += 1
+            for key, orig_key in key_map.iteritems():
+                pickled = self._get(key)
+                if pickled is not None:
+                    ret[orig_key] = pickled
+        for k, pickled in ret.items():
+            ret[k] = pickle.loads(pickled)
+        return ret
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        with self._lock:
+            self.calls += 1
+            self._set(key, value, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._lock:
+            self.calls += 1
+            for key, value in data.iteritems():
+                self._set(self.make_key(key, version=version), value, timeout)
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        with self._lock:
+            self.calls += 1
+            self._store.pop(key, None)
+
+    def delete_many(self, keys, version=None):
+        with self._lock:
+            self.calls += 1
+            for key in keys:
+                self._store.pop(self.make_key(key, version=version), None)
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        with self._lock:
+            self.calls += 1
+            pickled = self._get(key)
+            if pickled is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(pickled) + delta
+            expire_at = self._store[key][0]
+            self._store[key] = (expire_at,
+                                pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        return value
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        with self._lock:
+            self.calls += 1
+            return self._get(key) is not None
+
+    def clear(self):
+        with self._lock:
+            self.calls += 1
+            self._store.clear()
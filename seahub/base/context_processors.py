@@ -22,6 +22,7 @@ except ImportError:
     SEACLOUD_MODE = False
 
 from seahub.utils import HAS_FILE_SEARCH, EVENTS_ENABLED, TRAFFIC_STATS_ENABLED
+from seahub.utils.user_context import LazyList
 
 try:
     from seahub.settings import ENABLE_PUBFILE
@@ -52,10 +53,16 @@ def base(request):
         base_template = 'base.html'
 
     try:
-        grps = request.user.joined_groups
-        grps.sort(lambda x, y: cmp(x.group_name.lower(), y.group_name.lower()))
+        joined_groups = request.user.joined_groups
     except AttributeError:      # anonymous user
         grps = None
+    else:
+        # only load groups if template uses them
+        def sort_groups():
+            joined_groups.sort(lambda x, y: cmp(x.group_name.lower(),
+                                                y.group_name.lower()))
+            return joined_groups
+        grps = LazyList(sort_groups)
 
     # extra repo id from request path, use in search
     repo_id_patt = r".*/([a-f0-9]{8}-[a-f0-9]{4}-4[a-f0-9]{3}-[89ab][a-f0-9]{3}-[a-f0-9]{12})/.*"
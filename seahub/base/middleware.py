@@ -1,13 +1,17 @@
 import re
 
-from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
 from django.core.urlresolvers import reverse
 from django.http import HttpResponseRedirect
 
 import seaserv
 
-from seahub.notifications.models import Notification
-from seahub.notifications.utils import refresh_cache
+from seahub.notifications.utils import get_cur_topinfo
+from seahub.utils.user_context import get_user_orgs, get_user_groups, \
+    LazyList
+from seahub.utils.rpc import install_rpc_memo, start_rpc_memo, \
+    end_rpc_memo, SEAFSERV_MEMO_METHODS, SEAFSERV_RPC_MEMO_METHODS, \
+    CCNET_MEMO_METHODS
 try:
     from seahub.settings import CLOUD_MODE
 except ImportError:
@@ -16,11 +20,44 @@ try:
     from seahub.settings import MULTI_TENANCY
 except ImportError:
     MULTI_TENANCY = False
+try:
+    from seahub.settings import ENABLE_RPC_MEMO
+except ImportError:
+    ENABLE_RPC_MEMO = True
 from seahub.settings import SITE_ROOT
 
+class RPCMemoMiddleware(object):
+    """
+    Middleware that memoizes read-only seaf-server/ccnet RPC calls for the life
+    of one request.
+    """
+
+    def __init__(self):
+        if not ENABLE_RPC_MEMO:
+            raise MiddlewareNotUsed
+
+        install_rpc_memo(seaserv.seafserv_threaded_rpc, SEAFSERV_MEMO_METHODS)
+        install_rpc_memo(seaserv.seafserv_rpc, SEAFSERV_RPC_MEMO_METHODS)
+        install_rpc_memo(seaserv.ccnet_threaded_rpc, CCNET_MEMO_METHODS)
+
+    def process_request(self, request):
+        start_rpc_memo()
+        return None
+
+    def process_response(self, request, response):
+        end_rpc_memo()
+        return response
+
+    def process_exception(self, request, exception):
+        end_rpc_memo()
+        return None
+
 class BaseMiddleware(object):
     """
     Middleware that add organization, group info to user.
+
+    Orgs and groups are served from a short-lived per-user cache, and groups
+    are only loaded when ``request.user.joined_groups`` is first used.
     """
 
     def process_request(self, request):
@@ -31,7 +68,7 @@ class BaseMiddleware(object):
             request.cloud_mode = True
 
             if MULTI_TENANCY:
-                orgs = seaserv.get_orgs_by_user(username)
+                orgs = get_user_orgs(username)
                 if orgs:
                     request.user.org = orgs[0]
         else:
@@ -39,11 +76,10 @@ class BaseMiddleware(object):
 
         if CLOUD_MODE and request.user.org is not None:
             org_id = request.user.org.org_id
-            request.user.joined_groups = seaserv.get_org_groups_by_user(
-                org_id, username)
         else:
-            request.user.joined_groups = seaserv.get_personal_groups_by_user(
-                username)
+            org_id = None
+        request.user.joined_groups = LazyList(
+            lambda: get_user_groups(username, org_id))
 
         return None
 
@@ -51,25 +87,20 @@ class BaseMiddleware(object):
         return response
 
 class InfobarMiddleware(object):
-    """Query info bar close status, and store into request."""
+    """Query info bar close status, and store into request.
 
-    def get_from_db(self):
-        ret = Notification.objects.all().filter(primary=1)
-        refresh_cache()
-        return ret
+    The current top notification is kept in process memory, see
+    `seahub.notifications.utils.get_cur_topinfo`.
+    """
 
     def process_request(self, request):
         topinfo_close = request.COOKIES.get('info_id', '')
 
-        cur_note = cache.get('CUR_TOPINFO') if cache.get('CUR_TOPINFO') else \
-            self.get_from_db()
-        if not cur_note:
+        cur_note = get_cur_topinfo()
+        if cur_note is None or str(cur_note.id) in topinfo_close.split('_'):
             request.cur_note = None
         else:
-            if str(cur_note[0].id) in topinfo_close.split('_'):
-                request.cur_note = None
-            else:
-                request.cur_note = cur_note[0]
+            request.cur_note = cur_note
 
         return None
 
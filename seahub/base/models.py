@@ -3,7 +3,14 @@ import datetime
 import hashlib
 import logging
 import json
+import posixpath
+import threading
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.core.signals import request_finished
 from django.db import models, IntegrityError
+from django.dispatch import receiver
 from django.utils import timezone
 
 from pysearpc import SearpcError
@@ -139,10 +146,75 @@ class StarredFile(object):
         if not is_dir:
             self.name = path.split('/')[-1]
 
+STARRED_FILES_CACHE_KEY = 'starred_files_%s_%s'
+# Dirents of a commit never change.
+STARRED_FILES_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+
+# Ids of stale starred files of current thread, deleted in one batch after
+# the request is finished.
+_stale_starred_files = threading.local()
+
+def _split_star_path(path):
+    path = path.rstrip('/')
+    return posixpath.dirname(path), posixpath.basename(path)
+
 class UserStarredFilesManager(models.Manager):
+    def _resolve_repo_stars(self, repo, sfiles):
+        """Return a dict of ``path -> (obj_id, mtime)`` of starred
+        items in ``repo``, ``None`` if an item does not exist. Items whose
+        parent dir failed to be listed are left out.
+
+        Each parent dir is listed once per head commit of the repo.
+        """
+        key = STARRED_FILES_CACHE_KEY % (repo.id, repo.head_cmmt_id)
+        resolved = cache.get(key) or {}
+
+        missing = defaultdict(list)
+        for sfile in sfiles:
+            if sfile.path != '/' and sfile.path not in resolved:
+                parent_dir, name = _split_star_path(sfile.path)
+                missing[parent_dir].append((sfile.path, name))
+        if not missing:
+            return resolved
+
+        failed = False
+        for parent_dir, items in missing.iteritems():
+            try:
+                dirents = seafile_api.list_dir_by_commit_and_path(
+                    repo.id, repo.head_cmmt_id, parent_dir) or []
+            except SearpcError as e:
+                if not self._dir_is_removed(repo, parent_dir):
+                    logger.error(e)
+                    failed = True
+                    continue
+                dirents = []
+            dirents = dict((d.obj_name, d) for d in dirents)
+            for path, name in items:
+                d = dirents.get(name)
+                resolved[path] = (d.obj_id, d.mtime) if d else None
+
+        # do not cache a partial result
+        if not failed:
+            cache.set(key, resolved, STARRED_FILES_CACHE_TIMEOUT)
+        return resolved
+
+    def _dir_is_removed(self, repo, path):
+        """Return True only if ``path`` is confirmed missing in head commit
+        of ``repo``.
+        """
+        try:
+            return seafile_api.get_dir_id_by_commit_and_path(
+                repo.id, repo.head_cmmt_id, path) is None
+        except SearpcError as e:
+            logger.error(e)
+            return False
+
     def get_starred_files_by_username(self, username):
         """Get a user's starred files.
 
+        Stars of removed repos or files are deleted after the request is
+        finished.
+
         Arguments:
         - `self`:
         - `username`:
@@ -150,63 +222,71 @@ class UserStarredFilesManager(models.Manager):
         starred_files = super(UserStarredFilesManager, self).filter(
             email=username, org_id=-1)
 
-        ret = []
-        repo_cache = {}
+        stars_by_repo = defaultdict(list)
         for sfile in starred_files:
-            # repo still exists?
-            if repo_cache.has_key(sfile.repo_id):
-                repo = repo_cache[sfile.repo_id]
-            else:
-                try:
-                    repo = seafile_api.get_repo(sfile.repo_id)
-                except SearpcError:
-                    continue
-                if repo is not None:
-                    repo_cache[sfile.repo_id] = repo
-                else:
-                    sfile.delete()
-                    continue
+            stars_by_repo[sfile.repo_id].append(sfile)
 
-            # file still exists?
-            file_id = ''
-            size = -1
-            if sfile.path != "/":
-                try:
-                    file_id = seafile_api.get_file_id_by_path(sfile.repo_id,
-                                                              sfile.path)
-                    # size = seafile_api.get_file_size(file_id)
-                except SearpcError:
-                    continue
-                if not file_id:
-                    sfile.delete()
-                    continue
-
-            f = StarredFile(sfile.org_id, repo, file_id, sfile.path,
-                            sfile.is_dir, 0) # TODO: remove ``size`` from StarredFile
-            ret.append(f)
-
-        '''Calculate files last modification time'''
-        for sfile in ret:
-            if sfile.is_dir:
+        ret = []
+        stale_ids = []
+        for repo_id, sfiles in stars_by_repo.iteritems():
+            # repo still exists?
+            try:
+                repo = seafile_api.get_repo(repo_id)
+            except SearpcError:
+                continue
+            if repo is None:
+                stale_ids += [sfile.id for sfile in sfiles]
                 continue
 
-            try:
-                # get real path for sub repo
-                real_path = sfile.repo.origin_path + sfile.path if sfile.repo.origin_path else sfile.path
-                dirent = seafile_api.get_dirent_by_path(sfile.repo.store_id,
-                                                        real_path)
-                if dirent:
-                    sfile.last_modified = dirent.mtime
-                else:
-                    sfile.last_modified = 0
-            except SearpcError as e:
-                logger.error(e)
-                sfile.last_modified = 0
+            resolved = self._resolve_repo_stars(repo, sfiles)
+
+            for sfile in sfiles:
+                # file still exists?
+                file_id = ''
+                mtime = 0
+                if sfile.path != "/":
+                    if sfile.path not in resolved:
+                        # failed to check, keep it
+                        continue
+                    item = resolved[sfile.path]
+                    if item is None:
+                        stale_ids.append(sfile.id)
+                        continue
+                    file_id, mtime = item
+
+                f = StarredFile(sfile.org_id, repo, file_id, sfile.path,
+                                sfile.is_dir, 0) # TODO: remove ``size`` from StarredFile
+                if not sfile.is_dir:
+                    f.last_modified = mtime
+                ret.append(f)
+
+        if stale_ids:
+            defer_delete_starred_files(stale_ids)
 
         ret.sort(lambda x, y: cmp(y.last_modified, x.last_modified))
 
         return ret
 
+def defer_delete_starred_files(ids):
+    """Delete starred files of ``ids`` after current request is finished.
+    """
+    pending = getattr(_stale_starred_files, 'ids', None)
+    if pending is None:
+        pending = _stale_starred_files.ids = set()
+    pending.update(ids)
+
+@receiver(request_finished, dispatch_uid="delete_stale_starred_files")
+def delete_stale_starred_files(sender=None, **kwargs):
+    ids = getattr(_stale_starred_files, 'ids', None)
+    if not ids:
+        return
+
+    _stale_starred_files.ids = None
+    try:
+        UserStarredFiles.objects.filter(id__in=list(ids)).delete()
+    except Exception as e:
+        logger.error(e)
+
 class UserStarredFiles(models.Model):
     """Starred files are marked by users to get quick access to it on user
     home page.
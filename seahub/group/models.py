@@ -84,3 +84,20 @@ class PublicGroup(models.Model):
 #                                      detail=group_msg.id)
 #                 n.save()
 
+
+from seahub.group.signals import add_user_to_group, group_members_changed, \
+    group_updated
+from seahub.utils.user_context import clear_user_context_cache, \
+    clear_all_user_context_cache
+
+@receiver(add_user_to_group, dispatch_uid="clear_user_context_on_add")
+def add_user_to_group_cb(sender, **kwargs):
+    clear_user_context_cache([kwargs['added_user']])
+
+@receiver(group_members_changed)
+def group_members_changed_cb(sender, **kwargs):
+    clear_user_context_cache(kwargs['usernames'])
+
+@receiver(group_updated)
+def group_updated_cb(sender, **kwargs):
+    clear_all_user_context_cache()
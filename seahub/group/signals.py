@@ -3,3 +3,6 @@ import django.dispatch
 grpmsg_added = django.dispatch.Signal(providing_args=["group_id", "from_email", "message"])
 group_join_request = django.dispatch.Signal(providing_args=["staffs", "username", "group", "join_reqeust_msg"])
 add_user_to_group = django.dispatch.Signal(providing_args=["group_staff", "group_id", "added_user"])
+group_members_changed = django.dispatch.Signal(providing_args=["group_id", "usernames"])
+# Sent when a group is renamed or dismissed.
+group_updated = django.dispatch.Signal(providing_args=["group_id"])
@@ -10,6 +10,7 @@ from seahub.base.templatetags.seahub_tags import email2nickname
 from seahub.avatar.settings import AVATAR_DEFAULT_SIZE
 from seahub.avatar.templatetags.avatar_tags import api_avatar_url, \
     get_default_avatar_url
+from seahub.utils.user_info import get_user_infos
 
 logger = logging.getLogger(__name__)
 
@@ -95,3 +96,23 @@ def get_group_member_info(request, group_id, email, avatar_size=AVATAR_DEFAULT_S
     }
 
     return member_info
+
+def get_group_members_info(request, group_id, members,
+                           avatar_size=AVATAR_DEFAULT_SIZE):
+    """Return info of group ``members``, same as `get_group_member_info`,
+    with profiles and avatars of all members looked up at once.
+    """
+    infos = get_user_infos([m.user_name for m in members], avatar_size)
+
+    ret = []
+    for m in members:
+        info = infos[m.user_name]
+        ret.append({
+            "name": info["name"],
+            'email': m.user_name,
+            "contact_email": info["contact_email"],
+            "login_id": info["login_id"],
+            "avatar_url": request.build_absolute_uri(info["avatar_url"]),
+            "is_admin": bool(m.is_staff),
+        })
+    return ret
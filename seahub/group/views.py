@@ -39,7 +39,8 @@ from seahub.base.decorators import sys_staff_required, require_POST
 from seahub.base.models import FileDiscuss
 from seahub.contacts.models import Contact
 from seahub.contacts.signals import mail_sended
-from seahub.group.signals import add_user_to_group
+from seahub.group.signals import add_user_to_group, group_members_changed, \
+    group_updated
 from seahub.group.utils import validate_group_name, BadGroupNameError, \
     ConflictGroupNameError
 from seahub.notifications.models import UserNotification
@@ -68,11 +69,17 @@ logger = logging.getLogger(__name__)
 
 ########## ccnet rpc wrapper
 def create_group(group_name, username):
-    return seaserv.ccnet_threaded_rpc.create_group(group_name, username)
+    group_id = seaserv.ccnet_threaded_rpc.create_group(group_name, username)
+    group_members_changed.send(sender=None, group_id=group_id,
+                               usernames=[username])
+    return group_id
 
 def create_org_group(org_id, group_name, username):
-    return seaserv.ccnet_threaded_rpc.create_org_group(org_id, group_name,
-                                                       username)
+    group_id = seaserv.ccnet_threaded_rpc.create_org_group(org_id, group_name,
+                                                           username)
+    group_members_changed.send(sender=None, group_id=group_id,
+                               usernames=[username])
+    return group_id
 
 def get_all_groups(start, limit):
     return seaserv.ccnet_threaded_rpc.get_all_groups(start, limit)
@@ -94,6 +101,7 @@ def remove_group_common(group_id, username, org_id=None):
     - `group_id`:
     """
     seaserv.ccnet_threaded_rpc.remove_group(group_id, username)
+    group_updated.send(sender=None, group_id=group_id)
     seaserv.seafserv_threaded_rpc.remove_repo_group(group_id)
     if org_id is not None and org_id > 0:
         seaserv.ccnet_threaded_rpc.remove_org_group(org_id, group_id)
@@ -265,6 +273,7 @@ def rename_group_with_new_name(request, group_id, new_group_name):
             raise ConflictGroupNameError
 
     ccnet_threaded_rpc.set_group_name(group_id, new_group_name)
+    group_updated.send(sender=None, group_id=group_id)
 
 def send_group_member_add_mail(request, group, from_user, to_user):
     c = {
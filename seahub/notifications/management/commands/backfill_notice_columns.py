@@ -0,0 +1,50 @@
+# encoding: utf-8
+import logging
+from collections import defaultdict
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from seahub.notifications.models import UserNotification, detail_to_columns
+
+# Get an instance of a logger
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Fill group_id, repo_id and msg_from columns of user notices from their detail.'
+    option_list = BaseCommand.option_list + (
+        make_option('--batch-size', dest='batch_size', type='int',
+                    default=1000, help='Number of notices read at a time.'),
+    )
+
+    def handle(self, *args, **options):
+        logger.debug('Start filling user notice columns...')
+        self.do_action(options['batch_size'])
+        logger.debug('Finish filling user notice columns.\n')
+
+    def do_action(self, batch_size):
+        last_id = 0
+        total = updated = 0
+        while True:
+            notices = list(UserNotification.objects.filter(
+                id__gt=last_id, group_id=None, repo_id=None,
+                msg_from=None).order_by('id').values_list(
+                    'id', 'msg_type', 'detail')[:batch_size])
+            if not notices:
+                break
+            last_id = notices[-1][0]
+            total += len(notices)
+
+            # One UPDATE for each distinct set of values in the batch.
+            ids_by_columns = defaultdict(list)
+            for notice_id, msg_type, detail in notices:
+                columns = detail_to_columns(msg_type, detail)
+                if any(columns.values()):
+                    ids_by_columns[tuple(sorted(columns.items()))].append(
+                        notice_id)
+
+            for columns, ids in ids_by_columns.iteritems():
+                updated += UserNotification.objects.filter(
+                    id__in=ids).update(**dict(columns))
+
+        self.stdout.write('%d of %d notices updated.' % (updated, total))
@@ -4,6 +4,8 @@ import logging
 import json
 import os
 import re
+import time
+from collections import OrderedDict
 
 from django.utils.http import urlquote
 from django.core.management.base import BaseCommand
@@ -16,8 +18,9 @@ import seaserv
 from seaserv import seafile_api, ccnet_api
 from seahub.base.models import CommandsLastCheck
 from seahub.notifications.models import UserNotification
-from seahub.utils import send_html_email, get_service_url, \
-    get_site_scheme_and_netloc
+from seahub.utils import get_service_url, get_site_scheme_and_netloc
+from seahub.utils.mail import render_html_email, queue_html_emails, \
+    send_queued_emails
 import seahub.settings as settings
 from seahub.avatar.templatetags.avatar_tags import avatar
 from seahub.avatar.util import get_default_avatar_url
@@ -29,12 +32,22 @@ logger = logging.getLogger(__name__)
 
 subject = _('New notice on %s') % settings.SITE_NAME
 
+# Number of emails queued in one query.
+NOTICE_EMAIL_BATCH_SIZE = 100
+# Max number of users in one profile query.
+PROFILE_QUERY_BATCH_SIZE = 500
+
+# Marks repo or group whose existence could not be checked.
+LOOKUP_FAILED = object()
+
 class Command(BaseCommand):
     help = 'Send Email notifications to user if he/she has an unread notices every period of seconds .'
     label = "notifications_send_notices"
 
     def handle(self, *args, **options):
         logger.debug('Start sending user notices...')
+        self.repos = {}
+        self.groups = {}
         self.do_action()
         logger.debug('Finish sending user notices.\n')
 
@@ -68,6 +81,29 @@ class Command(BaseCommand):
         else:
             return ''
 
+    def get_repo(self, repo_id):
+        """Get repo from seaf-server at most once per run.
+        """
+        if repo_id not in self.repos:
+            try:
+                self.repos[repo_id] = seafile_api.get_repo(repo_id)
+            except Exception as e:
+                logger.error(e)
+                self.repos[repo_id] = LOOKUP_FAILED
+        return self.repos[repo_id]
+
+    def get_group(self, group_id):
+        """Get group from ccnet at most once per run.
+        """
+        group_id = int(group_id)
+        if group_id not in self.groups:
+            try:
+                self.groups[group_id] = ccnet_api.get_group(group_id)
+            except Exception as e:
+                logger.error(e)
+                self.groups[group_id] = LOOKUP_FAILED
+        return self.groups[group_id]
+
     def format_user_message(self, notice):
         d = notice.user_message_detail_to_dict()
         msg_from = d['msg_from']
@@ -83,7 +119,7 @@ class Command(BaseCommand):
         d = notice.group_message_detail_to_dict()
         group_id = d['group_id']
         message = d['message']
-        group = ccnet_api.get_group(int(group_id))
+        group = self.get_group(group_id)
 
         notice.group_url = reverse('group_discuss', args=[group.id])
         notice.notice_from = escape(email2nickname(d['msg_from']))
@@ -95,7 +131,7 @@ class Command(BaseCommand):
     def format_repo_share_msg(self, notice):
         d = json.loads(notice.detail)
         repo_id = d['repo_id']
-        repo = seafile_api.get_repo(repo_id)
+        repo = self.get_repo(repo_id)
 
         notice.repo_url = reverse("view_common_lib_dir", args=[repo_id, ''])
         notice.notice_from = escape(email2nickname(d['share_from']))
@@ -108,9 +144,9 @@ class Command(BaseCommand):
         d = json.loads(notice.detail)
 
         repo_id = d['repo_id']
-        repo = seafile_api.get_repo(repo_id)
+        repo = self.get_repo(repo_id)
         group_id = d['group_id']
-        group = ccnet_api.get_group(group_id)
+        group = self.get_group(group_id)
 
         notice.repo_url = reverse("view_common_lib_dir", args=[repo_id, ''])
         notice.notice_from = escape(email2nickname(d['share_from']))
@@ -145,7 +181,7 @@ class Command(BaseCommand):
         group_id = d['group_id']
         join_request_msg = d['join_request_msg']
 
-        group = ccnet_api.get_group(group_id)
+        group = self.get_group(group_id)
 
         notice.grpjoin_user_profile_url = reverse('user_profile',
                                                   args=[username])
@@ -161,7 +197,7 @@ class Command(BaseCommand):
         group_staff = d['group_staff']
         group_id = d['group_id']
 
-        group = ccnet_api.get_group(group_id)
+        group = self.get_group(group_id)
 
         notice.notice_from = group_staff
         notice.avatar_src = self.get_avatar_src(group_staff)
@@ -182,8 +218,94 @@ class Command(BaseCommand):
         notice.author = author
         return notice
 
-    def get_user_language(self, username):
-        return Profile.objects.get_user_language(username)
+    def get_user_profiles(self, usernames):
+        """Return a dict of ``username -> (language, contact email)``, loaded
+        from profiles in batches.
+        """
+        ret = {}
+        for i in range(0, len(usernames), PROFILE_QUERY_BATCH_SIZE):
+            batch = usernames[i:i + PROFILE_QUERY_BATCH_SIZE]
+            for p in Profile.objects.filter(user__in=batch):
+                ret[p.user] = (p.lang_code or settings.LANGUAGE_CODE,
+                               p.contact_email or p.user)
+
+        for username in usernames:
+            if username not in ret:
+                ret[username] = (settings.LANGUAGE_CODE, username)
+        return ret
+
+    def group_notices_by_user(self, unseen_notices):
+        """Check repo and group of every notice, and return valid notices as
+        an ordered dict of ``to_user -> notices``.
+
+        Notices whose repo or group no longer exists are deleted.
+        """
+        notices_by_user = OrderedDict()
+        removed_ids = []
+        for notice in unseen_notices:
+            logger.info('Processing unseen notice: [%s]' % (notice))
+
+            d = json.loads(notice.detail)
+            repo_id = d.get('repo_id', None)
+            group_id = d.get('group_id', None)
+
+            repo = self.get_repo(repo_id) if repo_id else None
+            group = self.get_group(group_id) if group_id else None
+            if repo is LOOKUP_FAILED or group is LOOKUP_FAILED:
+                continue
+
+            if (repo_id and not repo) or (group_id and not group):
+                removed_ids.append(notice.id)
+                continue
+
+            notices_by_user.setdefault(notice.to_user, []).append(notice)
+
+        if removed_ids:
+            UserNotification.objects.filter(id__in=removed_ids).delete()
+        return notices_by_user
+
+    def format_notice(self, notice):
+        if notice.is_user_message():
+            notice = self.format_user_message(notice)
+
+        elif notice.is_group_msg():
+            notice = self.format_group_message(notice)
+
+        elif notice.is_repo_share_msg():
+            notice = self.format_repo_share_msg(notice)
+
+        elif notice.is_repo_share_to_group_msg():
+            notice = self.format_repo_share_to_group_msg(notice)
+
+        elif notice.is_file_uploaded_msg():
+            notice = self.format_file_uploaded_msg(notice)
+
+        elif notice.is_group_join_request():
+            notice = self.format_group_join_request(notice)
+
+        elif notice.is_add_user_to_group():
+            notice = self.format_add_user_to_group(notice)
+
+        elif notice.is_file_comment_msg():
+            notice = self.format_file_comment_msg(notice)
+
+        return notice
+
+    def queue_emails(self, emails):
+        """Queue a batch of emails, return number of emails queued.
+        """
+        try:
+            queue_html_emails(emails)
+        except Exception as e:
+            logger.error('Failed to queue %d emails, error detail: %s' % (
+                len(emails), e))
+            self.stderr.write('[%s] Failed to queue %d emails, error detail: %s' % (
+                str(datetime.datetime.now()), len(emails), e))
+            return 0
+
+        for email in emails:
+            logger.info('Successfully queued email to %s' % email['recipients'][0])
+        return len(emails)
 
     def do_action(self):
         now = datetime.datetime.now()
@@ -206,94 +328,48 @@ class Command(BaseCommand):
             logger.debug('Create new last check time: %s' % now)
             CommandsLastCheck(command_type=self.label, last_check=now).save()
 
-        email_ctx = {}
-        for notice in unseen_notices:
-            if notice.to_user in email_ctx:
-                email_ctx[notice.to_user] += 1
-            else:
-                email_ctx[notice.to_user] = 1
+        start = time.time()
+        unseen_notices = list(unseen_notices)
+        notices_by_user = self.group_notices_by_user(unseen_notices)
+        profiles = self.get_user_profiles(notices_by_user.keys())
 
-        for to_user, count in email_ctx.items():
-            # save current language
-            cur_language = translation.get_language()
+        # save current language
+        cur_language = translation.get_language()
 
+        emails = []
+        queued = 0
+        for to_user, notices in notices_by_user.iteritems():
             # get and active user language
-            user_language = self.get_user_language(to_user)
+            user_language, contact_email = profiles[to_user]
             translation.activate(user_language)
             logger.debug('Set language code to %s for user: %s' % (user_language, to_user))
-            self.stdout.write('[%s] Set language code to %s' % (
-                str(datetime.datetime.now()), user_language))
-
-            notices = []
-            for notice in unseen_notices:
-                logger.info('Processing unseen notice: [%s]' % (notice))
-
-                d = json.loads(notice.detail)
-
-                repo_id = d.get('repo_id', None)
-                group_id = d.get('group_id', None)
-                try:
-                    if repo_id and not seafile_api.get_repo(repo_id):
-                        notice.delete()
-                        continue
-
-                    if group_id and not ccnet_api.get_group(group_id):
-                        notice.delete()
-                        continue
-                except Exception as e:
-                    logger.error(e)
-                    continue
-
-                if notice.to_user != to_user:
-                    continue
-
-                elif notice.is_user_message():
-                    notice = self.format_user_message(notice)
-
-                elif notice.is_group_msg():
-                    notice = self.format_group_message(notice)
-
-                elif notice.is_repo_share_msg():
-                    notice = self.format_repo_share_msg(notice)
-
-                elif notice.is_repo_share_to_group_msg():
-                    notice = self.format_repo_share_to_group_msg(notice)
 
-                elif notice.is_file_uploaded_msg():
-                    notice = self.format_file_uploaded_msg(notice)
-
-                elif notice.is_group_join_request():
-                    notice = self.format_group_join_request(notice)
-
-                elif notice.is_add_user_to_group():
-                    notice = self.format_add_user_to_group(notice)
-
-                elif notice.is_file_comment_msg():
-                    notice = self.format_file_comment_msg(notice)
-
-                notices.append(notice)
-
-            if not notices:
-                continue
-
-            contact_email = Profile.objects.get_contact_email_by_user(to_user)
-            to_user = contact_email  # use contact email if any
             c = {
-                'to_user': to_user,
-                'notice_count': count,
-                'notices': notices,
+                'to_user': contact_email,  # use contact email if any
+                'notice_count': len(notices),
+                'notices': [self.format_notice(n) for n in notices],
                 }
-
-            try:
-                send_html_email(_('New notice on %s') % settings.SITE_NAME,
-                                'notifications/notice_email.html', c,
-                                None, [to_user])
-
-                logger.info('Successfully sent email to %s' % to_user)
-                self.stdout.write('[%s] Successfully sent email to %s' % (str(datetime.datetime.now()), to_user))
-            except Exception as e:
-                logger.error('Failed to send email to %s, error detail: %s' % (to_user, e))
-                self.stderr.write('[%s] Failed to send email to %s, error detail: %s' % (str(datetime.datetime.now()), to_user, e))
-
-            # restore current language
-            translation.activate(cur_language)
+            emails.append({
+                'recipients': [contact_email],
+                'subject': _('New notice on %s') % settings.SITE_NAME,
+                'html_message': render_html_email(
+                    'notifications/notice_email.html', c),
+            })
+
+            if len(emails) >= NOTICE_EMAIL_BATCH_SIZE:
+                queued += self.queue_emails(emails)
+                emails = []
+
+        queued += self.queue_emails(emails)
+
+        # restore current language
+        translation.activate(cur_language)
+
+        send_queued_emails()
+
+        elapsed = time.time() - start
+        stats = '%d notices, %d users, %d emails queued in %.2fs (%.1f notices/s)' % (
+            len(unseen_notices), len(notices_by_user), queued, elapsed,
+            len(unseen_notices) / elapsed if elapsed > 0 else 0)
+        logger.info(stats)
+        self.stdout.write('[%s] %s' % (str(datetime.datetime.now()), stats))
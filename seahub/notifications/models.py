@@ -79,6 +79,36 @@ def file_comment_msg_to_json(repo_id, file_path, author, comment):
                        'comment': comment})
 
 
+def detail_to_columns(msg_type, detail):
+    """Extract ``group_id``, ``repo_id`` and ``msg_from`` of a notice detail,
+    which are stored in their own indexed columns.
+    """
+    ret = {'group_id': None, 'repo_id': None, 'msg_from': None}
+    try:
+        d = json.loads(detail)
+    except ValueError:
+        if msg_type == MSG_TYPE_USER_MESSAGE:
+            # Compatible with existing records, detail is the sender.
+            ret['msg_from'] = detail
+        return ret
+
+    if isinstance(d, int):
+        if msg_type == MSG_TYPE_GROUP_MSG:
+            # Compatible with existing records, detail is the group id.
+            ret['group_id'] = d
+        return ret
+
+    if not isinstance(d, dict):
+        return ret
+
+    try:
+        ret['group_id'] = int(d['group_id']) if d.get('group_id') else None
+    except (TypeError, ValueError):
+        pass
+    ret['repo_id'] = d.get('repo_id') or None
+    ret['msg_from'] = d.get('msg_from') or None
+    return ret
+
 class UserNotificationManager(models.Manager):
     def _add_user_notification(self, to_user, msg_type, detail):
         """Add generic user notification.
@@ -89,7 +119,8 @@ class UserNotificationManager(models.Manager):
         - `detail`:
         """
         n = super(UserNotificationManager, self).create(
-            to_user=to_user, msg_type=msg_type, detail=detail)
+            to_user=to_user, msg_type=msg_type, detail=detail,
+            **detail_to_columns(msg_type, detail))
         n.save()
         return n
 
@@ -149,45 +180,38 @@ class UserNotificationManager(models.Manager):
         - `to_users`:
         - `detail`:
         """
+        columns = detail_to_columns(MSG_TYPE_GROUP_MSG, detail)
         user_notices = [ UserNotification(to_user=m,
                                           msg_type=MSG_TYPE_GROUP_MSG,
-                                          detail=detail
+                                          detail=detail,
+                                          **columns
                                           ) for m in to_users ]
         UserNotification.objects.bulk_create(user_notices)
 
     def seen_group_msg_notices(self, to_user, group_id):
         """Mark group message notices of a user as seen.
+
+        NOTE: ``pre_save`` and ``post_save`` signals will not be sent.
         """
-        user_notices = super(UserNotificationManager, self).filter(
-            to_user=to_user, msg_type=MSG_TYPE_GROUP_MSG)
-        for notice in user_notices:
-            try:
-                gid = notice.group_message_detail_to_dict().get('group_id')
-                if gid == group_id:
-                    if notice.seen is False:
-                        notice.seen = True
-                        notice.save()
-            except UserNotification.InvalidDetailError:
-                continue
+        return super(UserNotificationManager, self).filter(
+            to_user=to_user, seen=False, msg_type=MSG_TYPE_GROUP_MSG,
+            group_id=group_id).update(seen=True)
 
     def seen_user_msg_notices(self, to_user, from_user):
         """Mark priv message notices of a user as seen.
+
+        NOTE: ``pre_save`` and ``post_save`` signals will not be sent.
         """
-        user_notices = super(UserNotificationManager, self).filter(
-            to_user=to_user, seen=False, msg_type=MSG_TYPE_USER_MESSAGE)
-        for notice in user_notices:
-            notice_from_user = notice.user_message_detail_to_dict().get('msg_from')
-            if from_user == notice_from_user:
-                if notice.seen is False:
-                    notice.seen = True
-                    notice.save()
+        return super(UserNotificationManager, self).filter(
+            to_user=to_user, seen=False, msg_type=MSG_TYPE_USER_MESSAGE,
+            msg_from=from_user).update(seen=True)
 
     def remove_group_msg_notices(self, to_user, group_id):
         """Remove group message notices of a user.
         """
         super(UserNotificationManager, self).filter(
             to_user=to_user, msg_type=MSG_TYPE_GROUP_MSG,
-            detail=str(group_id)).delete()
+            group_id=group_id).delete()
 
     def add_group_join_request_notice(self, to_user, detail):
         """
@@ -268,6 +292,11 @@ class UserNotification(models.Model):
     detail = models.TextField()
     timestamp = models.DateTimeField(default=datetime.datetime.now)
     seen = models.BooleanField('seen', default=False)
+    # Copied from ``detail`` by `detail_to_columns`, to filter notices
+    # without parsing ``detail``.
+    group_id = models.IntegerField(db_index=True, null=True)
+    repo_id = models.CharField(db_index=True, max_length=36, null=True)
+    msg_from = models.CharField(db_index=True, max_length=255, null=True)
     objects = UserNotificationManager()
 
     class InvalidDetailError(Exception):
@@ -689,6 +718,7 @@ class UserNotification(models.Model):
 
 ########## handle signals
 from django.core.urlresolvers import reverse
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 from seahub.signals import upload_file_successful, comment_file_successful
@@ -696,6 +726,12 @@ from seahub.group.signals import grpmsg_added, group_join_request, add_user_to_g
 from seahub.share.signals import share_repo_to_user_successful, \
     share_repo_to_group_successful
 from seahub.message.signals import user_message_sent
+from seahub.notifications.utils import refresh_cache
+
+@receiver(post_save, sender=Notification, dispatch_uid="refresh_topinfo_on_save")
+@receiver(post_delete, sender=Notification, dispatch_uid="refresh_topinfo_on_delete")
+def refresh_topinfo_cb(sender, **kwargs):
+    refresh_cache()
 
 @receiver(upload_file_successful)
 def add_upload_file_msg_cb(sender, **kwargs):
@@ -1,3 +1,6 @@
 from django.conf import settings
 
 NOTIFICATION_CACHE_TIMEOUT = getattr(settings, 'NOTIFICATION_CACHE_TIMEOUT', 0)
+
+# Seconds between checks whether the primary notification changed.
+TOPINFO_REFRESH_INTERVAL = getattr(settings, 'TOPINFO_REFRESH_INTERVAL', 10)
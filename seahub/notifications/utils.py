@@ -1,11 +1,61 @@
+import threading
+import time
+import uuid
+
 from django.core.cache import cache
 
-from seahub.notifications.models import Notification
-from seahub.notifications.settings import NOTIFICATION_CACHE_TIMEOUT
+from seahub.notifications.settings import TOPINFO_REFRESH_INTERVAL
+
+CUR_TOPINFO_VERSION_KEY = 'CUR_TOPINFO_VERSION'
+
+# Current top notification of this process, `note` is None if there is no
+# primary notification.
+_cur_topinfo = {'version': None, 'note': None, 'checked_at': 0}
+_cur_topinfo_lock = threading.Lock()
+
 def refresh_cache():
     """
     Function to be called when change primary notification.
+
+    Publish a new version, every process reloads the current top notification
+    within ``TOPINFO_REFRESH_INTERVAL`` seconds.
     """
-    cache.set('CUR_TOPINFO', Notification.objects.all().filter(primary=1),
-              NOTIFICATION_CACHE_TIMEOUT)
-    
+    cache.set(CUR_TOPINFO_VERSION_KEY, uuid.uuid4().hex, None)
+    _cur_topinfo['checked_at'] = 0
+
+def _get_version():
+    version = cache.get(CUR_TOPINFO_VERSION_KEY)
+    if version is None:
+        cache.add(CUR_TOPINFO_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(CUR_TOPINFO_VERSION_KEY)
+    return version
+
+def get_cur_topinfo():
+    """Return current primary notification, or None.
+
+    Served from process memory, the published version is checked at most
+    once per ``TOPINFO_REFRESH_INTERVAL`` seconds, and the database is only
+    queried when it changed.
+    """
+    global _cur_topinfo
+    from seahub.notifications.models import Notification
+
+    state = _cur_topinfo
+    now = time.time()
+    if now - state['checked_at'] < TOPINFO_REFRESH_INTERVAL:
+        return state['note']
+
+    with _cur_topinfo_lock:
+        state = _cur_topinfo
+        if now - state['checked_at'] < TOPINFO_REFRESH_INTERVAL:
+            return state['note']
+
+        version = _get_version()
+        if version is not None and version == state['version']:
+            note = state['note']
+        else:
+            notes = list(Notification.objects.filter(primary=1)[:1])
+            note = notes[0] if notes else None
+
+        _cur_topinfo = {'version': version, 'note': note, 'checked_at': now}
+        return note
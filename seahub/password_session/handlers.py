@@ -1,20 +1,101 @@
+import time
+import uuid
+
 from django.conf import settings
+from django.core.cache import cache
 from django.dispatch import receiver
 from hashlib import md5
 
 from seahub.auth.signals import user_logged_in
+from seahub.signals import user_updated
+from seahub.utils import normalize_cache_key
 
 PASSWORD_HASH_KEY = getattr(settings, 'PASSWORD_SESSION_PASSWORD_HASH_KEY', 'password_session_password_hash_key')
+# Session key of ``(password stamp, verified at)`` of the last verification.
+PASSWORD_STAMP_KEY = getattr(settings, 'PASSWORD_SESSION_PASSWORD_STAMP_KEY', 'password_session_password_stamp_key')
+# Max seconds a session is trusted without verifying the password hash again.
+CHECK_INTERVAL = getattr(settings, 'PASSWORD_SESSION_CHECK_INTERVAL', 60)
+
+PASSWORD_STAMP_CACHE_PREFIX = 'password_session_stamp_'
+USER_CACHE_PREFIX = 'password_session_user_'
+
+# Attributes of a user kept in cache, the password hash is left out.
+CACHED_USER_ATTRS = ('id', 'is_staff', 'is_active', 'ctime', 'source', 'role')
 
 
 def get_password_hash(user):
     """Returns a string of crypted password hash"""
+    if getattr(user, 'from_password_session_cache', False):
+        # cached user has no password hash, load it from ccnet
+        from seahub.base.accounts import User
+        user = User.objects.get(email=user.username)
     password = user.enc_password or ''
     return md5(
         md5(password.encode()).hexdigest().encode() + settings.SECRET_KEY.encode()
     ).hexdigest()
 
 
+def get_password_stamp(username):
+    """Returns a token which changes whenever `username` is updated"""
+    key = normalize_cache_key(username, PASSWORD_STAMP_CACHE_PREFIX)
+    stamp = cache.get(key)
+    if stamp is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        stamp = cache.get(key)
+    return stamp
+
+
+def clear_password_stamp(username):
+    cache.delete(normalize_cache_key(username, PASSWORD_STAMP_CACHE_PREFIX))
+
+
+def cache_user(user):
+    """Caches attributes of `user` with its current password stamp"""
+    key = normalize_cache_key(user.username, USER_CACHE_PREFIX)
+    attrs = dict((a, getattr(user, a, None)) for a in CACHED_USER_ATTRS)
+    cache.set(key, (get_password_stamp(user.username), attrs), CHECK_INTERVAL)
+
+
+def get_cached_user(username):
+    """Returns user cached with the current password stamp of `username`, or
+    None. A cached user has no ``enc_password``.
+    """
+    cached = cache.get(normalize_cache_key(username, USER_CACHE_PREFIX))
+    if cached is None:
+        return None
+
+    stamp, attrs = cached
+    if stamp != get_password_stamp(username):
+        return None
+
+    from seahub.base.accounts import User
+    user = User(username)
+    for attr, value in attrs.iteritems():
+        setattr(user, attr, value)
+    user.from_password_session_cache = True
+    return user
+
+
+def mark_session_verified(request, username):
+    """Remembers in session that password hash was verified just now"""
+    request.session[PASSWORD_STAMP_KEY] = (get_password_stamp(username),
+                                           time.time())
+
+
+def is_session_verified(request, username):
+    """Returns True if password hash was verified within ``CHECK_INTERVAL``
+    seconds and `username` is not updated since then.
+    """
+    try:
+        stamp, verified_at = request.session[PASSWORD_STAMP_KEY]
+    except (KeyError, TypeError, ValueError):
+        return False
+
+    if time.time() - verified_at >= CHECK_INTERVAL:
+        return False
+    return stamp == get_password_stamp(username)
+
+
 def update_session_auth_hash(request, user):
     """
     Updates a session hash to prevent logging out `user` from a current session.
@@ -24,9 +105,16 @@ def update_session_auth_hash(request, user):
     """
     if not hasattr(request, 'user') or request.user == user:
         request.session[PASSWORD_HASH_KEY] = get_password_hash(user)
+        mark_session_verified(request, user.username)
 
 
 @receiver(user_logged_in)
 def on_login(sender, user, request, **kwargs):
     """Saves password hash in session"""
     update_session_auth_hash(request, user)
+
+
+@receiver(user_updated)
+def on_user_updated(sender, email, **kwargs):
+    """Makes every session of the user verify password hash again"""
+    clear_password_stamp(email)
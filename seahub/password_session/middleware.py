@@ -1,11 +1,29 @@
 from django.contrib.auth import logout
 
-from .handlers import get_password_hash, PASSWORD_HASH_KEY
+from seahub.auth import SESSION_KEY
+
+from .handlers import get_password_hash, PASSWORD_HASH_KEY, \
+    is_session_verified, mark_session_verified
 
 
 class CheckPasswordHash(object):
-    """Logout user if value of hash key in session is not equal to current password hash"""
+    """Logout user if value of hash key in session is not equal to current password hash.
+
+    The hash is only verified again when the user is updated or after
+    ``PASSWORD_SESSION_CHECK_INTERVAL`` seconds, in between the session is
+    trusted and the user is served from cache (see `seahub.auth.get_user`).
+    """
     def process_view(self, request, *args, **kwargs):
+        username = request.session.get(SESSION_KEY)
+        if username and is_session_verified(request, username):
+            return
+
+        # session was verified when the user was loaded a moment ago
+        if getattr(request.user, 'from_password_session_cache', False):
+            return
+
         if getattr(request.user, 'is_authenticated') and request.user.is_authenticated():
             if request.session.get(PASSWORD_HASH_KEY) != get_password_hash(request.user):
-                logout(request)
\ No newline at end of file
+                logout(request)
+            else:
+                mark_session_verified(request, request.user.username)
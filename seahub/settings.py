@@ -112,6 +112,7 @@ MIDDLEWARE_CLASSES = (
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'seahub.base.middleware.RPCMemoMiddleware',
     'seahub.auth.middleware.AuthenticationMiddleware',
     'seahub.base.middleware.BaseMiddleware',
     'seahub.base.middleware.InfobarMiddleware',
@@ -327,14 +328,22 @@ if 'win32' in sys.platform:
         CACHE_DIR = os.path.join(CCNET_CONF_PATH, '..')
         install_topdir = os.path.join(CCNET_CONF_PATH, '..')
 
+# A process-local LRU in front of memcached, see seahub/base/cache_backends.py.
+# Entries served from the local tier may lag behind other worker processes
+# for at most LOCAL_TIMEOUT seconds.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
-        'LOCATION': os.path.join(CACHE_DIR, 'seahub_cache'),
+        'BACKEND': 'seahub.base.cache_backends.TieredCache',
         'OPTIONS': {
-            'MAX_ENTRIES': 1000000
+            'SHARED': 'shared',
+            'LOCAL_MAX_ENTRIES': 10000,
+            'LOCAL_TIMEOUT': 5,
         }
-    }
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': '127.0.0.1:11211',
+    },
 }
 
 # rest_framwork
@@ -346,6 +355,12 @@ REST_FRAMEWORK = {
     },
 }
 
+# Seconds to cache the user resolved from an api token.
+TOKEN_AUTH_CACHE_TIMEOUT = 5 * 60
+
+# Seconds to cache groups and orgs a user joined.
+USER_CONTEXT_CACHE_TIMEOUT = 2 * 60
+
 # file and path
 MAX_UPLOAD_FILE_NAME_LEN    = 255
 MAX_FILE_NAME 		    = MAX_UPLOAD_FILE_NAME_LEN
@@ -508,6 +523,13 @@ ENABLE_FOLDER_PERM = False
 #####################
 ENABLE_SUDO_MODE = True
 
+###################
+# RPC memoization #
+###################
+# Reuse results of read-only seaf-server/ccnet calls (get_repo, owner,
+# permission checks, ...) during a request.
+ENABLE_RPC_MEMO = True
+
 #################
 # Email sending #
 #################
@@ -5,3 +5,5 @@ repo_created = django.dispatch.Signal(providing_args=["org_id", "creator", "repo
 repo_deleted = django.dispatch.Signal(providing_args=["org_id", "usernames", "repo_owner", "repo_id", "repo_name"])
 upload_file_successful = django.dispatch.Signal(providing_args=["repo_id", "file_path", "owner"])
 comment_file_successful = django.dispatch.Signal(providing_args=["repo", "file_path", "comment", "author", "notify_users"])
+# Sent when is_staff/is_active/role of a user changes, or the user is deleted.
+user_updated = django.dispatch.Signal(providing_args=["email"])
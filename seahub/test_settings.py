@@ -7,6 +7,20 @@ from .settings import *
 #     }
 # }
 
+# use the in-process stand-in instead of memcached
+CACHES = {
+    'default': {
+        'BACKEND': 'seahub.base.cache_backends.TieredCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+        }
+    },
+    'shared': {
+        'BACKEND': 'seahub.base.cache_backends.LocalSharedCache',
+        'LOCATION': 'seahub-test',
+    },
+}
+
 # enlarge api throttle
 REST_FRAMEWORK = {
     'DEFAULT_THROTTLE_RATES': {
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Background thumbnail jobs.
+
+Thumbnails are made by a small pool of worker threads in each web process,
+so a request can wait for a thumbnail with a short timeout instead of making
+it itself. Decoding and resizing in PIL release the GIL, and threads do not
+need to fork the process with its open RPC connections.
+
+Thumbnails made ahead of time, on upload and dir listing, go to a separate
+smaller pool, so they never delay thumbnails requested by users. A queued
+job is moved to the main pool when a user asks for it.
+
+The state of ``(file_id, size)`` is kept in the shared cache while a job is
+running and for a while after it failed, so concurrent requests, from this or
+other processes, never start a second job for the same thumbnail.
+"""
+import os
+import time
+import logging
+import threading
+from multiprocessing.pool import ThreadPool
+
+from django.core.cache import cache
+
+from seaserv import get_repo, get_file_id_by_path
+
+from seahub.thumbnail.utils import create_thumbnails, thumbnail_exists, \
+    THUMBNAIL_SIZES
+
+try:
+    from seahub.settings import THUMBNAIL_WORKERS
+except ImportError:
+    # Number of threads making requested thumbnails per process.
+    THUMBNAIL_WORKERS = 2
+try:
+    from seahub.settings import THUMBNAIL_PREFETCH_WORKERS
+except ImportError:
+    # Number of threads making thumbnails ahead of time per process.
+    THUMBNAIL_PREFETCH_WORKERS = 1
+try:
+    from seahub.settings import THUMBNAIL_WAIT_TIMEOUT
+except ImportError:
+    # Seconds a request waits for its thumbnail, before clients are told to
+    # poll its status.
+    THUMBNAIL_WAIT_TIMEOUT = 1
+try:
+    from seahub.settings import THUMBNAIL_JOB_TIMEOUT
+except ImportError:
+    # Seconds a job is considered running, and a failure is remembered.
+    THUMBNAIL_JOB_TIMEOUT = 60
+try:
+    from seahub.settings import THUMBNAIL_QUEUE_MAX
+except ImportError:
+    # Max number of jobs made ahead of time, by upload and dir listing, queued
+    # per process.
+    THUMBNAIL_QUEUE_MAX = 20
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_JOB_CACHE_KEY = 'thumbnail_job_%s_%s'
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+# interval of checking thumbnails made by other processes
+POLL_INTERVAL = 0.2
+
+def _cache_key(file_id, size):
+    return THUMBNAIL_JOB_CACHE_KEY % (file_id, size)
+
+class ThumbnailJob(object):
+    """Make thumbnails of ``file_id`` in ``sizes`` from one decode.
+    """
+    def __init__(self, repo_id, file_id, filename, sizes, prefetch=False):
+        self.repo_id = repo_id
+        self.file_id = file_id
+        self.filename = filename
+        self.sizes = sizes
+        self.prefetch = prefetch
+        self.status_code = None
+        self._done = threading.Event()
+        self._started = False
+        self._started_lock = threading.Lock()
+
+    def run(self):
+        # a promoted job is queued in both pools, run it once
+        with self._started_lock:
+            if self._started:
+                return
+            self._started = True
+
+        try:
+            repo = get_repo(self.repo_id)
+            if repo is None:
+                self.status_code = 400
+            else:
+                self.status_code = create_thumbnails(repo, self.file_id,
+                                                     self.filename, self.sizes)
+        except Exception as e:
+            logger.error(e)
+            self.status_code = 500
+
+        try:
+            if self.status_code == 200:
+                cache.delete_many([_cache_key(self.file_id, s)
+                                   for s in self.sizes])
+            else:
+                cache.set_many(dict((_cache_key(self.file_id, s),
+                                     (FAILED, self.status_code))
+                                    for s in self.sizes),
+                               THUMBNAIL_JOB_TIMEOUT)
+        finally:
+            _finish_job(self)
+            self._done.set()
+
+    def wait(self, timeout):
+        self._done.wait(timeout)
+        return self._done.is_set()
+
+# Running jobs of this process, keyed by ``(file_id, size)``.
+_jobs = {}
+_jobs_lock = threading.Lock()
+# Thread pools of current process, keyed by whether they make thumbnails
+# ahead of time.
+_pools = {}
+_pools_pid = None
+
+def _get_pool(prefetch=False):
+    """Return thread pool of current process, caller must hold the lock.
+    """
+    global _pools_pid
+    # threads do not survive a fork of a preloaded app
+    if _pools_pid != os.getpid():
+        _pools.clear()
+        _pools_pid = os.getpid()
+    if prefetch not in _pools:
+        _pools[prefetch] = ThreadPool(THUMBNAIL_PREFETCH_WORKERS if prefetch
+                                      else THUMBNAIL_WORKERS)
+    return _pools[prefetch]
+
+def _finish_job(job):
+    with _jobs_lock:
+        for size in job.sizes:
+            if _jobs.get((job.file_id, size)) is job:
+                del _jobs[(job.file_id, size)]
+
+def get_thumbnail_state(file_id, size):
+    """Return ``(state, status code)`` of thumbnail of ``file_id`` in
+    ``size``, state is None if it is not made nor being made.
+    """
+    if thumbnail_exists(size, file_id):
+        return DONE, 200
+    state = cache.get(_cache_key(file_id, size))
+    if state is None:
+        return None, None
+    return state
+
+def submit_thumbnail_job(repo_id, file_id, filename, size, prefetch=False):
+    """Queue a job making thumbnail of ``file_id`` in ``size``, and other
+    sizes of `THUMBNAIL_SIZES` which do not exist yet. ``prefetch`` jobs are
+    made ahead of time, in a separate pool.
+
+    Return the running job of this process making ``size``, or None if the
+    thumbnail exists, failed recently or is being made by another process.
+    """
+    with _jobs_lock:
+        job = _jobs.get((file_id, size))
+        if job is not None:
+            if job.prefetch and not prefetch:
+                # requested by a user now, do not wait behind other prefetches
+                job.prefetch = False
+                _get_pool().apply_async(job.run)
+            return job
+
+        sizes = [s for s in [size] + [s for s in THUMBNAIL_SIZES if s != size]
+                 if (file_id, s) not in _jobs and
+                 not thumbnail_exists(s, file_id) and
+                 cache.add(_cache_key(file_id, s), (PENDING, None),
+                           THUMBNAIL_JOB_TIMEOUT)]
+        if sizes:
+            job = ThumbnailJob(repo_id, file_id, filename, sizes, prefetch)
+            for s in sizes:
+                _jobs[(file_id, s)] = job
+            _get_pool(prefetch).apply_async(job.run)
+
+        return _jobs.get((file_id, size))
+
+def wait_thumbnail(repo_id, file_id, filename, size,
+                   timeout=THUMBNAIL_WAIT_TIMEOUT):
+    """Make thumbnail of ``file_id`` in ``size`` in background if it does not
+    exist, and wait at most ``timeout`` seconds for it.
+
+    Return ``(state, status code)``.
+    """
+    state, status_code = get_thumbnail_state(file_id, size)
+    if state in (DONE, FAILED):
+        return state, status_code
+
+    deadline = time.time() + timeout
+    job = submit_thumbnail_job(repo_id, file_id, filename, size)
+    if job is not None:
+        job.wait(timeout)
+    else:
+        # being made by another process
+        while time.time() < deadline and \
+              get_thumbnail_state(file_id, size)[0] == PENDING:
+            time.sleep(POLL_INTERVAL)
+
+    state, status_code = get_thumbnail_state(file_id, size)
+    return state or FAILED, status_code or 500
+
+def queue_thumbnail(repo_id, file_id, filename, size):
+    """Make thumbnail of ``file_id`` in ``size`` ahead of time, unless
+    ``THUMBNAIL_QUEUE_MAX`` such jobs are already queued in this process.
+    """
+    with _jobs_lock:
+        num_jobs = len(set(j for j in _jobs.values() if j.prefetch))
+    if num_jobs >= THUMBNAIL_QUEUE_MAX:
+        return None
+    return submit_thumbnail_job(repo_id, file_id, filename, size,
+                                prefetch=True)
+
+def generate_thumbnail_async(repo_id, size, path,
+                             timeout=THUMBNAIL_WAIT_TIMEOUT):
+    """Same as `seahub.thumbnail.utils.generate_thumbnail`, but the thumbnail
+    is made in background and waited for at most ``timeout`` seconds.
+
+    Return ``(state, status code)``.
+    """
+    try:
+        size = int(size)
+    except ValueError as e:
+        logger.error(e)
+        return FAILED, 400
+
+    file_id = get_file_id_by_path(repo_id, path)
+    if not file_id:
+        return FAILED, 400
+
+    return wait_thumbnail(repo_id, file_id, os.path.basename(path), size,
+                          timeout)
@@ -0,0 +1,31 @@
+# encoding: utf-8
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from seahub.thumbnail.utils import evict_thumbnails, THUMBNAIL_ROOT_MAX_SIZE
+
+class Command(BaseCommand):
+    help = "Remove least recently used image files's thumbnails beyond the disk budget"
+    option_list = BaseCommand.option_list + (
+        make_option('--max-size', dest='max_size', type='int',
+                    default=THUMBNAIL_ROOT_MAX_SIZE,
+                    help='Size(MB) budget of thumbnails, defaults to THUMBNAIL_ROOT_MAX_SIZE.'),
+        make_option('--target-ratio', dest='target_ratio', type='float',
+                    default=0.9,
+                    help='Ratio of the budget to shrink thumbnails to.'),
+    )
+
+    def handle(self, *args, **options):
+        max_size = options['max_size']
+        if max_size <= 0:
+            raise CommandError('No size budget, set THUMBNAIL_ROOT_MAX_SIZE or --max-size.')
+
+        target_ratio = options['target_ratio']
+        if not 0 < target_ratio <= 1:
+            raise CommandError('--target-ratio should be in (0, 1].')
+
+        removed, freed, total = evict_thumbnails(max_size * 1024**2,
+                                                 target_ratio)
+        self.stdout.write('Removed %d thumbnails, freed %d of %d bytes' %
+                          (removed, freed, total))
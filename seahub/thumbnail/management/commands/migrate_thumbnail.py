@@ -0,0 +1,11 @@
+# encoding: utf-8
+from django.core.management.base import BaseCommand
+
+from seahub.thumbnail.utils import migrate_legacy_thumbnails
+
+class Command(BaseCommand):
+    help = "Move image files's thumbnails in the flat layout into shard directories"
+
+    def handle(self, *args, **options):
+        moved = migrate_legacy_thumbnails()
+        self.stdout.write('Successfully moved %d thumbnails' % moved)
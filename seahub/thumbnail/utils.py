@@ -1,8 +1,11 @@
 import os
+import time
 import posixpath
 import urllib2
 import logging
+import tempfile
 from StringIO import StringIO
+from collections import defaultdict
 from PIL import Image
 
 from seaserv import get_file_id_by_path, get_repo, get_file_size, \
@@ -11,20 +14,213 @@ from seaserv import get_file_id_by_path, get_repo, get_file_size, \
 from seahub.utils import gen_inner_file_get_url
 
 from seahub.settings import THUMBNAIL_IMAGE_SIZE_LIMIT, \
-    THUMBNAIL_EXTENSION, THUMBNAIL_ROOT, THUMBNAIL_IMAGE_ORIGINAL_SIZE_LIMIT
+    THUMBNAIL_EXTENSION, THUMBNAIL_ROOT, THUMBNAIL_IMAGE_ORIGINAL_SIZE_LIMIT, \
+    THUMBNAIL_DEFAULT_SIZE, THUMBNAIL_SIZE_FOR_GRID
+
+try:
+    from seahub.settings import THUMBNAIL_SIZES
+except ImportError:
+    # Sizes generated together from one decode of an image.
+    THUMBNAIL_SIZES = (THUMBNAIL_DEFAULT_SIZE, THUMBNAIL_SIZE_FOR_GRID)
+try:
+    from seahub.settings import THUMBNAIL_ROOT_MAX_SIZE
+except ImportError:
+    # size(MB) budget of THUMBNAIL_ROOT, least recently used thumbnails are
+    # removed by `evict_thumbnail` command beyond it, 0 means no limit.
+    THUMBNAIL_ROOT_MAX_SIZE = 0
 
 # Get an instance of a logger
 logger = logging.getLogger(__name__)
 
+# bytes read from fileserver at a time
+READ_CHUNK_SIZE = 64 * 1024
+# Max bytes read to find the header of an image, JPEG headers may carry large
+# EXIF and ICC segments.
+HEADER_MAX_SIZE = 1024 * 1024
+# prefix of files being written
+TMP_PREFIX = '.tmp-'
+# seconds after which a file being written is considered left over
+TMP_MAX_AGE = 60 * 60
+
+def _get_file_mode():
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0666 & ~umask
+
+# mode of thumbnail files, same as files created by open()
+THUMBNAIL_FILE_MODE = _get_file_mode()
+
 def get_thumbnail_src(repo_id, size, path):
     return posixpath.join("thumbnail", repo_id, str(size), path.lstrip('/'))
 
 def get_share_link_thumbnail_src(token, size, path):
     return posixpath.join("thumbnail", token, str(size), path.lstrip('/'))
 
+def get_thumbnail_path(size, file_id):
+    """Return path of the thumbnail of ``file_id`` in ``size``.
+
+    Thumbnails are sharded by the first two bytes of the file id, as
+    ``<size>/ab/cd/abcd...``, to keep directories small.
+    """
+    return os.path.join(THUMBNAIL_ROOT, str(size), file_id[:2], file_id[2:4],
+                        file_id)
+
+def get_legacy_thumbnail_path(size, file_id):
+    """Return path of the thumbnail in the flat layout used before sharding.
+    """
+    return os.path.join(THUMBNAIL_ROOT, str(size), file_id)
+
+def _makedirs(path):
+    if not os.path.exists(path):
+        try:
+            os.makedirs(path)
+        except OSError:
+            # created by another worker
+            if not os.path.isdir(path):
+                raise
+
+def move_thumbnail(src, dst):
+    """Move a thumbnail file to ``dst``, creating its directory.
+    """
+    _makedirs(os.path.dirname(dst))
+    os.rename(src, dst)
+
+def thumbnail_exists(size, file_id):
+    """Return True if thumbnail of ``file_id`` in ``size`` exists. A thumbnail
+    in the legacy layout is moved into place, so thumbnails which are not
+    migrated yet are not made again.
+    """
+    path = get_thumbnail_path(size, file_id)
+    if os.path.exists(path):
+        return True
+
+    legacy_path = get_legacy_thumbnail_path(size, file_id)
+    if not os.path.isfile(legacy_path):
+        return False
+    try:
+        move_thumbnail(legacy_path, path)
+    except OSError:
+        # moved by another worker
+        pass
+    return os.path.exists(path)
+
+def _check_image_size(image):
+    """Return False if decoding ``image`` costs too much memory.
+    """
+    # use RGBA as default mode(4x8-bit pixels, true colour with transparency mask)
+    # every pixel will cost 4 byte in RGBA mode
+    width, height = image.size
+    image_memory_cost = width * height * 4 / 1024 / 1024
+    return image_memory_cost <= THUMBNAIL_IMAGE_ORIGINAL_SIZE_LIMIT
+
+def _open_image(data):
+    """Parse header of image in ``data``, return None if it is incomplete.
+    ``Image.open`` does not decode pixel data.
+    """
+    try:
+        return Image.open(StringIO(data))
+    except Exception:
+        return None
+
+def read_image(stream):
+    """Read an image from ``stream``. The header is parsed first, so the rest
+    of an image which is too large to decode is never read.
+
+    Return ``(image, status code)``, image is None if status is not 200.
+    """
+    data = StringIO()
+    image = None
+    while data.tell() < HEADER_MAX_SIZE:
+        chunk = stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        data.write(chunk)
+        image = _open_image(data.getvalue())
+        if image is not None:
+            break
+
+    if image is not None and not _check_image_size(image):
+        return None, 403
+
+    while True:
+        chunk = stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        data.write(chunk)
+
+    data.seek(0)
+    image = Image.open(data)
+    if not _check_image_size(image):
+        return None, 403
+    return image, 200
+
+def save_thumbnail(image, size, file_id):
+    """Save ``image`` as the thumbnail of ``file_id`` in ``size``. The file is
+    written aside and renamed, so a partly written thumbnail is never read.
+    """
+    thumbnail_file = get_thumbnail_path(size, file_id)
+    thumbnail_dir = os.path.dirname(thumbnail_file)
+    _makedirs(thumbnail_dir)
+
+    fd, tmp_file = tempfile.mkstemp(dir=thumbnail_dir, prefix=TMP_PREFIX)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            image.save(f, THUMBNAIL_EXTENSION)
+        # mkstemp creates 0600 files, make it readable by the web server
+        os.chmod(tmp_file, THUMBNAIL_FILE_MODE)
+        os.rename(tmp_file, thumbnail_file)
+    except Exception:
+        os.unlink(tmp_file)
+        raise
+
+def create_thumbnails(repo, file_id, filename, sizes):
+    """Create thumbnails of ``file_id`` in all ``sizes`` from one decode of
+    the original image.
+
+    Return status code, 200 on success.
+    """
+    sizes = sorted(set(sizes), reverse=True)
+
+    file_size = get_file_size(repo.store_id, repo.version, file_id)
+    if file_size > THUMBNAIL_IMAGE_SIZE_LIMIT * 1024**2:
+        return 403
+
+    token = seafile_api.get_fileserver_access_token(repo.id, file_id, 'view',
+                                                    '', use_onetime = True)
+
+    inner_path = gen_inner_file_get_url(token, filename)
+    try:
+        image_file = urllib2.urlopen(inner_path)
+        try:
+            image, status_code = read_image(image_file)
+        finally:
+            image_file.close()
+        if image is None:
+            return status_code
+
+        # let JPEG decoder scale down while decoding, to no less than the
+        # largest size
+        image.draft(image.mode, (sizes[0], sizes[0]))
+
+        if image.mode not in ["1", "L", "P", "RGB", "RGBA"]:
+            image = image.convert("RGB")
+        image.load()
+
+        # from largest to smallest, each one scaled from the previous one
+        for size in sizes:
+            image.thumbnail((size, size), Image.ANTIALIAS)
+            save_thumbnail(image, size, file_id)
+        return 200
+    except Exception as e:
+        logger.error(e)
+        return 500
+
 def generate_thumbnail(request, repo_id, size, path):
     """ generate and save thumbnail if not exist
 
+    Other sizes of `THUMBNAIL_SIZES` which do not exist yet are generated
+    along with ``size``.
+
     before generate thumbnail, you should check:
     1. if repo exist: should exist;
     2. if repo is encrypted: not encrypted;
@@ -37,45 +233,118 @@ def generate_thumbnail(request, repo_id, size, path):
         logger.error(e)
         return (False, 400)
 
-    thumbnail_dir = os.path.join(THUMBNAIL_ROOT, str(size))
-    if not os.path.exists(thumbnail_dir):
-        os.makedirs(thumbnail_dir)
-
     file_id = get_file_id_by_path(repo_id, path)
     if not file_id:
         return (False, 400)
 
-    thumbnail_file = os.path.join(thumbnail_dir, file_id)
-    if os.path.exists(thumbnail_file):
+    if thumbnail_exists(size, file_id):
         return (True, 200)
 
+    sizes = [size] + [s for s in THUMBNAIL_SIZES
+                      if s != size and not thumbnail_exists(s, file_id)]
+
     repo = get_repo(repo_id)
-    file_size = get_file_size(repo.store_id, repo.version, file_id)
-    if file_size > THUMBNAIL_IMAGE_SIZE_LIMIT * 1024**2:
-        return (False, 403)
+    status_code = create_thumbnails(repo, file_id, os.path.basename(path),
+                                    sizes)
+    return (status_code == 200, status_code)
 
-    token = seafile_api.get_fileserver_access_token(repo_id, file_id, 'view',
-                                                    '', use_onetime = True)
+def _iter_size_dirs():
+    """Yield ``(size, path)`` of dirs of each thumbnail size.
+    """
+    if not os.path.isdir(THUMBNAIL_ROOT):
+        return
+    for name in sorted(os.listdir(THUMBNAIL_ROOT)):
+        path = os.path.join(THUMBNAIL_ROOT, name)
+        if name.isdigit() and os.path.isdir(path):
+            yield int(name), path
 
-    inner_path = gen_inner_file_get_url(token, os.path.basename(path))
-    try:
-        image_file = urllib2.urlopen(inner_path)
-        f = StringIO(image_file.read())
-        image = Image.open(f)
+def iter_thumbnails():
+    """Yield ``(path, last access time, file size)`` of thumbnail files, one
+    directory at a time. Left over temp files have access time 0.
+    """
+    now = time.time()
+    for size, size_dir in _iter_size_dirs():
+        for dirpath, dirnames, filenames in os.walk(size_dir):
+            dirnames.sort()
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    # removed meanwhile
+                    continue
+                # atime is not updated on `noatime` mounts
+                atime = max(st.st_atime, st.st_mtime)
+                if name.startswith(TMP_PREFIX):
+                    if now - st.st_mtime < TMP_MAX_AGE:
+                        continue
+                    atime = 0
+                yield path, atime, st.st_size
 
-        # check image memory cost size limit
-        # use RGBA as default mode(4x8-bit pixels, true colour with transparency mask)
-        # every pixel will cost 4 byte in RGBA mode
-        width, height = image.size
-        image_memory_cost = width * height * 4 / 1024 / 1024
-        if image_memory_cost > THUMBNAIL_IMAGE_ORIGINAL_SIZE_LIMIT:
-            return (False, 403)
+def migrate_legacy_thumbnails():
+    """Move thumbnails in the legacy flat layout into their shards.
 
-        if image.mode not in ["1", "L", "P", "RGB", "RGBA"]:
-            image = image.convert("RGB")
-        image.thumbnail((size, size), Image.ANTIALIAS)
-        image.save(thumbnail_file, THUMBNAIL_EXTENSION)
-        return (True, 200)
-    except Exception as e:
-        logger.error(e)
-        return (False, 500)
+    Return number of thumbnails moved.
+    """
+    moved = 0
+    for size, size_dir in _iter_size_dirs():
+        for name in os.listdir(size_dir):
+            # shard dirs have 2 characters names
+            path = os.path.join(size_dir, name)
+            if len(name) <= 2 or not os.path.isfile(path):
+                continue
+            try:
+                move_thumbnail(path, get_thumbnail_path(size, name))
+            except OSError as e:
+                logger.error(e)
+                continue
+            moved += 1
+    return moved
+
+def evict_thumbnails(max_size, target_ratio=0.9, bucket_seconds=24*60*60):
+    """Remove least recently used thumbnails if total size of thumbnails is
+    larger than ``max_size`` bytes, until it is ``max_size * target_ratio``.
+
+    Thumbnails are walked twice, access times are counted by buckets of
+    ``bucket_seconds`` in the first pass, so memory does not grow with the
+    number of thumbnails.
+
+    Return ``(number of files removed, bytes freed, total bytes)``.
+    """
+    total_size = 0
+    bucket_sizes = defaultdict(int)
+    for path, atime, size in iter_thumbnails():
+        total_size += size
+        bucket_sizes[int(atime // bucket_seconds)] += size
+
+    if total_size <= max_size:
+        return 0, 0, total_size
+
+    # all thumbnails in buckets older than `cutoff` are removed, and those
+    # in `cutoff` until `cutoff_to_free` bytes are freed
+    to_free = total_size - int(max_size * target_ratio)
+    cutoff = cutoff_to_free = None
+    for bucket in sorted(bucket_sizes):
+        if bucket_sizes[bucket] >= to_free:
+            cutoff, cutoff_to_free = bucket, to_free
+            break
+        to_free -= bucket_sizes[bucket]
+
+    removed = freed = cutoff_freed = 0
+    for path, atime, size in iter_thumbnails():
+        bucket = int(atime // bucket_seconds)
+        if bucket > cutoff:
+            continue
+        if bucket == cutoff:
+            if cutoff_freed >= cutoff_to_free:
+                continue
+            cutoff_freed += size
+        try:
+            os.unlink(path)
+        except OSError:
+            # removed meanwhile
+            continue
+        removed += 1
+        freed += size
+
+    return removed, freed, total_size
@@ -2,12 +2,12 @@ import os
 import json
 import logging
 import posixpath
-import datetime
 
 from django.utils.translation import ugettext as _
 from django.utils.http import urlquote
-from django.http import HttpResponse
-from django.views.decorators.http import condition
+from django.http import HttpResponse, HttpResponseNotModified, FileResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
 from django.shortcuts import render_to_response
 from django.template import RequestContext
 
@@ -16,14 +16,79 @@ from seaserv import get_repo, get_file_id_by_path
 from seahub.auth.decorators import login_required_ajax, login_required
 from seahub.views import check_folder_permission
 from seahub.settings import THUMBNAIL_DEFAULT_SIZE, THUMBNAIL_EXTENSION, \
-    THUMBNAIL_ROOT, ENABLE_THUMBNAIL
-from seahub.thumbnail.utils import generate_thumbnail, \
-    get_thumbnail_src, get_share_link_thumbnail_src
+    ENABLE_THUMBNAIL, THUMBNAIL_ROOT
+from seahub.thumbnail.utils import get_thumbnail_src, \
+    get_share_link_thumbnail_src, get_thumbnail_path, thumbnail_exists
+from seahub.thumbnail.jobs import generate_thumbnail_async, \
+    get_thumbnail_state, DONE, PENDING
 from seahub.share.models import FileShare, check_share_link_common
 
+try:
+    from seahub.settings import THUMBNAIL_SERVE_MODE
+except ImportError:
+    # How thumbnail files are sent, 'x-accel-redirect' (nginx), 'x-sendfile'
+    # (apache, lighttpd), or None to stream them by `wsgi.file_wrapper`.
+    THUMBNAIL_SERVE_MODE = None
+try:
+    from seahub.settings import THUMBNAIL_X_ACCEL_REDIRECT_LOCATION
+except ImportError:
+    # nginx internal location aliased to THUMBNAIL_ROOT.
+    THUMBNAIL_X_ACCEL_REDIRECT_LOCATION = '/thumbnail-internal/'
+try:
+    from seahub.settings import THUMBNAIL_CACHE_MAX_AGE
+except ImportError:
+    # Seconds browsers keep a thumbnail without revalidating it, thumbnail
+    # urls are by path, so a changed file shows up after at most this long.
+    THUMBNAIL_CACHE_MAX_AGE = 24 * 60 * 60
+
 # Get an instance of a logger
 logger = logging.getLogger(__name__)
 
+def _thumbnail_etag(obj_id, size):
+    return quote_etag('%s-%s' % (obj_id, size))
+
+def _not_modified(request, etag):
+    """Return ``304 Not Modified`` if ``If-None-Match`` header of ``request``
+    matches ``etag``, else None.
+    """
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return None
+
+    # parse_etags unquotes etags and drops ``W/``
+    etags = parse_etags(header)
+    if '*' not in etags and parse_etags(etag)[0] not in etags:
+        return None
+    return _patch_thumbnail_headers(HttpResponseNotModified(), etag)
+
+def _patch_thumbnail_headers(response, etag):
+    response['ETag'] = etag
+    patch_cache_control(response, private=True,
+                        max_age=THUMBNAIL_CACHE_MAX_AGE)
+    return response
+
+def _serve_thumbnail(thumbnail_file, etag):
+    """Return response of ``thumbnail_file``, sent by the web server in
+    `THUMBNAIL_SERVE_MODE`, or streamed from the file.
+
+    Raises ``IOError`` if the file can not be read.
+    """
+    content_type = 'image/' + THUMBNAIL_EXTENSION
+    if THUMBNAIL_SERVE_MODE == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = posixpath.join(
+            THUMBNAIL_X_ACCEL_REDIRECT_LOCATION,
+            os.path.relpath(thumbnail_file, THUMBNAIL_ROOT))
+    elif THUMBNAIL_SERVE_MODE == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = thumbnail_file
+    else:
+        f = open(thumbnail_file, 'rb')
+        response = FileResponse(f, content_type=content_type)
+        response['Content-Length'] = os.fstat(f.fileno()).st_size
+
+    return _patch_thumbnail_headers(response, etag)
+
 @login_required_ajax
 def thumbnail_create(request, repo_id):
     """create thumbnail from repo file list
@@ -53,33 +118,63 @@ def thumbnail_create(request, repo_id):
                             content_type=content_type)
 
     size = request.GET.get('size', THUMBNAIL_DEFAULT_SIZE)
-    success, status_code = generate_thumbnail(request, repo_id, size, path)
-    if success:
+    state, status_code = generate_thumbnail_async(repo_id, size, path)
+    if state == DONE:
         src = get_thumbnail_src(repo_id, size, path)
         result['encoded_thumbnail_src'] = urlquote(src)
         return HttpResponse(json.dumps(result), content_type=content_type)
+    elif state == PENDING:
+        return HttpResponse(json.dumps({'status': PENDING}), status=202,
+                            content_type=content_type)
     else:
         err_msg = _('Failed to create thumbnail.')
         return HttpResponse(json.dumps({'err_msg': err_msg}),
                 status=status_code, content_type=content_type)
 
-def latest_entry(request, repo_id, size, path):
+@login_required_ajax
+def thumbnail_status(request, repo_id):
+    """return state of thumbnail of a repo file, for clients to poll after
+    thumbnail_create returned 202
+    """
+
+    content_type = 'application/json; charset=utf-8'
+
+    repo = get_repo(repo_id)
+    if not repo:
+        err_msg = _(u"Library does not exist.")
+        return HttpResponse(json.dumps({"error": err_msg}), status=400,
+                            content_type=content_type)
+
+    path = request.GET.get('path', None)
+    try:
+        size = int(request.GET.get('size', THUMBNAIL_DEFAULT_SIZE))
+    except ValueError:
+        size = None
+    if not path or size is None:
+        err_msg = _(u"Invalid arguments.")
+        return HttpResponse(json.dumps({"error": err_msg}), status=400,
+                            content_type=content_type)
+
+    if repo.encrypted or not ENABLE_THUMBNAIL or \
+        check_folder_permission(request, repo_id, path) is None:
+        err_msg = _(u"Permission denied.")
+        return HttpResponse(json.dumps({"error": err_msg}), status=403,
+                            content_type=content_type)
+
     obj_id = get_file_id_by_path(repo_id, path)
-    if obj_id:
-        try:
-            thumbnail_file = os.path.join(THUMBNAIL_ROOT, str(size), obj_id)
-            last_modified_time = os.path.getmtime(thumbnail_file)
-            # convert float to datatime obj
-            return datetime.datetime.fromtimestamp(last_modified_time)
-        except Exception as e:
-            # no thumbnail file exists
-            logger.error(e)
-            return None
-    else:
-        return None
+    if not obj_id:
+        err_msg = _(u"File does not exist.")
+        return HttpResponse(json.dumps({"error": err_msg}), status=404,
+                            content_type=content_type)
+
+    state, status_code = get_thumbnail_state(obj_id, size)
+    result = {'status': state or 'none'}
+    if state == DONE:
+        src = get_thumbnail_src(repo_id, size, path)
+        result['encoded_thumbnail_src'] = urlquote(src)
+    return HttpResponse(json.dumps(result), content_type=content_type)
 
 @login_required
-@condition(last_modified_func=latest_entry)
 def thumbnail_get(request, repo_id, size, path):
     """ handle thumbnail src from repo file list
 
@@ -104,17 +199,21 @@ def thumbnail_get(request, repo_id, size, path):
         logger.error(e)
         return HttpResponse()
 
+    # thumbnail of a file id never changes
+    etag = _thumbnail_etag(obj_id, size)
+    response = _not_modified(request, etag)
+    if response is not None:
+        return response
+
     success = True
-    thumbnail_file = os.path.join(THUMBNAIL_ROOT, str(size), obj_id)
-    if not os.path.exists(thumbnail_file):
-        success, status_code = generate_thumbnail(request, repo_id, size, path)
+    thumbnail_file = get_thumbnail_path(size, obj_id)
+    if not thumbnail_exists(size, obj_id):
+        state, status_code = generate_thumbnail_async(repo_id, size, path)
+        success = state == DONE
 
     if success:
         try:
-            with open(thumbnail_file, 'rb') as f:
-                thumbnail = f.read()
-            return HttpResponse(content=thumbnail,
-                                content_type='image/' + THUMBNAIL_EXTENSION)
+            return _serve_thumbnail(thumbnail_file, etag)
         except IOError as e:
             logger.error(e)
             return HttpResponse()
@@ -160,46 +259,78 @@ def share_link_thumbnail_create(request, token):
         real_path = posixpath.join(fileshare.path, req_path.lstrip('/'))
 
     size = request.GET.get('size', THUMBNAIL_DEFAULT_SIZE)
-    success, status_code = generate_thumbnail(request, repo_id, size, real_path)
-    if success:
+    state, status_code = generate_thumbnail_async(repo_id, size, real_path)
+    if state == DONE:
         src = get_share_link_thumbnail_src(token, size, req_path)
         result['encoded_thumbnail_src'] = urlquote(src)
         return HttpResponse(json.dumps(result), content_type=content_type)
+    elif state == PENDING:
+        return HttpResponse(json.dumps({'status': PENDING}), status=202,
+                            content_type=content_type)
     else:
         err_msg = _('Failed to create thumbnail.')
         return HttpResponse(json.dumps({'err_msg': err_msg}),
                 status=status_code, content_type=content_type)
 
-def share_link_latest_entry(request, token, size, path):
+def share_link_thumbnail_status(request, token):
+    """return state of thumbnail of a file in dir download link page, for
+    clients to poll after share_link_thumbnail_create returned 202
+    """
+
+    content_type = 'application/json; charset=utf-8'
+
     fileshare = FileShare.objects.get_valid_file_link_by_token(token)
     if not fileshare:
-        return None
+        err_msg = _(u"Invalid token.")
+        return HttpResponse(json.dumps({"error": err_msg}), status=400,
+                            content_type=content_type)
+
+    password_check_passed, err_msg = check_share_link_common(request, fileshare)
+    if not password_check_passed:
+        err_msg = _(u"Permission denied.")
+        return HttpResponse(json.dumps({"error": err_msg}), status=403,
+                            content_type=content_type)
 
     repo_id = fileshare.repo_id
     repo = get_repo(repo_id)
     if not repo:
-        return None
+        err_msg = _(u"Library does not exist.")
+        return HttpResponse(json.dumps({"error": err_msg}), status=400,
+                            content_type=content_type)
+
+    if repo.encrypted or not ENABLE_THUMBNAIL:
+        err_msg = _(u"Permission denied.")
+        return HttpResponse(json.dumps({"error": err_msg}), status=403,
+                            content_type=content_type)
+
+    req_path = request.GET.get('path', None)
+    try:
+        size = int(request.GET.get('size', THUMBNAIL_DEFAULT_SIZE))
+    except ValueError:
+        size = None
+    if not req_path or '../' in req_path or size is None:
+        err_msg = _(u"Invalid arguments.")
+        return HttpResponse(json.dumps({"error": err_msg}), status=400,
+                            content_type=content_type)
 
     if fileshare.path == '/':
-        image_path = path
+        real_path = req_path
     else:
-        image_path = posixpath.join(fileshare.path, path.lstrip('/'))
+        real_path = posixpath.join(fileshare.path, req_path.lstrip('/'))
 
-    obj_id = get_file_id_by_path(repo_id, image_path)
-    if obj_id:
-        try:
-            thumbnail_file = os.path.join(THUMBNAIL_ROOT, str(size), obj_id)
-            last_modified_time = os.path.getmtime(thumbnail_file)
-            # convert float to datatime obj
-            return datetime.datetime.fromtimestamp(last_modified_time)
-        except Exception as e:
-            logger.error(e)
-            # no thumbnail file exists
-            return None
-    else:
-        return None
+    obj_id = get_file_id_by_path(repo_id, real_path)
+    if not obj_id:
+        err_msg = _(u"File does not exist.")
+        return HttpResponse(json.dumps({"error": err_msg}), status=404,
+                            content_type=content_type)
+
+    state, status_code = get_thumbnail_state(obj_id, size)
+    result = {'status': state or 'none'}
+    if state == DONE:
+        src = get_share_link_thumbnail_src(token, size, req_path)
+        result['encoded_thumbnail_src'] = urlquote(src)
+    return HttpResponse(json.dumps(result), content_type=content_type)
 
-@condition(last_modified_func=share_link_latest_entry)
 def share_link_thumbnail_get(request, token, size, path):
     """ handle thumbnail src from dir download link page
 
@@ -239,17 +370,20 @@ def share_link_thumbnail_get(request, token, size, path):
     if repo.encrypted or not ENABLE_THUMBNAIL:
         return HttpResponse()
 
+    etag = _thumbnail_etag(obj_id, size)
+    response = _not_modified(request, etag)
+    if response is not None:
+        return response
+
     success = True
-    thumbnail_file = os.path.join(THUMBNAIL_ROOT, str(size), obj_id)
-    if not os.path.exists(thumbnail_file):
-        success, status_code = generate_thumbnail(request, repo_id, size, image_path)
+    thumbnail_file = get_thumbnail_path(size, obj_id)
+    if not thumbnail_exists(size, obj_id):
+        state, status_code = generate_thumbnail_async(repo_id, size, image_path)
+        success = state == DONE
 
     if success:
         try:
-            with open(thumbnail_file, 'rb') as f:
-                thumbnail = f.read()
-            return HttpResponse(content=thumbnail,
-                                content_type='image/' + THUMBNAIL_EXTENSION)
+            return _serve_thumbnail(thumbnail_file, etag)
         except IOError as e:
             logger.error(e)
             return HttpResponse()
@@ -1,6 +1,7 @@
 # encoding: utf-8
 import os
 import re
+import base64
 import urllib
 import urllib2
 import uuid
@@ -54,6 +55,16 @@ try:
     from seahub.settings import CHECK_SHARE_LINK_TRAFFIC
 except ImportError:
     CHECK_SHARE_LINK_TRAFFIC = False
+try:
+    from seahub.settings import EVENTS_SCAN_LIMIT
+except ImportError:
+    # Max number of events read from seafevents to fill one page.
+    EVENTS_SCAN_LIMIT = 1000
+try:
+    from seahub.settings import EVENTS_CURSOR_SLACK
+except ImportError:
+    # Number of events around the offset of a cursor searched for its event.
+    EVENTS_CURSOR_SLACK = 50
 
 def is_cluster_mode():
     cfg = ConfigParser.ConfigParser()
@@ -88,6 +99,7 @@ except ImportError:
 
 from seahub.utils.file_types import *
 from seahub.utils.htmldiff import HtmlDiff # used in views/files.py
+from seahub.utils.commit_diff import get_commit_diff
 
 EMPTY_SHA1 = '0000000000000000000000000000000000000000'
 MAX_INT = 2147483647
@@ -473,6 +485,31 @@ def is_org_context(request):
     return request.cloud_mode and request.user.org is not None
 
 # events related
+class InvalidEventsCursor(Exception):
+    pass
+
+def encode_events_cursor(event, offset):
+    """Return a cursor of events after ``event``, which was found at
+    ``offset``.
+    """
+    timestamp = event.timestamp.strftime('%Y-%m-%dT%H:%M:%S.%f')
+    return base64.urlsafe_b64encode(json.dumps([timestamp, event.uuid,
+                                                offset]))
+
+def decode_events_cursor(cursor):
+    """Return ``(timestamp, uuid, offset)`` encoded in ``cursor``.
+
+    Raises ``InvalidEventsCursor`` if ``cursor`` is malformed.
+    """
+    try:
+        timestamp, uuid, offset = json.loads(
+            base64.urlsafe_b64decode(str(cursor)))
+    except (TypeError, ValueError):
+        raise InvalidEventsCursor
+    if not isinstance(offset, int) or offset < 0:
+        raise InvalidEventsCursor
+    return timestamp, uuid, offset
+
 if EVENTS_CONFIG_FILE:
     parsed_events_conf = ConfigParser.ConfigParser()
     parsed_events_conf.read(EVENTS_CONFIG_FILE)
@@ -490,45 +527,80 @@ if EVENTS_CONFIG_FILE:
         finally:
            session.close()
 
-    def _same_events(e1, e2):
-        """Two events are equal should follow two rules:
-        1. event1.repo_id = event2.repo_id
-        2. event1.commit.creator = event2.commit.creator
-        3. event1.commit.desc = event2.commit.desc
+    def _event_dedup_key(e):
+        """Events of same repo, creator and commit description are treated
+        as duplicates.
         """
-        if hasattr(e1, 'commit') and hasattr(e2, 'commit'):
-            if e1.repo_id == e2.repo_id and \
-               e1.commit.desc == e2.commit.desc and \
-               e1.commit.creator_name == e2.commit.creator_name:
-                return True
-        return False
+        return (e.repo_id, e.commit.desc, e.commit.creator_name)
+
+    def _read_events(ev_session, username, start, limit, org_id=None):
+        if org_id > 0:
+            return seafevents.get_org_user_events(ev_session, org_id,
+                                                  username, start, limit)
+        return seafevents.get_user_events(ev_session, username, start, limit)
+
+    def _seek_events_cursor(ev_session, username, cursor, org_id=None):
+        """Return offset of the first event after ``cursor``.
 
-    def _get_events(username, start, count, org_id=None):
+        Events may have been added or deleted since the cursor was made, so
+        the event of the cursor is searched around its old offset. If it is
+        gone, the first older event is used instead.
+        """
+        timestamp, uuid, offset = decode_events_cursor(cursor)
+        window_start = max(0, offset - EVENTS_CURSOR_SLACK)
+        events = _read_events(ev_session, username, window_start,
+                              2 * EVENTS_CURSOR_SLACK + 1, org_id) or []
+
+        keys = [(e.timestamp.strftime('%Y-%m-%dT%H:%M:%S.%f'), e.uuid)
+                for e in events]
+        for i, key in enumerate(keys):
+            if key[1] == uuid:
+                return window_start + i + 1
+        for i, key in enumerate(keys):
+            if key < (timestamp, uuid):
+                return window_start + i
+        return offset
+
+    def _get_events(username, start, count, org_id=None, cursor=None):
+        """Return ``(events, new start, next cursor)``.
+
+        If ``cursor`` is given, ``start`` is ignored and events after the
+        cursor are returned.
+        """
         ev_session = SeafEventsSession()
 
         valid_events = []
+        seen = set()
+        repos = {}
         total_used = 0
+        scanned = 0
+        last_used = None
         try:
+            if cursor:
+                start = _seek_events_cursor(ev_session, username, cursor,
+                                            org_id)
             next_start = start
-            while True:
-                events = _get_events_inner(ev_session, username, next_start,
-                                           count, org_id)
+            while scanned < EVENTS_SCAN_LIMIT:
+                events, num_read = _get_events_inner(
+                    ev_session, username, next_start, count, org_id,
+                    repos=repos, max_scan=EVENTS_SCAN_LIMIT - scanned)
+                scanned += num_read
                 if not events:
                     break
 
-                for e1 in events:
-                    duplicate = False
-                    for e2 in valid_events:
-                        if _same_events(e1, e2): duplicate = True; break
+                for e in events:
+                    total_used = total_used + 1
+                    last_used = e
 
-                    new_merge = False
-                    if hasattr(e1, 'commit') and e1.commit and \
-                       new_merge_with_no_conflict(e1.commit):
-                        new_merge = True
+                    if getattr(e, 'commit', None):
+                        if new_merge_with_no_conflict(e.commit):
+                            continue
+                        key = _event_dedup_key(e)
+                        if key in seen:
+                            continue
+                        seen.add(key)
 
-                    if not duplicate and not new_merge:
-                        valid_events.append(e1)
-                    total_used = total_used + 1
+                    valid_events.append(e)
                     if len(valid_events) == count:
                         break
 
@@ -539,40 +611,57 @@ if EVENTS_CONFIG_FILE:
             ev_session.close()
 
         for e in valid_events:            # parse commit description
-            if hasattr(e, 'commit'):
+            if getattr(e, 'commit', None):
                 e.commit.converted_cmmt_desc = convert_cmmt_desc_link(e.commit)
                 e.commit.more_files = more_files_in_commit(e.commit)
-        return valid_events, start + total_used
-
-    def _get_events_inner(ev_session, username, start, limit, org_id=None):
+        new_start = start + total_used
+        next_cursor = encode_events_cursor(last_used, new_start - 1) \
+                      if last_used else None
+        return valid_events, new_start, next_cursor
+
+    def _get_event_repo(repo_id, username, repos):
+        """Return repo of ``repo_id`` with ``password_set`` of ``username``,
+        or None if it has been deleted. Repos are memoized in ``repos``.
+        """
+        if repo_id not in repos:
+            repo = seafile_api.get_repo(repo_id)
+            if repo and repo.encrypted:
+                repo.password_set = seafile_api.is_password_set(repo.id,
+                                                                username)
+            repos[repo_id] = repo
+        return repos[repo_id]
+
+    def _get_events_inner(ev_session, username, start, limit, org_id=None,
+                          repos=None, max_scan=None):
         '''Read events from seafevents database, and remove events that are
         no longer valid
 
-        Return 'limit' events or less than 'limit' events if no more events remain
+        Return ``(events, number of events read)``, 'limit' events or less
+        than 'limit' events if no more events remain or more than 'max_scan'
+        events have been read.
         '''
+        if repos is None:
+            repos = {}
+
         valid_events = []
-        next_start = start
-        while True:
-            if org_id > 0:
-                events = seafevents.get_org_user_events(ev_session, org_id,
-                                                        username, next_start,
-                                                        limit)
-            else:
-                events = seafevents.get_user_events(ev_session, username,
-                                                    next_start, limit)
+        scanned = 0
+        while max_scan is None or scanned < max_scan:
+            # events of deleted repos are removed, so valid events read so
+            # far are the only ones before next batch
+            next_start = start + len(valid_events)
+            events = _read_events(ev_session, username, next_start, limit,
+                                  org_id)
             if not events:
                 break
+            scanned += len(events)
 
             for ev in events:
                 if ev.etype == 'repo-update':
-                    repo = seafile_api.get_repo(ev.repo_id)
+                    repo = _get_event_repo(ev.repo_id, username, repos)
                     if not repo:
                         # delete the update event for repo which has been deleted
                         seafevents.delete_event(ev_session, ev.uuid)
                         continue
-                    if repo.encrypted:
-                        repo.password_set = seafile_api.is_password_set(
-                            repo.id, username)
                     ev.repo = repo
                     ev.commit = seaserv.get_commit(repo.id, repo.version, ev.commit_id)
 
@@ -580,11 +669,10 @@ if EVENTS_CONFIG_FILE:
                 if len(valid_events) == limit:
                     break
 
-            if len(valid_events) == limit:
+            if len(valid_events) == limit or len(events) < limit:
                 break
-            next_start = next_start + len(valid_events)
 
-        return valid_events
+        return valid_events, scanned
 
     def get_user_events(username, start, count):
         """Return user events list and a new start.
@@ -595,10 +683,25 @@ if EVENTS_CONFIG_FILE:
         ``get_user_events('foo@example.com', 5, 10)`` returns the 6th through
         15th events.
         """
-        return _get_events(username, start, count)
+        events, new_start, _ = _get_events(username, start, count)
+        return events, new_start
 
     def get_org_user_events(org_id, username, start, count):
-        return _get_events(username, start, count, org_id=org_id)
+        events, new_start, _ = _get_events(username, start, count,
+                                           org_id=org_id)
+        return events, new_start
+
+    def get_user_events_by_cursor(username, cursor, count, org_id=None):
+        """Return ``count`` user events after ``cursor``, the offset of next
+        page and the cursor of next page.
+
+        ``cursor`` is None for the first page, or a cursor returned with the
+        previous page. Unlike an offset, a cursor does not skip or repeat
+        events when events are added or deleted between two pages.
+
+        Raises ``InvalidEventsCursor``.
+        """
+        return _get_events(username, 0, count, org_id=org_id, cursor=cursor)
 
     def get_log_events_by_time(log_type, tstart, tend):
         """Return log events list by start/end timestamp. (If no logs, return 'None')
@@ -694,6 +797,8 @@ else:
         pass
     def get_org_user_events():
         pass
+    def get_user_events_by_cursor():
+        pass
     def generate_file_audit_event_type():
         pass
     def get_file_audit_events_by_path():
@@ -894,7 +999,7 @@ def api_convert_desc_link(e):
             e.dtime = api_tsstr_sec(commit.props.ctime)
             return (tmp_str + ' %s') % (op, file_or_dir, remaining)
         else:
-            diff_result = seafile_api.diff_commits(repo_id, '', cmmt_id)
+            diff_result = get_commit_diff(repo_id, '', cmmt_id)
             if diff_result:
                 for d in diff_result:
                     if file_or_dir not in d.name:
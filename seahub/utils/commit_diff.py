@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Cache of commit diffs.
+
+Commits are immutable, so the diff of ``(repo_id, commit_id, parent_id)``
+never changes and is kept in the shared cache without expiry until it is
+evicted by the cache backend. Diffs with more than
+``COMMIT_DIFF_CACHE_MAX_ENTRIES`` entries are not cached, to keep items small.
+"""
+import logging
+from collections import namedtuple
+
+from django.core.cache import cache
+
+from seaserv import seafserv_threaded_rpc
+
+try:
+    from seahub.settings import COMMIT_DIFF_CACHE_MAX_ENTRIES
+except ImportError:
+    COMMIT_DIFF_CACHE_MAX_ENTRIES = 5000
+try:
+    from seahub.settings import COMMIT_DIFF_CACHE_TIMEOUT
+except ImportError:
+    COMMIT_DIFF_CACHE_TIMEOUT = 30 * 24 * 60 * 60
+
+logger = logging.getLogger(__name__)
+
+COMMIT_DIFF_CACHE_KEY = 'commit_diff_%s_%s_%s'
+
+DiffEntry = namedtuple('DiffEntry', ['status', 'name', 'new_name'])
+
+def get_commit_diff(repo_id, parent_id, commit_id):
+    """Return a list of `DiffEntry` of ``commit_id`` against ``parent_id``,
+    or against its parent if ``parent_id`` is empty.
+
+    Raises ``SearpcError``.
+    """
+    key = COMMIT_DIFF_CACHE_KEY % (repo_id, commit_id, parent_id or '')
+    diff = cache.get(key)
+    if diff is not None:
+        return [DiffEntry(*d) for d in diff]
+
+    diff_result = seafserv_threaded_rpc.get_diff(repo_id, parent_id,
+                                                 commit_id)
+    if diff_result is None:
+        return []
+
+    diff = [(d.status, d.name, d.new_name) for d in diff_result]
+    if len(diff) <= COMMIT_DIFF_CACHE_MAX_ENTRIES:
+        cache.set(key, diff, COMMIT_DIFF_CACHE_TIMEOUT)
+    return [DiffEntry(*d) for d in diff]
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Process-local cache of directory listings.
+
+A seafile dir object is immutable and ``dir_id`` is the hash of its content,
+so the listing of ``(store_id, dir_id)`` never changes. The parts of a
+listing which do not depend on the user (names, types, ids, sizes, mtimes and
+the sorted order) are kept in a bounded LRU, and the permission of the user
+is laid over them on every request.
+
+Listing of pro edition is not cached, since lock state and folder
+permissions of each entry are only available from ``list_dir_with_perm``.
+"""
+import base64
+import bisect
+import json
+import logging
+import stat
+import threading
+from collections import OrderedDict
+
+from seaserv import seafile_api, seafserv_threaded_rpc
+
+from seahub.utils import is_pro_version
+
+try:
+    from seahub.settings import DIR_LISTING_CACHE_MAX_ENTRIES
+except ImportError:
+    # Max number of dirents kept per process.
+    DIR_LISTING_CACHE_MAX_ENTRIES = 200000
+
+logger = logging.getLogger(__name__)
+
+class Dirent(object):
+    """A dirent of a listing, with the permission of the current user.
+    """
+    __slots__ = ('obj_name', 'obj_id', 'mode', 'mtime', 'size', 'permission',
+                 'is_locked', 'lock_owner', 'lock_time', '__dict__')
+
+    def __init__(self, obj_name, obj_id, mode, mtime, size, permission=None,
+                 is_locked=False, lock_owner=None, lock_time=0):
+        self.obj_name = obj_name
+        self.obj_id = obj_id
+        self.mode = mode
+        self.mtime = mtime
+        self.size = size
+        self.permission = permission
+        self.is_locked = is_locked
+        self.lock_owner = lock_owner
+        self.lock_time = lock_time
+
+    def is_dir(self):
+        return stat.S_ISDIR(self.mode)
+
+class DirListingCache(object):
+    """Thread-safe LRU of ``(dirs, files)`` tuples, bounded by the total
+    number of dirents.
+    """
+    def __init__(self, max_entries=DIR_LISTING_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.num_entries = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return None
+            self._data[key] = value
+            return value
+
+    def set(self, key, value):
+        size = len(value[0]) + len(value[1])
+        if size > self.max_entries:
+            return
+
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.num_entries -= len(old[0]) + len(old[1])
+            self._data[key] = value
+            self.num_entries += size
+            while self.num_entries > self.max_entries:
+                _, old = self._data.popitem(last=False)
+                self.num_entries -= len(old[0]) + len(old[1])
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.num_entries = 0
+
+_cache = DirListingCache()
+# ``(keys, dirents)`` of listings sorted by a key of `SORT_KEYS`.
+_sorted_cache = DirListingCache()
+
+def _sort_key(dirent):
+    return (dirent.obj_name.lower(), dirent.obj_name)
+
+# Sort orders of paged listings. Dirs always come before files, and keys are
+# unique within a dir, so the key of the last entry of a page is a cursor.
+SORT_KEYS = {
+    'name': lambda d: (0 if d.is_dir() else 1, d.obj_name.lower(),
+                       d.obj_name),
+    'mtime': lambda d: (0 if d.is_dir() else 1, -d.mtime, d.obj_name.lower(),
+                        d.obj_name),
+    'size': lambda d: (0 if d.is_dir() else 1, -d.size, d.obj_name.lower(),
+                       d.obj_name),
+}
+
+class InvalidCursor(Exception):
+    pass
+
+def encode_cursor(sort, key):
+    return base64.urlsafe_b64encode(json.dumps([sort, key]))
+
+def decode_cursor(cursor, sort):
+    """Return the sort key encoded in ``cursor``.
+
+    Raises ``InvalidCursor`` if ``cursor`` is malformed or was made for
+    another sort order.
+    """
+    try:
+        cursor_sort, key = json.loads(base64.urlsafe_b64decode(str(cursor)))
+    except (TypeError, ValueError):
+        raise InvalidCursor
+    if cursor_sort != sort or not isinstance(key, list):
+        raise InvalidCursor
+    return tuple(key)
+
+def _split_and_sort(dirents):
+    dirs, files = [], []
+    for d in dirents:
+        (dirs if d.is_dir() else files).append(d)
+    dirs.sort(key=_sort_key)
+    files.sort(key=_sort_key)
+    return dirs, files
+
+def _file_size(repo, dirent):
+    if repo.version == 0:
+        size = seafile_api.get_file_size(repo.store_id, repo.version,
+                                         dirent.obj_id)
+        return size if size else 0
+    return dirent.size
+
+def get_dir_listing(repo, dir_id):
+    """Return ``(dirs, files)`` of ``dir_id``, each sorted by name,
+    without user permission. The result is shared, do not modify it.
+    """
+    key = (repo.store_id, dir_id)
+    listing = _cache.get(key)
+    if listing is not None:
+        return listing
+
+    dirents = []
+    for d in seafile_api.list_dir_by_dir_id(repo.id, dir_id) or []:
+        size = 0 if stat.S_ISDIR(d.mode) else _file_size(repo, d)
+        dirents.append(Dirent(d.obj_name, d.obj_id, d.mode, d.mtime, size))
+    listing = _split_and_sort(dirents)
+    _cache.set(key, listing)
+    return listing
+
+def list_dir_for_user(repo, path, dir_id, username, dir_perm):
+    """Return ``(dirs, files)`` of ``dir_id`` at ``path``, each sorted by
+    name, with permission and lock state of ``username``.
+
+    Arguments:
+    - `dir_perm`: permission of ``username`` on ``path``.
+    """
+    if is_pro_version():
+        dirents = seafserv_threaded_rpc.list_dir_with_perm(
+            repo.id, path, dir_id, username, -1, -1) or []
+        return _split_and_sort([
+            Dirent(d.obj_name, d.obj_id, d.mode, d.mtime,
+                   0 if stat.S_ISDIR(d.mode) else _file_size(repo, d),
+                   d.permission, d.is_locked, d.lock_owner, d.lock_time)
+            for d in dirents])
+
+    # Without folder permissions every dirent inherits the permission of
+    # its parent dir.
+    dirs, files = get_dir_listing(repo, dir_id)
+    return ([_with_perm(d, dir_perm) for d in dirs],
+            [_with_perm(f, dir_perm) for f in files])
+
+def _sort_dirents(dirents, sort):
+    keyed = sorted([(SORT_KEYS[sort](d), d) for d in dirents],
+                   key=lambda x: x[0])
+    return [k for k, _ in keyed], [d for _, d in keyed]
+
+def get_sorted_dir_listing(repo, dir_id, sort):
+    """Return ``(keys, dirents)`` of ``dir_id``, sorted by ``sort``, without
+    user permission. The result is shared, do not modify it.
+    """
+    key = (repo.store_id, dir_id, sort)
+    listing = _sorted_cache.get(key)
+    if listing is None:
+        dirs, files = get_dir_listing(repo, dir_id)
+        listing = _sort_dirents(dirs + files, sort)
+        _sorted_cache.set(key, listing)
+    return listing
+
+def page_dir_for_user(repo, path, dir_id, username, dir_perm, sort='name',
+                      cursor=None, limit=100, request_type=None):
+    """Return a page of dirents of ``dir_id`` with permission and lock state
+    of ``username``, and the cursor of next page, or None if it is the last
+    page.
+
+    Arguments:
+    - `cursor`: cursor returned with the previous page.
+    - `request_type`: 'f' for files only, 'd' for dirs only.
+    """
+    if is_pro_version():
+        dirs, files = list_dir_for_user(repo, path, dir_id, username,
+                                        dir_perm)
+        keys, dirents = _sort_dirents(dirs + files, sort)
+        overlay = lambda d: d
+    else:
+        keys, dirents = get_sorted_dir_listing(repo, dir_id, sort)
+        overlay = lambda d: _with_perm(d, dir_perm)
+
+    # keys of dirs start with 0 and keys of files with 1
+    start, end = 0, len(keys)
+    if request_type == 'f':
+        start = bisect.bisect_left(keys, (1, ))
+    elif request_type == 'd':
+        end = bisect.bisect_left(keys, (1, ))
+
+    if cursor:
+        start = max(start, bisect.bisect_right(keys,
+                                               decode_cursor(cursor, sort)))
+
+    stop = min(start + limit, end)
+    page = [overlay(d) for d in dirents[start:stop]]
+    next_cursor = encode_cursor(sort, keys[stop - 1]) if stop < end else None
+    return page, next_cursor
+
+def _with_perm(dirent, permission):
+    return Dirent(dirent.obj_name, dirent.obj_id, dirent.mode, dirent.mtime,
+                  dirent.size, permission)
+
+def clear_dir_listing_cache():
+    _cache.clear()
+    _sorted_cache.clear()
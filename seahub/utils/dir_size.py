@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Cache of directory sizes.
+
+Computing the size of a dir walks its whole subtree in seaf-server. The size
+of a dir object is a pure function of ``(store_id, version, dir_id)``, so it
+is kept in the shared cache until it is evicted by the cache backend or
+``DIR_SIZE_CACHE_TIMEOUT`` expires.
+"""
+import logging
+
+from django.core.cache import cache
+
+from seaserv import seafile_api
+
+from seahub.utils.dir_listing import get_dir_listing
+
+try:
+    from seahub.settings import DIR_SIZE_CACHE_TIMEOUT
+except ImportError:
+    DIR_SIZE_CACHE_TIMEOUT = 30 * 24 * 60 * 60
+
+logger = logging.getLogger(__name__)
+
+DIR_SIZE_CACHE_KEY = 'dir_size_%s_%s_%s'
+
+def _cache_key(repo, dir_id):
+    return DIR_SIZE_CACHE_KEY % (repo.store_id, repo.version, dir_id)
+
+def get_dirs_size(repo, dir_ids):
+    """Return a dict of ``dir_id -> size`` of ``dir_ids`` in ``repo``.
+
+    Raises ``SearpcError``.
+    """
+    keys = dict((_cache_key(repo, dir_id), dir_id) for dir_id in set(dir_ids))
+    ret = dict((keys[k], size) for k, size in
+               cache.get_many(keys.keys()).iteritems())
+
+    to_cache = {}
+    for key, dir_id in keys.iteritems():
+        if dir_id in ret:
+            continue
+        size = seafile_api.get_dir_size(repo.store_id, repo.version, dir_id)
+        ret[dir_id] = to_cache[key] = size
+
+    if to_cache:
+        cache.set_many(to_cache, DIR_SIZE_CACHE_TIMEOUT)
+    return ret
+
+def get_dir_size(repo, dir_id):
+    """Return size of dir ``dir_id`` in ``repo``.
+
+    Raises ``SearpcError``.
+    """
+    return get_dirs_size(repo, [dir_id])[dir_id]
+
+def get_dirents_size(repo, parent_dir_id, names):
+    """Return ``(total size, names not found)`` of dirents ``names`` in dir
+    ``parent_dir_id``.
+
+    Raises ``SearpcError``.
+    """
+    dirs, files = get_dir_listing(repo, parent_dir_id)
+    dirents = dict((d.obj_name, d) for d in dirs + files)
+
+    total_size = 0
+    dir_ids = []
+    not_found = []
+    for name in names:
+        d = dirents.get(name)
+        if d is None:
+            not_found.append(name)
+        elif d.is_dir():
+            dir_ids.append(d.obj_id)
+        else:
+            total_size += d.size
+
+    sizes = get_dirs_size(repo, dir_ids)
+    total_size += sum(sizes[dir_id] for dir_id in dir_ids)
+    return total_size, not_found
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Breadth-first walk of the sub dirs of a dir.
+
+Children are listed by the ``dir_id`` found in their parent's listing, so a
+path is never resolved again, and the listings of one level are fetched
+concurrently by a small thread pool.
+"""
+import os
+import json
+import logging
+import threading
+import posixpath
+from itertools import izip
+from multiprocessing.pool import ThreadPool
+
+from pysearpc import SearpcError
+
+from seahub.utils.dir_listing import list_dir_for_user
+
+try:
+    from seahub.settings import DIR_TREE_MAX_NODES
+except ImportError:
+    # Max number of dirs returned by one walk.
+    DIR_TREE_MAX_NODES = 100000
+try:
+    from seahub.settings import DIR_TREE_WORKERS
+except ImportError:
+    # Number of threads listing dirs of a level concurrently.
+    DIR_TREE_WORKERS = 4
+
+logger = logging.getLogger(__name__)
+
+# Thread pool of current process, shared by all walks.
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    global _pool, _pool_pid
+    with _pool_lock:
+        # threads do not survive a fork of a preloaded app
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ThreadPool(DIR_TREE_WORKERS)
+            _pool_pid = os.getpid()
+        return _pool
+
+class DirTreeWalker(object):
+    """Iterate ``(parent_dir, dirent)`` of every sub dir of ``path``, level by
+    level.
+
+    After iteration, ``truncated`` is True if the walk stopped because
+    ``max_nodes`` dirs were returned.
+    """
+    def __init__(self, repo, path, dir_id, username, dir_perm,
+                 max_depth=None, max_nodes=DIR_TREE_MAX_NODES,
+                 workers=DIR_TREE_WORKERS):
+        self.repo = repo
+        self.path = path
+        self.dir_id = dir_id
+        self.username = username
+        self.dir_perm = dir_perm
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.workers = workers
+        self.truncated = False
+
+    def list_sub_dirs(self, node):
+        path, dir_id = node
+        dirs, _ = list_dir_for_user(self.repo, path, dir_id, self.username,
+                                    self.dir_perm)
+        return dirs
+
+    def _iter_sub_dirs(self, level):
+        """Yield listings of dirs of ``level`` in order.
+        """
+        if self.workers <= 1 or len(level) <= 1:
+            for node in level:
+                yield self.list_sub_dirs(node)
+            return
+
+        # The pool is shared and can not be terminated when the walk stops
+        # early, so only a few chunks are listed ahead of the consumer.
+        pool = _get_pool()
+        chunk_size = self.workers * 4
+        for i in range(0, len(level), chunk_size):
+            for dirents in pool.imap(self.list_sub_dirs,
+                                     level[i:i + chunk_size]):
+                yield dirents
+
+    def __iter__(self):
+        level = [(self.path, self.dir_id)]
+        depth = 0
+        num_nodes = 0
+        while level:
+            if self.max_depth is not None and depth >= self.max_depth:
+                return
+
+            next_level = []
+            for (parent_dir, _), dirents in izip(level,
+                                                 self._iter_sub_dirs(level)):
+                for d in dirents:
+                    if self.max_nodes is not None and \
+                       num_nodes >= self.max_nodes:
+                        self.truncated = True
+                        return
+                    num_nodes += 1
+                    yield parent_dir, d
+                    next_level.append(
+                        (posixpath.join(parent_dir, d.obj_name), d.obj_id))
+
+            level = next_level
+            depth += 1
+
+def dir_tree_entry(parent_dir, dirent):
+    return {
+        "type": "dir",
+        "parent_dir": parent_dir,
+        "id": dirent.obj_id,
+        "name": dirent.obj_name,
+        "mtime": dirent.mtime,
+        "permission": dirent.permission,
+    }
+
+def iter_dir_tree_ndjson(walker):
+    """Serialize a walk as newline delimited JSON, one dir per line, and a
+    last ``{"truncated": true}`` line if the walk was truncated, or
+    ``{"error_msg": ...}`` line if it failed.
+    """
+    try:
+        for parent_dir, dirent in walker:
+            yield json.dumps(dir_tree_entry(parent_dir, dirent)) + '\n'
+    except SearpcError as e:
+        logger.error(e)
+        yield json.dumps({"error_msg": "Failed to list dir."}) + '\n'
+        return
+
+    if walker.truncated:
+        yield json.dumps({"truncated": True}) + '\n'
@@ -7,6 +7,19 @@ from seahub.settings import SITE_NAME, MEDIA_URL, LOGO_PATH
 
 MAIL_PRIORITY = PRIORITY        # 'low medium high now'
 
+def render_html_email(dj_template, context):
+    """Render ``dj_template`` with ``context`` and the common email context.
+    """
+    base_context = {
+        'url_base': get_site_scheme_and_netloc(),
+        'site_name': SITE_NAME,
+        'media_url': MEDIA_URL,
+        'logo_path': LOGO_PATH,
+    }
+    context.update(base_context)
+    t = loader.get_template(dj_template)
+    return t.render(Context(context))
+
 def send_html_email_with_dj_template(recipients, subject, dj_template,
                                      context={}, sender=None, template=None,
                                      message='', headers=None,
@@ -21,17 +34,29 @@ def send_html_email_with_dj_template(recipients, subject, dj_template,
     - `context`:
 
     """
-    base_context = {
-        'url_base': get_site_scheme_and_netloc(),
-        'site_name': SITE_NAME,
-        'media_url': MEDIA_URL,
-        'logo_path': LOGO_PATH,
-    }
-    context.update(base_context)
-    t = loader.get_template(dj_template)
-    html_message = t.render(Context(context))
+    html_message = render_html_email(dj_template, context)
 
     mail.send(recipients, sender=sender, template=template, context=context,
               subject=subject, message=message,
               html_message=html_message, headers=headers, priority=priority,
               backend=backend)
+
+def queue_html_emails(emails):
+    """Queue a batch of emails in one query.
+
+    Arguments:
+    - `emails`: list of dicts of keyword arguments of `post_office.mail.send`,
+      priority must not be ``now``.
+    """
+    for email in emails:
+        # Same as `send_html_email`, which sent the HTML as body, instead of
+        # an empty text part with the HTML as alternative.
+        if email.get('html_message') and not email.get('message'):
+            email['message'] = email['html_message']
+    if emails:
+        mail.send_many(emails)
+
+def send_queued_emails():
+    """Deliver emails waiting in the queue.
+    """
+    mail.send_queued()
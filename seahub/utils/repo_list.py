@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Repo listing service used by the api2 repo list endpoint.
+
+Every section (owned, sub, shared, group, public) registers the repo objects
+it gets from seaf-server into one per-request table. Repo ids are deduplicated
+across sections and groups, so owner, permission and metadata of a repo are
+resolved at most once per request, however many groups it is shared to.
+"""
+import logging
+from collections import OrderedDict
+
+import seaserv
+from seaserv import seafile_api
+
+from seahub.utils import is_org_context
+
+logger = logging.getLogger(__name__)
+
+# Upper bound of entries kept in each per-request memo.
+REPO_LIST_MEMO_SIZE = 5000
+
+class BoundedMemo(object):
+    """A small LRU dict with a fixed capacity.
+    """
+    def __init__(self, size=REPO_LIST_MEMO_SIZE):
+        self.size = size
+        self._data = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        try:
+            value = self._data.pop(key)
+        except KeyError:
+            return default
+        self._data[key] = value
+        return value
+
+    def set(self, key, value):
+        self._data.pop(key, None)
+        self._data[key] = value
+        while len(self._data) > self.size:
+            self._data.popitem(last=False)
+
+    def get_or_set(self, key, func):
+        if key in self._data:
+            return self.get(key)
+        value = func()
+        self.set(key, value)
+        return value
+
+def _sort_by_last_modify(repos):
+    repos.sort(lambda x, y: cmp(y.last_modify, x.last_modify))
+    return repos
+
+class RepoList(object):
+    """Collect the repos visible to a user and resolve them in bulk.
+
+    Sections should be loaded in the order they are serialized, owned repos
+    first, so that later sections can reuse what is already known about a
+    repo instead of asking seaf-server again.
+    """
+    def __init__(self, request, memo_size=REPO_LIST_MEMO_SIZE):
+        self.request = request
+        self.username = request.user.username
+        if is_org_context(request):
+            self.org_id = request.user.org.org_id
+        else:
+            self.org_id = None
+
+        self._repos = BoundedMemo(memo_size)
+        self._owners = BoundedMemo(memo_size)
+        self._perms = BoundedMemo(memo_size)
+        self._folder_perms = BoundedMemo(memo_size)
+
+    def _register(self, repo, owner=None, perm=None):
+        self._repos.set(repo.id, repo)
+        if owner is not None:
+            self._owners.set(repo.id, owner)
+        if perm is not None:
+            self._perms.set(repo.id, perm)
+
+    def get_repo(self, repo_id):
+        """Return the repo object, fetching it at most once per request.
+        """
+        return self._repos.get_or_set(
+            repo_id, lambda: seafile_api.get_repo(repo_id))
+
+    def get_owner(self, repo_id):
+        if self.org_id:
+            func = lambda: seafile_api.get_org_repo_owner(repo_id)
+        else:
+            func = lambda: seafile_api.get_repo_owner(repo_id)
+        return self._owners.get_or_set(repo_id, func)
+
+    def get_permission(self, repo_id):
+        """Return repo level permission of the user, same as
+        `seaserv.check_permission`.
+        """
+        return self._perms.get_or_set(
+            repo_id, lambda: seaserv.check_permission(repo_id, self.username))
+
+    def get_folder_permission(self, repo_id):
+        """Return permission of the user on the root of the repo, same as
+        `seahub.views.check_folder_permission(request, repo_id, '/')`.
+        """
+        from seahub.views import check_folder_permission
+        return self._folder_perms.get_or_set(
+            repo_id, lambda: check_folder_permission(self.request, repo_id, '/'))
+
+    def owned(self):
+        """Non-virtual repos owned by the user, newest first.
+        """
+        if self.org_id:
+            repos = seafile_api.get_org_owned_repo_list(
+                self.org_id, self.username, ret_corrupted=True)
+        else:
+            repos = seafile_api.get_owned_repo_list(self.username,
+                                                    ret_corrupted=True)
+
+        ret = []
+        for r in repos:
+            # Owner always has read-write permission to the repo.
+            self._register(r, owner=self.username, perm='rw')
+            if not r.is_virtual:
+                ret.append(r)
+        return _sort_by_last_modify(ret)
+
+    def sub(self):
+        """Virtual repos owned by the user, newest first.
+        """
+        if self.org_id:
+            repos = seaserv.seafserv_threaded_rpc.get_org_virtual_repos_by_owner(
+                self.org_id, self.username)
+        else:
+            repos = seafile_api.get_virtual_repos_by_owner(self.username)
+
+        for r in repos:
+            self._register(r, owner=self.username, perm='rw')
+        return _sort_by_last_modify(repos)
+
+    def shared(self):
+        """Repos shared to the user, newest first. `user_perm` is set on each
+        repo.
+        """
+        if self.org_id:
+            repos = seafile_api.get_org_share_in_repo_list(
+                self.org_id, self.username, -1, -1)
+        else:
+            repos = seafile_api.get_share_in_repo_list(self.username, -1, -1)
+
+        for r in repos:
+            self._owners.set(r.repo_id, r.user)
+            r.user_perm = self.get_folder_permission(r.repo_id)
+        return _sort_by_last_modify(repos)
+
+    def group(self, groups):
+        """Repos shared to `groups`, as a list of ``(group, repo, permission)``
+        tuples, newest first.
+
+        A repo shared to several groups appears once per group, but its
+        metadata and permission are only resolved once.
+        """
+        group_repo_ids = []
+        for grp in groups:
+            if self.org_id:
+                repo_ids = seafile_api.get_org_group_repoids(self.org_id,
+                                                             grp.id)
+            else:
+                repo_ids = seafile_api.get_group_repoids(grp.id)
+            group_repo_ids.append((grp, repo_ids))
+
+        ret = []
+        for grp, repo_ids in group_repo_ids:
+            for repo_id in repo_ids:
+                r = self.get_repo(repo_id)
+                if not r:
+                    continue
+                ret.append((grp, r, self.get_permission(repo_id)))
+
+        ret.sort(lambda x, y: cmp(y[1].last_modify, x[1].last_modify))
+        return ret
+
+    def public(self):
+        """Inner public repos of the organization, or empty list in cloud mode.
+        """
+        if self.org_id:
+            repos = seaserv.list_org_inner_pub_repos(self.org_id,
+                                                     self.username)
+        elif not self.request.cloud_mode:
+            repos = seaserv.list_inner_pub_repos(self.username)
+        else:
+            repos = []
+
+        for r in repos:
+            self._owners.set(r.repo_id, r.user)
+        return repos
@@ -3,8 +3,10 @@ Proxy RPC calls to seafile_api, silence RPC errors, emulating Ruby's
 "method_missing".
 """
 
+import copy
 from functools import partial
 import logging
+import threading
 
 from seaserv import seafile_api
 from pysearpc import SearpcError
@@ -32,3 +34,167 @@ class RPCProxy(object):
 
 
 mute_seafile_api = RPCProxy(mute=True)
+
+
+##### Request scoped memoization of read-only RPC calls.
+#
+# `seafile_api` and friends are thin wrappers around the threaded searpc
+# clients, so memoization is done on the clients: `install_rpc_memo` replaces
+# the listed methods of a client instance with wrappers which consult a
+# thread-local memo while a request is being served (see
+# `seahub.base.middleware.RPCMemoMiddleware`). Outside of a request the
+# wrappers call the server directly.
+
+# Read-only calls whose result can be reused during one request.
+SEAFSERV_MEMO_METHODS = (
+    'get_repo',
+    'get_repo_owner',
+    'get_org_repo_owner',
+    'get_dir_id_by_path',
+    'get_file_id_by_path',
+    'check_permission',
+    'check_permission_by_path',
+    'get_system_default_repo_id',
+)
+
+# Read-only calls of the non-threaded `seafserv_rpc` client, its
+# `set_passwd`/`unset_passwd` invalidate them.
+SEAFSERV_RPC_MEMO_METHODS = (
+    'is_passwd_set',
+)
+
+CCNET_MEMO_METHODS = (
+    'get_group',
+)
+
+# Calls with these prefixes change server state, they drop every memoized
+# result which shares an argument with them, e.g. `post_file(repo_id, ...)`
+# drops `get_dir_id_by_path(repo_id, ...)`. Sharing and membership calls are
+# named after their object, e.g. `group_share_repo`, `group_add_member` and
+# `org_add_share`, so `group_` and `org_` calls invalidate as well; dropping
+# a few results on a read-only one of them is harmless.
+MUTATING_METHOD_PREFIXES = (
+    'add_', 'change_', 'clean_', 'copy_', 'create_', 'del_', 'delete_',
+    'edit_', 'group_', 'lock_', 'move_', 'org_', 'post_', 'put_', 'quit_',
+    'remove_', 'rename_', 'reset_', 'restore_', 'revert_', 'set_', 'share_',
+    'transfer_', 'unlock_', 'unset_', 'unshare_', 'update_',
+)
+
+_local = threading.local()
+
+class RPCMemo(object):
+    """Results of read-only RPC calls made during one request.
+    """
+    def __init__(self):
+        self._results = {}
+        # argument value -> keys of memoized calls using that argument
+        self._arg_index = {}
+
+    def _make_key(self, name, args, kwargs):
+        return (name, args, tuple(sorted(kwargs.items())))
+
+    def get(self, name, args, kwargs):
+        """Return ``(found, result)`` of a memoized call.
+        """
+        try:
+            key = self._make_key(name, args, kwargs)
+            hash(key)
+        except TypeError:
+            return False, None
+
+        if key not in self._results:
+            return False, None
+        return True, copy.copy(self._results[key])
+
+    def set(self, name, args, kwargs, result):
+        try:
+            key = self._make_key(name, args, kwargs)
+            hash(key)
+        except TypeError:
+            return
+
+        self._results[key] = copy.copy(result)
+        for arg in args:
+            self._arg_index.setdefault(arg, set()).add(key)
+
+    def invalidate(self, args):
+        """Drop memoized calls which share an argument with `args`.
+        """
+        for arg in args:
+            try:
+                keys = self._arg_index.pop(arg, ())
+            except TypeError:
+                continue
+            for key in keys:
+                self._results.pop(key, None)
+
+    def clear(self):
+        self._results.clear()
+        self._arg_index.clear()
+
+def get_rpc_memo():
+    """Return the memo of current request, or ``None`` outside of a request.
+    """
+    return getattr(_local, 'memo', None)
+
+def start_rpc_memo():
+    _local.memo = RPCMemo()
+
+def end_rpc_memo():
+    _local.memo = None
+
+def _is_mutating(name):
+    return name.startswith(MUTATING_METHOD_PREFIXES)
+
+def _memoized(name, real_func, key_name):
+    def wrapper(*args, **kwargs):
+        memo = get_rpc_memo()
+        if memo is None:
+            return real_func(*args, **kwargs)
+
+        found, result = memo.get(key_name, args, kwargs)
+        if found:
+            return result
+
+        result = real_func(*args, **kwargs)
+        memo.set(key_name, args, kwargs, result)
+        return result
+    wrapper.__name__ = name
+    return wrapper
+
+def _invalidating(name, real_func):
+    def wrapper(*args, **kwargs):
+        memo = get_rpc_memo()
+        if memo is not None:
+            memo.invalidate(args)
+        try:
+            return real_func(*args, **kwargs)
+        finally:
+            if memo is not None:
+                # drop results fetched while the call was in flight as well
+                memo.invalidate(args)
+    wrapper.__name__ = name
+    return wrapper
+
+def install_rpc_memo(client, methods):
+    """Memoize read-only `methods` of searpc `client`, and make its mutating
+    methods invalidate memoized results. Installing twice is a no-op.
+    """
+    if getattr(client, '_rpc_memo_installed', False):
+        return
+
+    for name in dir(type(client)):
+        if name.startswith('_'):
+            continue
+        real_func = getattr(client, name)
+        if not callable(real_func):
+            continue
+
+        if name in methods:
+            # clients may have methods of the same name
+            key_name = '%s.%s' % (type(client).__name__, name)
+            setattr(client, name, _memoized(name, real_func, key_name))
+        elif _is_mutating(name):
+            setattr(client, name, _invalidating(name, real_func))
+
+    client._rpc_memo_installed = True
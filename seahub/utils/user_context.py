@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Short-lived per-user cache of group and org membership, used to populate
+``request.user`` in `seahub.base.middleware.BaseMiddleware`.
+
+Entries are dropped by the group membership signals in
+`seahub.group.signals`. Changes which concern every member of a group (rename,
+dismiss) bump a global version instead, which invalidates all entries.
+"""
+import logging
+
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject, new_method_proxy
+
+import seaserv
+
+try:
+    from seahub.settings import USER_CONTEXT_CACHE_TIMEOUT
+except ImportError:
+    USER_CONTEXT_CACHE_TIMEOUT = 2 * 60
+
+logger = logging.getLogger(__name__)
+
+USER_GROUPS_CACHE_KEY = 'user_ctx_groups_%s'
+USER_ORGS_CACHE_KEY = 'user_ctx_orgs_%s'
+USER_CONTEXT_VERSION_KEY = 'user_ctx_version'
+
+# Attributes kept in cached copies of ccnet objects.
+CACHED_ORG_ATTRS = ('org_id', 'org_name', 'url_prefix', 'creator', 'ctime',
+                    'is_staff')
+CACHED_GROUP_ATTRS = ('id', 'group_name', 'creator_name', 'timestamp',
+                      'source', 'parent_group_id')
+
+class CachedObject(object):
+    """Picklable copy of the attributes of a ccnet object.
+    """
+    attrs = ()
+
+    def __init__(self, obj):
+        for attr in self.attrs:
+            setattr(self, attr, getattr(obj, attr, None))
+        # for compatibility with ``obj.props.xxx``
+        self.props = self
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['props']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.props = self
+
+class CachedOrg(CachedObject):
+    attrs = CACHED_ORG_ATTRS
+
+class CachedGroup(CachedObject):
+    attrs = CACHED_GROUP_ATTRS
+
+class LazyList(SimpleLazyObject):
+    """A list which is only computed when first used.
+    """
+    __iter__ = new_method_proxy(iter)
+
+def _get_version():
+    version = cache.get(USER_CONTEXT_VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(USER_CONTEXT_VERSION_KEY, version, None)
+    return version
+
+def get_user_orgs(username):
+    """Return orgs of ``username``, same as `seaserv.get_orgs_by_user`.
+    """
+    key = USER_ORGS_CACHE_KEY % username
+    orgs = cache.get(key)
+    if orgs is None:
+        orgs = [CachedOrg(o) for o in seaserv.get_orgs_by_user(username)]
+        cache.set(key, orgs, USER_CONTEXT_CACHE_TIMEOUT)
+    return orgs
+
+def get_user_groups(username, org_id=None):
+    """Return groups ``username`` joined in org ``org_id``, or personal
+    groups if ``org_id`` is None.
+    """
+    key = USER_GROUPS_CACHE_KEY % username
+    version = _get_version()
+    entry = cache.get(key)
+    if entry is not None and entry[:2] == (version, org_id):
+        return entry[2]
+
+    if org_id:
+        groups = seaserv.get_org_groups_by_user(org_id, username)
+    else:
+        groups = seaserv.get_personal_groups_by_user(username)
+    groups = [CachedGroup(g) for g in groups]
+    cache.set(key, (version, org_id, groups), USER_CONTEXT_CACHE_TIMEOUT)
+    return groups
+
+def clear_user_context_cache(usernames):
+    """Drop cached groups and orgs of ``usernames``.
+    """
+    keys = []
+    for username in usernames:
+        keys.append(USER_ORGS_CACHE_KEY % username)
+        keys.append(USER_GROUPS_CACHE_KEY % username)
+    cache.delete_many(keys)
+
+def clear_all_user_context_cache():
+    """Invalidate cached groups of every user.
+    """
+    try:
+        cache.incr(USER_CONTEXT_VERSION_KEY)
+    except ValueError:
+        cache.set(USER_CONTEXT_VERSION_KEY, 2, None)
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Batch lookup of nickname, contact email and avatar of users, for list
+endpoints which show many users at once.
+
+Avatar urls share the cache keys of `api_avatar_url`, so they stay consistent
+with the single-user helpers and are invalidated with them.
+"""
+import logging
+
+from django.core.cache import cache
+
+from seahub.avatar.settings import AVATAR_DEFAULT_SIZE, AVATAR_CACHE_TIMEOUT
+from seahub.avatar.util import get_cache_key, get_default_avatar_url, \
+    cached_funcs
+from seahub.profile.models import Profile
+
+logger = logging.getLogger(__name__)
+
+# prefix of cache keys of `seahub.avatar.templatetags.avatar_tags.api_avatar_url`
+API_AVATAR_URL_PREFIX = 'api_avatar_url'
+
+def _get_avatar_urls(emails, avatar_size):
+    """Return a dict of ``email -> (url, is_default, date_uploaded)``, same
+    as `api_avatar_url`, with one query for avatars not in cache.
+    """
+    from seahub.avatar.models import Avatar
+
+    cached_funcs.add(API_AVATAR_URL_PREFIX)
+    keys = dict((get_cache_key(e, avatar_size, API_AVATAR_URL_PREFIX), e)
+                for e in emails)
+    ret = dict((keys[k], v) for k, v in cache.get_many(keys.keys()).iteritems()
+               if v)
+
+    missing = [e for e in emails if e not in ret]
+    if not missing:
+        return ret
+
+    # `Avatar.emailuser` is lower-cased, match it case-insensitively both in
+    # the query and in the lookup below
+    query_emails = set(missing) | set(e.lower() for e in missing)
+    avatars = {}
+    for avatar in Avatar.objects.filter(emailuser__in=query_emails,
+                                        primary=1):
+        avatars.setdefault(avatar.emailuser.lower(), avatar)
+
+    to_cache = {}
+    for email in missing:
+        avatar = avatars.get(email.lower())
+        if avatar is None:
+            ret[email] = (get_default_avatar_url(), True, None)
+        else:
+            try:
+                if not avatar.thumbnail_exists(avatar_size):
+                    avatar.create_thumbnail(avatar_size)
+                ret[email] = (avatar.avatar_url(avatar_size), False,
+                              avatar.date_uploaded)
+            except Exception as e:
+                # Catch exceptions to avoid 500 errors, and do not cache.
+                logger.error(e)
+                ret[email] = (get_default_avatar_url(), True, None)
+                continue
+        key = get_cache_key(email, avatar_size, API_AVATAR_URL_PREFIX)
+        to_cache[key] = ret[email]
+    cache.set_many(to_cache, AVATAR_CACHE_TIMEOUT)
+    return ret
+
+def get_user_infos(emails, avatar_size=AVATAR_DEFAULT_SIZE):
+    """Return a dict of ``email -> info`` of ``emails``, where info has the
+    same keys as `seahub.api2.utils.get_user_common_info`, plus
+    ``contact_email``, ``avatar_is_default`` and ``avatar_date_uploaded``.
+
+    Profiles and avatars are read with one query each, and cached avatar
+    urls with one cache round-trip.
+    """
+    emails = list(set(e for e in emails if e))
+    if not emails:
+        return {}
+
+    profiles = dict((p.user, p) for p in
+                    Profile.objects.filter(user__in=emails))
+    avatars = _get_avatar_urls(emails, avatar_size)
+
+    ret = {}
+    for email in emails:
+        p = profiles.get(email)
+        if p is not None and p.nickname and p.nickname.strip():
+            nickname = p.nickname.strip()
+        else:
+            nickname = email.split('@')[0]
+
+        avatar_url, is_default, date_uploaded = avatars[email]
+        ret[email] = {
+            "email": email,
+            "name": nickname,
+            "contact_email": p.contact_email if p and p.contact_email else email,
+            "login_id": p.login_id if p and p.login_id else '',
+            "avatar_url": avatar_url,
+            "avatar_is_default": is_default,
+            "avatar_date_uploaded": date_uploaded,
+        }
+    return ret
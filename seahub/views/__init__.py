@@ -17,7 +17,7 @@ from django.http import HttpResponse, HttpResponseBadRequest, Http404, \
 from django.shortcuts import render_to_response, redirect
 from django.template import RequestContext
 from django.utils import timezone
-from django.utils.http import urlquote
+from django.utils.http import urlquote, RFC3986_SUBDELIMS
 from django.utils.html import escape
 from django.utils.translation import ugettext as _
 from django.views.decorators.http import condition
@@ -53,6 +53,8 @@ from seahub.utils import render_permission_error, render_error, list_to_string,
     user_traffic_over_limit, send_perm_audit_msg, get_origin_repo_info, \
     get_max_upload_file_size, is_pro_version, FILE_AUDIT_ENABLED, \
     is_org_repo_creation_allowed
+from seahub.utils.commit_diff import get_commit_diff
+from seahub.utils.dir_size import get_dir_size
 from seahub.utils.paginator import get_page_range
 from seahub.utils.star import get_dir_starred_files
 from seahub.utils.timeutils import utc_to_local
@@ -178,6 +180,42 @@ def get_file_download_link(repo_id, obj_id, path):
     return reverse('download_file', args=[repo_id, obj_id]) + '?p=' + \
         urlquote(path)
 
+# Max number of paths in one ``IN`` query, SQLite allows 999 variables.
+DIR_LINKS_BATCH_SIZE = 500
+
+def get_dir_links(username, repo_id, paths):
+    """Return share links and upload links created by ``username`` on
+    ``paths``, as two dicts keyed by path. Dir paths end with '/'.
+    """
+    fileshares = {}
+    uploadlinks = {}
+    paths = list(paths)
+    for i in range(0, len(paths), DIR_LINKS_BATCH_SIZE):
+        batch = paths[i:i + DIR_LINKS_BATCH_SIZE]
+        for share in FileShare.objects.filter(repo_id=repo_id,
+                                              username=username,
+                                              path__in=batch):
+            # keep the first one as before, if there are duplicated links
+            fileshares.setdefault(share.path, share)
+
+        dir_paths = [p for p in batch if p.endswith('/')]
+        if not dir_paths:
+            continue
+        for link in UploadLinkShare.objects.filter(repo_id=repo_id,
+                                                   username=username,
+                                                   path__in=dir_paths):
+            uploadlinks.setdefault(link.path, link)
+
+    return fileshares, uploadlinks
+
+def _dirent_path(path, dirent):
+    """Return path of ``dirent`` in dir ``path``, as used by share links.
+    """
+    dirent_path = posixpath.join(path, dirent.obj_name)
+    if stat.S_ISDIR(dirent.props.mode) and dirent_path[-1] != '/':
+        dirent_path += '/'
+    return dirent_path
+
 def get_repo_dirents(request, repo, commit, path, offset=-1, limit=-1):
     """List repo dirents based on commit id and path. Use ``offset`` and
     ``limit`` to do paginating.
@@ -209,13 +247,15 @@ def get_repo_dirents(request, repo, commit, path, offset=-1, limit=-1):
 
         username = request.user.username
         starred_files = get_dir_starred_files(username, repo.id, path)
-        fileshares = FileShare.objects.filter(repo_id=repo.id).filter(username=username)
-        uploadlinks = UploadLinkShare.objects.filter(repo_id=repo.id).filter(username=username)
-
+        fileshares, uploadlinks = get_dir_links(
+            username, repo.id, [_dirent_path(path, d) for d in dirs])
 
         view_dir_base = reverse("view_common_lib_dir", args=[repo.id, ''])
         dl_dir_base = reverse('repo_download_dir', args=[repo.id])
         file_history_base = reverse('file_revisions', args=[repo.id])
+        view_file_base = reverse('view_lib_file', args=[repo.id, ''])
+        dl_file_pattern = reverse('download_file', args=[repo.id, EMPTY_SHA1]
+                                  ).replace(EMPTY_SHA1, '%s', 1)
         for dirent in dirs:
             dirent.last_modified = dirent.mtime
             dirent.sharelink = ''
@@ -224,16 +264,14 @@ def get_repo_dirents(request, repo, commit, path, offset=-1, limit=-1):
                 dpath = posixpath.join(path, dirent.obj_name)
                 if dpath[-1] != '/':
                     dpath += '/'
-                for share in fileshares:
-                    if dpath == share.path:
-                        dirent.sharelink = gen_dir_share_link(share.token)
-                        dirent.sharetoken = share.token
-                        break
-                for link in uploadlinks:
-                    if dpath == link.path:
-                        dirent.uploadlink = gen_shared_upload_link(link.token)
-                        dirent.uploadtoken = link.token
-                        break
+                share = fileshares.get(dpath)
+                if share is not None:
+                    dirent.sharelink = gen_dir_share_link(share.token)
+                    dirent.sharetoken = share.token
+                link = uploadlinks.get(dpath)
+                if link is not None:
+                    dirent.uploadlink = gen_shared_upload_link(link.token)
+                    dirent.uploadtoken = link.token
                 p_dpath = posixpath.join(path, dirent.obj_name)
                 dirent.view_link = view_dir_base + '?p=' + urlquote(p_dpath)
                 dirent.dl_link = dl_dir_base + '?p=' + urlquote(p_dpath)
@@ -247,17 +285,19 @@ def get_repo_dirents(request, repo, commit, path, offset=-1, limit=-1):
                 dirent.starred = False
                 fpath = posixpath.join(path, dirent.obj_name)
                 p_fpath = posixpath.join(path, dirent.obj_name)
-                dirent.view_link = reverse('view_lib_file', args=[repo.id, p_fpath])
-                dirent.dl_link = get_file_download_link(repo.id, dirent.obj_id,
-                                                        p_fpath)
+                # same as reverse('view_lib_file', args=[repo.id, p_fpath])
+                dirent.view_link = view_file_base + urlquote(
+                    p_fpath, safe=RFC3986_SUBDELIMS + '/~:@')
+                # same as get_file_download_link()
+                dirent.dl_link = dl_file_pattern % dirent.obj_id + '?p=' + \
+                    urlquote(p_fpath)
                 dirent.history_link = file_history_base + '?p=' + urlquote(p_fpath)
                 if fpath in starred_files:
                     dirent.starred = True
-                for share in fileshares:
-                    if fpath == share.path:
-                        dirent.sharelink = gen_file_share_link(share.token)
-                        dirent.sharetoken = share.token
-                        break
+                share = fileshares.get(fpath)
+                if share is not None:
+                    dirent.sharelink = gen_file_share_link(share.token)
+                    dirent.sharetoken = share.token
 
         return (file_list, dir_list, dirent_more)
 
@@ -697,7 +737,7 @@ def get_diff(repo_id, arg1, arg2):
     lists = {'new': [], 'removed': [], 'renamed': [], 'modified': [],
              'newdir': [], 'deldir': []}
 
-    diff_result = seafserv_threaded_rpc.get_diff(repo_id, arg1, arg2)
+    diff_result = get_commit_diff(repo_id, arg1, arg2)
     if not diff_result:
         return lists
 
@@ -1193,8 +1233,7 @@ def repo_download_dir(request, repo_id):
         dir_id = seafile_api.get_dir_id_by_commit_and_path(repo.id,
             repo.head_cmmt_id, path)
         try:
-            total_size = seafile_api.get_dir_size(repo.store_id,
-                repo.version, dir_id)
+            total_size = get_dir_size(repo, dir_id)
         except Exception, e:
             logger.error(str(e))
             return render_error(request, _(u'Internal Error'))
@@ -1257,7 +1296,7 @@ def convert_cmmt_desc_link(request):
     if check_folder_permission(request, repo_id, '/') is None:
         raise Http404
 
-    diff_result = seafserv_threaded_rpc.get_diff(repo_id, '', cmmt_id)
+    diff_result = get_commit_diff(repo_id, '', cmmt_id)
     if not diff_result:
         raise Http404
 
@@ -45,10 +45,11 @@ from seahub.views.modules import get_enabled_mods_by_group, \
     disable_mod_for_group, MOD_GROUP_WIKI, MOD_PERSONAL_WIKI, \
     enable_mod_for_user, disable_mod_for_user
 from seahub.group.views import is_group_staff
+from seahub.group.signals import group_members_changed
 from seahub.group.utils import is_group_member, is_group_admin_or_owner, \
     get_group_member_info
 import seahub.settings as settings
-from seahub.settings import ENABLE_THUMBNAIL, THUMBNAIL_ROOT, \
+from seahub.settings import ENABLE_THUMBNAIL, \
     THUMBNAIL_DEFAULT_SIZE, ENABLE_SUB_LIBRARY, \
     ENABLE_FOLDER_PERM, SHOW_TRAFFIC, MEDIA_URL
 from constance import config
@@ -59,9 +60,11 @@ from seahub.utils import check_filename_with_rename, EMPTY_SHA1, \
     get_org_user_events, get_user_events, get_file_type_and_ext, \
     is_valid_username, send_perm_audit_msg, get_origin_repo_info, is_pro_version
 from seahub.utils.repo import get_sub_repo_abbrev_origin_path
+from seahub.utils.dir_listing import list_dir_for_user
 from seahub.utils.star import star_file, unstar_file, get_dir_starred_files
 from seahub.base.accounts import User
-from seahub.thumbnail.utils import get_thumbnail_src
+from seahub.thumbnail.utils import get_thumbnail_src, thumbnail_exists
+from seahub.thumbnail.jobs import queue_thumbnail
 from seahub.utils.file_types import IMAGE
 from seahub.base.templatetags.seahub_tags import translate_seahub_time, \
         file_icon_filter, email2nickname, tsstr_sec
@@ -276,9 +279,6 @@ def list_lib_dir(request, repo_id):
         return HttpResponse(json.dumps({'error': err_msg}),
                             status=500, content_type=content_type)
 
-    dir_list = []
-    file_list = []
-
     try:
         dir_id = seafile_api.get_dir_id_by_path(repo.id, path)
     except SearpcError as e:
@@ -292,30 +292,21 @@ def list_lib_dir(request, repo_id):
         return HttpResponse(json.dumps({'error': err_msg}),
                             status=404, content_type=content_type)
 
-    dirs = seafserv_threaded_rpc.list_dir_with_perm(repo_id, path, dir_id,
-            username, -1, -1)
+    dir_list, file_list = list_dir_for_user(repo, path, dir_id, username,
+                                            user_perm)
     starred_files = get_dir_starred_files(username, repo_id, path)
 
-    for dirent in dirs:
+    for dirent in dir_list:
         dirent.last_modified = dirent.mtime
-        if stat.S_ISDIR(dirent.mode):
-            dpath = posixpath.join(path, dirent.obj_name)
-            if dpath[-1] != '/':
-                dpath += '/'
-            dir_list.append(dirent)
-        else:
-            if repo.version == 0:
-                file_size = seafile_api.get_file_size(repo.store_id, repo.version, dirent.obj_id)
-            else:
-                file_size = dirent.size
-            dirent.file_size = file_size if file_size else 0
 
-            dirent.starred = False
-            fpath = posixpath.join(path, dirent.obj_name)
-            if fpath in starred_files:
-                dirent.starred = True
+    for dirent in file_list:
+        dirent.last_modified = dirent.mtime
+        dirent.file_size = dirent.size if dirent.size else 0
 
-            file_list.append(dirent)
+        dirent.starred = False
+        fpath = posixpath.join(path, dirent.obj_name)
+        if fpath in starred_files:
+            dirent.starred = True
 
     if is_org_context(request):
         repo_owner = seafile_api.get_org_repo_owner(repo.id)
@@ -356,11 +347,14 @@ def list_lib_dir(request, repo_id):
         file_type, file_ext = get_file_type_and_ext(f.obj_name)
         if file_type == IMAGE:
             f_['is_img'] = True
-            if not repo.encrypted and ENABLE_THUMBNAIL and \
-                os.path.exists(os.path.join(THUMBNAIL_ROOT, str(size), f.obj_id)):
-                file_path = posixpath.join(path, f.obj_name)
-                src = get_thumbnail_src(repo_id, size, file_path)
-                f_['encoded_thumbnail_src'] = urlquote(src)
+            if not repo.encrypted and ENABLE_THUMBNAIL:
+                if thumbnail_exists(size, f.obj_id):
+                    file_path = posixpath.join(path, f.obj_name)
+                    src = get_thumbnail_src(repo_id, size, file_path)
+                    f_['encoded_thumbnail_src'] = urlquote(src)
+                else:
+                    # make it before the browser asks for it
+                    queue_thumbnail(repo_id, f.obj_id, f.obj_name, size)
 
         if is_pro_version():
             f_['is_locked'] = True if f.is_locked else False
@@ -1289,7 +1283,8 @@ def upload_file_done(request):
         return HttpResponse(json.dumps(result), status=400, content_type=ct)
 
     # a few checkings
-    if not seafile_api.get_repo(repo_id):
+    repo = seafile_api.get_repo(repo_id)
+    if not repo:
         result['error'] = _('Wrong repo id')
         return HttpResponse(json.dumps(result), status=400, content_type=ct)
 
@@ -1298,10 +1293,15 @@ def upload_file_done(request):
         owner = seafile_api.get_org_repo_owner(repo_id)
 
     file_path = path.rstrip('/') + '/' + filename
-    if seafile_api.get_file_id_by_path(repo_id, file_path) is None:
+    file_id = seafile_api.get_file_id_by_path(repo_id, file_path)
+    if file_id is None:
         result['error'] = _('File does not exist')
         return HttpResponse(json.dumps(result), status=400, content_type=ct)
 
+    file_type, file_ext = get_file_type_and_ext(filename)
+    if ENABLE_THUMBNAIL and not repo.encrypted and file_type == IMAGE:
+        queue_thumbnail(repo_id, file_id, filename, THUMBNAIL_DEFAULT_SIZE)
+
     # send singal
     upload_file_successful.send(sender=None,
                                 repo_id=repo_id,
@@ -2534,6 +2534,8 @@ def ajax_group_members_import(request, group_id):
         try:
             seaserv.ccnet_threaded_rpc.group_add_member(group_id,
                 username, email)
+            group_members_changed.send(sender=None, group_id=group_id,
+                                       usernames=[email])
             member_info = get_group_member_info(request, group_id, email)
             result['success'].append(member_info)
         except SearpcError as e:
@@ -28,10 +28,12 @@ from seahub.utils import gen_file_upload_url, gen_dir_share_link, \
     get_file_type_and_ext
 from seahub.settings import ENABLE_UPLOAD_FOLDER, \
     ENABLE_RESUMABLE_FILEUPLOAD, ENABLE_THUMBNAIL, \
-    THUMBNAIL_ROOT, THUMBNAIL_DEFAULT_SIZE, THUMBNAIL_SIZE_FOR_GRID
+    THUMBNAIL_DEFAULT_SIZE, THUMBNAIL_SIZE_FOR_GRID
 from seahub.utils import gen_file_get_url
+from seahub.utils.dir_size import get_dir_size
 from seahub.utils.file_types import IMAGE
-from seahub.thumbnail.utils import get_share_link_thumbnail_src
+from seahub.thumbnail.utils import get_share_link_thumbnail_src, \
+    thumbnail_exists
 
 # Get an instance of a logger
 logger = logging.getLogger(__name__)
@@ -176,8 +178,7 @@ def _download_dir_from_share_link(request, fileshare, repo, real_path):
             request, _(u'Unable to download: folder not found.'))
 
     try:
-        total_size = seaserv.seafserv_threaded_rpc.get_dir_size(
-            repo.store_id, repo.version, dir_id)
+        total_size = get_dir_size(repo, dir_id)
     except Exception as e:
         logger.error(str(e))
         return render_error(request, _(u'Internal Error'))
@@ -273,7 +274,7 @@ def view_shared_dir(request, fileshare):
             file_type, file_ext = get_file_type_and_ext(f.obj_name)
             if file_type == IMAGE:
                 f.is_img = True
-                if os.path.exists(os.path.join(THUMBNAIL_ROOT, str(thumbnail_size), f.obj_id)):
+                if thumbnail_exists(thumbnail_size, f.obj_id):
                     req_image_path = posixpath.join(req_path, f.obj_name)
                     src = get_share_link_thumbnail_src(token, thumbnail_size, req_image_path)
                     f.encoded_thumbnail_src = urlquote(src)
@@ -39,6 +39,7 @@ from seahub.utils import IS_EMAIL_CONFIGURED, string2list, is_valid_username, \
     clear_token, gen_file_get_url, is_org_context, handle_virus_record, \
     get_virus_record_by_id, get_virus_record, FILE_AUDIT_ENABLED, \
     get_max_upload_file_size
+from seahub.utils.dir_size import get_dir_size
 from seahub.utils.file_size import get_file_size_unit
 from seahub.utils.rpc import mute_seafile_api
 from seahub.utils.licenseparse import parse_license
@@ -585,7 +586,7 @@ def user_info(request, email):
                     path += '/'
                 # get dir size
                 dir_id = seafile_api.get_dir_id_by_commit_and_path(r.id, r.head_cmmt_id, path)
-                fs.dir_size = seafile_api.get_dir_size(r.store_id, r.version, dir_id)
+                fs.dir_size = get_dir_size(r, dir_id)
 
             fs.is_download = True
             p_fileshares.append(fs)
@@ -782,9 +782,15 @@ CREATE TABLE `notifications_usernotification` (
   `detail` longtext NOT NULL,
   `timestamp` datetime NOT NULL,
   `seen` tinyint(1) NOT NULL,
+  `group_id` int(11) DEFAULT NULL,
+  `repo_id` varchar(36) DEFAULT NULL,
+  `msg_from` varchar(255) DEFAULT NULL,
   PRIMARY KEY (`id`),
   KEY `notifications_usernotification_86899d6f` (`to_user`),
-  KEY `notifications_usernotification_486af403` (`msg_type`)
+  KEY `notifications_usernotification_486af403` (`msg_type`),
+  KEY `notifications_usernotification_0e939a4f` (`group_id`),
+  KEY `notifications_usernotification_9a8c79bf` (`repo_id`),
+  KEY `notifications_usernotification_b2c9d2a2` (`msg_from`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -35,7 +35,7 @@ CREATE TABLE "message_usermessage" ("message_id" integer NOT NULL PRIMARY KEY AU
 CREATE TABLE "message_usermsglastcheck" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "check_time" datetime NOT NULL);
 CREATE TABLE "message_usermsgattachment" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "user_msg_id" integer NOT NULL REFERENCES "message_usermessage" ("message_id"), "priv_file_dir_share_id" integer NULL REFERENCES "share_privatefiledirshare" ("id"));
 CREATE TABLE "notifications_notification" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "message" varchar(512) NOT NULL, "primary" bool NOT NULL);
-CREATE TABLE "notifications_usernotification" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "to_user" varchar(255) NOT NULL, "msg_type" varchar(30) NOT NULL, "detail" text NOT NULL, "timestamp" datetime NOT NULL, "seen" bool NOT NULL);
+CREATE TABLE "notifications_usernotification" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "to_user" varchar(255) NOT NULL, "msg_type" varchar(30) NOT NULL, "detail" text NOT NULL, "timestamp" datetime NOT NULL, "seen" bool NOT NULL, "group_id" integer NULL, "repo_id" varchar(36) NULL, "msg_from" varchar(255) NULL);
 CREATE TABLE "options_useroptions" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "email" varchar(255) NOT NULL, "option_key" varchar(50) NOT NULL, "option_val" varchar(50) NOT NULL);
 CREATE TABLE "profile_profile" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "user" varchar(254) NOT NULL UNIQUE, "nickname" varchar(64) NOT NULL, "intro" text NOT NULL, "lang_code" text NULL, "login_id" varchar(225) NULL UNIQUE, "contact_email" varchar(225) NULL, "institution" varchar(225) NULL);
 CREATE TABLE "profile_detailedprofile" ("id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, "user" varchar(255) NOT NULL, "department" varchar(512) NOT NULL, "telephone" varchar(100) NOT NULL);
@@ -129,6 +129,9 @@ CREATE INDEX "message_usermsgattachment_728fbd7e" ON "message_usermsgattachment"
 CREATE INDEX "message_usermsgattachment_4b5c5c38" ON "message_usermsgattachment" ("priv_file_dir_share_id");
 CREATE INDEX "notifications_usernotification_86899d6f" ON "notifications_usernotification" ("to_user");
 CREATE INDEX "notifications_usernotification_486af403" ON "notifications_usernotification" ("msg_type");
+CREATE INDEX "notifications_usernotification_0e939a4f" ON "notifications_usernotification" ("group_id");
+CREATE INDEX "notifications_usernotification_9a8c79bf" ON "notifications_usernotification" ("repo_id");
+CREATE INDEX "notifications_usernotification_b2c9d2a2" ON "notifications_usernotification" ("msg_from");
 CREATE INDEX "options_useroptions_0c83f57c" ON "options_useroptions" ("email");
 CREATE INDEX "profile_profile_b9973d8c" ON "profile_profile" ("contact_email");
 CREATE INDEX "profile_profile_955bfff7" ON "profile_profile" ("institution");
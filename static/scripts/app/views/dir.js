@@ -270,6 +270,34 @@ define([
                 if (this.view_mode == 'grid') {
                     thumbnail_size = app.pageOptions.thumbnail_size_for_grid;
                 }
+                // thumbnail is being made in background, check it later
+                var poll_thumbnail = function(img, img_path, delay) {
+                    setTimeout(function() {
+                        // cur path may be changed
+                        if (_this.dir.repo_id != repo_id ||
+                            _this.dir.path != cur_path) {
+                            return;
+                        }
+                        $.ajax({
+                            url: Common.getUrl({name: 'thumbnail_status', repo_id: repo_id}),
+                            data: {
+                                'path': img_path,
+                                'size': thumbnail_size
+                            },
+                            cache: false,
+                            dataType: 'json',
+                            success: function(data) {
+                                if (data.status == 'done') {
+                                    img.set({
+                                        'encoded_thumbnail_src': data.encoded_thumbnail_src
+                                    });
+                                } else if (data.status == 'pending') {
+                                    poll_thumbnail(img, img_path, Math.min(delay * 2, 10000));
+                                }
+                            }
+                        });
+                    }, delay);
+                };
                 var get_thumbnail = function(i) {
                     var cur_img = images_with_no_thumbnail[i];
                     var cur_img_path = Common.pathJoin([cur_path, cur_img.get('obj_name')]);
@@ -281,10 +309,14 @@ define([
                         },
                         cache: false,
                         dataType: 'json',
-                        success: function(data) {
-                            cur_img.set({
-                                'encoded_thumbnail_src': data.encoded_thumbnail_src
-                            });
+                        success: function(data, textStatus, xhr) {
+                            if (xhr.status == 202) {
+                                poll_thumbnail(cur_img, cur_img_path, 1000);
+                            } else {
+                                cur_img.set({
+                                    'encoded_thumbnail_src': data.encoded_thumbnail_src
+                                });
+                            }
                         },
                         complete: function() {
                             // cur path may be changed. e.g., the user enter another directory
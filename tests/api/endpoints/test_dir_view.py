@@ -49,6 +49,77 @@ class FileViewTest(BaseTestCase):
         assert json_resp[0]['type'] == 'dir'
         assert json_resp[0]['name'] == self.folder_name
 
+    def test_not_modified_if_etag_matches(self):
+        self.login_as(self.user)
+        resp = self.client.get(self.url)
+        self.assertEqual(200, resp.status_code)
+        etag = resp['ETag']
+
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, resp.status_code)
+        assert resp['ETag'] == etag
+        assert resp['oid'] == seafile_api.get_dir_id_by_path(self.repo_id, '/')
+
+    def test_etag_changes_with_dir(self):
+        self.login_as(self.user)
+        resp = self.client.get(self.url)
+        etag = resp['ETag']
+
+        self.create_folder(repo_id=self.repo_id, parent_dir='/',
+                           dirname='new-folder', username=self.user.username)
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, resp.status_code)
+        assert resp['ETag'] != etag
+
+    def test_can_get_dir_by_page(self):
+        self.login_as(self.user)
+        self.create_file(repo_id=self.repo_id, parent_dir='/',
+                         filename='a.md', username=self.user.username)
+
+        resp = self.client.get(self.url + '?limit=1')
+        self.assertEqual(200, resp.status_code)
+        json_resp = json.loads(''.join(resp.streaming_content))
+        assert len(json_resp) == 1
+        assert json_resp[0]['name'] == self.folder_name
+
+        resp = self.client.get(self.url + '?limit=1&cursor=' + resp['next_cursor'])
+        json_resp = json.loads(''.join(resp.streaming_content))
+        assert len(json_resp) == 1
+        assert json_resp[0]['type'] == 'file'
+
+    def test_get_dir_by_page_with_invalid_args(self):
+        self.login_as(self.user)
+        resp = self.client.get(self.url + '?limit=0')
+        self.assertEqual(400, resp.status_code)
+
+        resp = self.client.get(self.url + '?limit=1&sort=foo')
+        self.assertEqual(400, resp.status_code)
+
+        resp = self.client.get(self.url + '?limit=1&cursor=foo')
+        self.assertEqual(400, resp.status_code)
+
+    def test_can_stream_dir_tree(self):
+        self.login_as(self.user)
+        self.create_folder(repo_id=self.repo_id, parent_dir=self.folder_path,
+                           dirname='sub', username=self.user.username)
+
+        resp = self.client.get(self.url + '?t=d&recursive=1&stream=1')
+        self.assertEqual(200, resp.status_code)
+        lines = [json.loads(l) for l in
+                 ''.join(resp.streaming_content).splitlines()]
+        assert [(l['parent_dir'], l['name']) for l in lines] == [
+            ('/', self.folder_name), (self.folder_path, 'sub')]
+
+    def test_dir_tree_is_truncated(self):
+        self.login_as(self.user)
+        self.create_folder(repo_id=self.repo_id, parent_dir=self.folder_path,
+                           dirname='sub', username=self.user.username)
+
+        resp = self.client.get(self.url + '?t=d&recursive=1&max_nodes=1')
+        self.assertEqual(200, resp.status_code)
+        assert len(json.loads(resp.content)) == 1
+        assert resp['truncated'] == 'true'
+
     def test_can_create_folder(self):
         self.login_as(self.user)
 
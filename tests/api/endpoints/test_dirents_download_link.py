@@ -56,6 +56,15 @@ class DirentsDownloadLinkViewTest(BaseTestCase):
         resp = self.client.get(url)
         self.assertEqual(404, resp.status_code)
 
+    def test_dirent_not_found(self):
+        self.login_as(self.user)
+        parent_dir = '/'
+        dirents = self.file_name + ',not-exist'
+        url = self.url + '?parent_dir=%s&dirents=%s' % (parent_dir, dirents)
+
+        resp = self.client.get(url)
+        self.assertEqual(404, resp.status_code)
+
     def test_permission_invalid(self):
         self.login_as(self.admin)
         parent_dir = '/'
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import datetime
+import json
+
+from mock import patch
+
+from seahub.utils import encode_events_cursor, decode_events_cursor, \
+    InvalidEventsCursor
+from seahub.test_utils import BaseTestCase
+
+
+class FakeEvent(object):
+    def __init__(self, uuid):
+        self.uuid = uuid
+        self.timestamp = datetime.datetime(2016, 1, 1, 12, 0, 0, 10)
+
+
+class EventsCursorTest(BaseTestCase):
+    def test_encode_and_decode(self):
+        cursor = encode_events_cursor(FakeEvent('abc'), 14)
+        assert decode_events_cursor(cursor) == \
+            ('2016-01-01T12:00:00.000010', 'abc', 14)
+
+    def test_decode_invalid(self):
+        for cursor in ('xxx', 'WzEsIDJd', encode_events_cursor(FakeEvent('a'), 0)[:-4]):
+            with self.assertRaises(InvalidEventsCursor):
+                decode_events_cursor(cursor)
+
+
+class EventsViewTest(BaseTestCase):
+    url = '/api2/events/'
+
+    @patch('seahub.api2.views.EVENTS_ENABLED', True)
+    def test_invalid_cursor(self):
+        self.login_as(self.user)
+
+        resp = self.client.get(self.url + '?cursor=xxx')
+        self.assertEqual(400, resp.status_code)
+
+    @patch('seahub.api2.views.EVENTS_ENABLED', True)
+    @patch('seahub.api2.views.get_user_events_by_cursor')
+    def test_list_by_cursor(self, mock_get_events):
+        mock_get_events.return_value = ([], 0, None)
+        self.login_as(self.user)
+
+        resp = self.client.get(self.url + '?cursor=')
+        self.assertEqual(200, resp.status_code)
+        json_resp = json.loads(resp.content)
+        assert json_resp['events'] == []
+        assert json_resp['next_cursor'] is None
+        mock_get_events.assert_called_once_with(self.user.username, None, 15,
+                                                org_id=None)
@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from seahub.api2.throttling import SimpleRateThrottle
+
+
+class FakeThrottle(SimpleRateThrottle):
+    rate = '10/minute'
+    now = 6000.0
+
+    def timer(self):
+        return self.now
+
+    def get_cache_key(self, request, view):
+        return 'throttle_test'
+
+
+class SimpleRateThrottleTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        FakeThrottle.now = 6000.0
+
+    def allow(self):
+        throttle = FakeThrottle()
+        return throttle, throttle.allow_request(None, None)
+
+    def test_throttle_in_window(self):
+        for i in range(10):
+            assert self.allow()[1] is True
+
+        throttle, allowed = self.allow()
+        assert allowed is False
+        # rejected requests are not counted
+        assert throttle.cur_count == 10
+        assert throttle.wait() > 0
+
+    def test_previous_window_fades_out(self):
+        for i in range(10):
+            self.allow()
+
+        # half way through the next window, half of the previous window
+        # still counts
+        FakeThrottle.now += 90
+        for i in range(5):
+            assert self.allow()[1] is True
+        assert self.allow()[1] is False
+
+    def test_wait(self):
+        for i in range(10):
+            self.allow()
+        throttle, allowed = self.allow()
+        assert allowed is False
+
+        FakeThrottle.now += throttle.wait() - 0.1
+        assert self.allow()[1] is False
+
+        FakeThrottle.now += 0.2
+        assert self.allow()[1] is True
@@ -0,0 +1,73 @@
+from django.test import RequestFactory
+from mock import patch
+
+from seahub.api2.authentication import TokenAuthentication, \
+    DeviceRemoteWipedException, AuthenticationFailed
+from seahub.api2.models import Token, TokenV2, get_token_auth_cache
+from seahub.base.accounts import User
+from seahub.test_utils import BaseTestCase
+
+
+class TokenAuthCacheTest(BaseTestCase):
+    def setUp(self):
+        self.clear_cache()
+        self.token = TokenV2.objects.get_or_create_token(
+            self.user.username, 'linux', 'device-1', 'laptop', '5.0.0',
+            'ubuntu', '127.0.0.1')
+
+    def tearDown(self):
+        TokenV2.objects.filter(user=self.user.username).delete()
+        Token.objects.filter(user=self.user.username).delete()
+        self.remove_repo()
+
+    def authenticate(self, key):
+        request = RequestFactory().get('/api2/auth/ping/',
+                                       HTTP_AUTHORIZATION='Token ' + key,
+                                       REMOTE_ADDR='127.0.0.1')
+        return TokenAuthentication().authenticate(request)
+
+    def test_second_request_is_served_from_cache(self):
+        user, token = self.authenticate(self.token.key)
+        assert user.username == self.user.username
+        assert get_token_auth_cache(self.token.key) is not None
+
+        with patch('seahub.api2.authentication.User.objects.get') as mock_get:
+            user, token = self.authenticate(self.token.key)
+        assert mock_get.call_count == 0
+        assert user.username == self.user.username
+        assert token.key == self.token.key
+
+    def test_v1_token(self):
+        token = Token.objects.create(user=self.user.username)
+        user, _ = self.authenticate(token.key)
+        assert user.username == self.user.username
+        assert get_token_auth_cache(token.key) is not None
+
+        token.delete()
+        assert get_token_auth_cache(token.key) is None
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token.key)
+
+    def test_remote_wipe_clears_cache(self):
+        self.authenticate(self.token.key)
+        TokenV2.objects.mark_device_to_be_remote_wiped(
+            self.user.username, 'linux', 'device-1')
+
+        assert get_token_auth_cache(self.token.key) is None
+        with self.assertRaises(DeviceRemoteWipedException):
+            self.authenticate(self.token.key)
+
+    def test_deactivate_user_clears_cache(self):
+        self.authenticate(self.token.key)
+
+        user = User.objects.get(email=self.user.username)
+        user.is_active = False
+        user.save()
+
+        assert get_token_auth_cache(self.token.key) is None
+        assert self.authenticate(self.token.key) is None
+
+    def test_role_change_clears_cache(self):
+        self.authenticate(self.token.key)
+        User.objects.update_role(self.user.username, 'guest')
+        assert get_token_auth_cache(self.token.key) is None
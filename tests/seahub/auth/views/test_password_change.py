@@ -24,3 +24,22 @@ class PasswordChangeTest(BaseTestCase):
         )
         self.assertEqual(302, resp.status_code)
         self.assertRedirects(resp, reverse('auth_password_change_done'))
+
+    def test_can_change_with_cached_user(self):
+        self.login_as(self.user)
+        # user of the verified session is served from cache from now on
+        self.client.get(reverse('auth_password_change'))
+
+        resp = self.client.post(
+            reverse('auth_password_change'), {
+                'old_password': self.user_password,
+                'new_password1': '123',
+                'new_password2': '123',
+            }
+        )
+        self.assertEqual(302, resp.status_code)
+        self.assertRedirects(resp, reverse('auth_password_change_done'))
+
+        # still logged in with the new password hash
+        resp = self.client.get(reverse('auth_password_change'))
+        self.assertEqual(200, resp.status_code)
@@ -0,0 +1,83 @@
+from django.test import TestCase
+from mock import patch, PropertyMock
+
+from seahub.base.apps import check_cache_health
+from seahub.base.cache_backends import TieredCache, LocalSharedCache, LocalLRU
+
+
+class LocalLRUTest(TestCase):
+    def test_evict_and_expire(self):
+        lru = LocalLRU(max_entries=2, timeout=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        assert lru.get('b') == (False, None)
+        assert lru.get('a') == (True, 1)
+
+        lru.set('d', 4, timeout=-1)
+        assert lru.get('d') == (False, None)
+
+    def test_values_are_not_shared(self):
+        lru = LocalLRU(max_entries=10, timeout=60)
+        lru.set('a', [1])
+        lru.get('a')[1].append(2)
+        assert lru.get('a') == (True, [1])
+
+
+class TieredCacheTest(TestCase):
+    def setUp(self):
+        self.shared = LocalSharedCache('tiered-cache-test', {})
+        self.shared.clear()
+        self.cache = TieredCache('tiered-cache-test', {
+            'OPTIONS': {'SHARED': 'shared', 'LOCAL_TIMEOUT': 60}})
+        self.cache.clear_local()
+        self.cache.reset_stats()
+
+        # bypass django cache handler, use our own shared instance
+        self.patcher = patch.object(TieredCache, 'shared',
+                                    new_callable=PropertyMock,
+                                    return_value=self.shared)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.shared.clear()
+
+    def test_get_is_served_locally(self):
+        self.cache.set('foo', 'bar')
+        calls = self.shared.calls
+        assert self.cache.get('foo') == 'bar'
+        assert self.shared.calls == calls
+        assert self.cache.stats()['local_hits'] == 1
+
+    def test_get_many_batches(self):
+        self.shared.set_many({'a': 1, 'b': 2, 'c': 3})
+        calls = self.shared.calls
+        assert self.cache.get_many(['a', 'b', 'c', 'd']) == \
+            {'a': 1, 'b': 2, 'c': 3}
+        assert self.shared.calls == calls + 1
+
+        stats = self.cache.stats()
+        assert stats['shared_hits'] == 3
+        assert stats['misses'] == 1
+
+        assert self.cache.get_many(['a', 'b']) == {'a': 1, 'b': 2}
+        assert self.shared.calls == calls + 1
+
+    def test_incr_goes_to_shared(self):
+        self.cache.set('n', 1)
+        assert self.cache.incr('n') == 2
+        assert self.shared.get('n') == 2
+        assert self.cache.get('n') == 2
+
+    def test_delete(self):
+        self.cache.set('foo', 'bar')
+        self.cache.delete('foo')
+        assert self.cache.get('foo') is None
+        assert self.shared.get('foo') is None
+
+
+class CheckCacheHealthTest(TestCase):
+    def test_healthy(self):
+        assert check_cache_health() == []
@@ -1,6 +1,12 @@
 import hashlib
 
-from seahub.base.models import FileComment
+from django.core.cache import cache
+from django.core.signals import request_finished
+from mock import patch
+from pysearpc import SearpcError
+from seaserv import seafile_api
+
+from seahub.base.models import FileComment, UserStarredFiles
 from seahub.test_utils import BaseTestCase
 
 
@@ -75,3 +81,67 @@ class FileCommentTest(BaseTestCase):
                     comment='test comment').save()
 
         assert len(FileComment.objects.all()) == 1
+
+
+class UserStarredFilesManagerTest(BaseTestCase):
+    def setUp(self):
+        cache.clear()
+        for path in (self.file, '/missing.md'):
+            UserStarredFiles(email=self.user.username, org_id=-1,
+                             repo_id=self.repo.id, path=path,
+                             is_dir=False).save()
+
+    def test_list_parent_dir_once(self):
+        with patch('seahub.base.models.seafile_api.list_dir_by_commit_and_path',
+                   wraps=seafile_api.list_dir_by_commit_and_path) as mock_list:
+            starred = UserStarredFiles.objects.get_starred_files_by_username(
+                self.user.username)
+            assert len(starred) == 1
+            assert starred[0].path == self.file
+            assert starred[0].last_modified > 0
+            assert mock_list.call_count == 1
+
+            # resolved from cache
+            UserStarredFiles.objects.get_starred_files_by_username(
+                self.user.username)
+            assert mock_list.call_count == 1
+
+    def test_stale_stars_deleted_after_request(self):
+        UserStarredFiles.objects.get_starred_files_by_username(
+            self.user.username)
+        assert len(UserStarredFiles.objects.all()) == 2
+
+        request_finished.send(sender=self.__class__)
+        assert len(UserStarredFiles.objects.all()) == 1
+
+    def test_star_in_removed_folder(self):
+        file_in_folder = self.create_file(repo_id=self.repo.id,
+                                          parent_dir=self.folder + '/',
+                                          filename='sub.md',
+                                          username=self.user.username)
+        UserStarredFiles(email=self.user.username, org_id=-1,
+                         repo_id=self.repo.id, path=file_in_folder,
+                         is_dir=False).save()
+        self.remove_folder()
+
+        starred = UserStarredFiles.objects.get_starred_files_by_username(
+            self.user.username)
+        assert [f.path for f in starred] == [self.file]
+
+        request_finished.send(sender=self.__class__)
+        assert [f.path for f in UserStarredFiles.objects.all()] == [self.file]
+
+    def test_star_kept_on_rpc_error(self):
+        with patch('seahub.base.models.seafile_api.list_dir_by_commit_and_path',
+                   side_effect=SearpcError('timeout')):
+            starred = UserStarredFiles.objects.get_starred_files_by_username(
+                self.user.username)
+        assert starred == []
+
+        request_finished.send(sender=self.__class__)
+        assert len(UserStarredFiles.objects.all()) == 2
+
+        # failed result is not cached
+        starred = UserStarredFiles.objects.get_starred_files_by_username(
+            self.user.username)
+        assert [f.path for f in starred] == [self.file]
@@ -0,0 +1,30 @@
+from django.core.management import call_command
+
+from seahub.notifications.models import (
+    UserNotification, group_msg_to_json, repo_share_msg_to_json,
+    MSG_TYPE_GROUP_MSG, MSG_TYPE_REPO_SHARE, MSG_TYPE_USER_MESSAGE)
+from seahub.test_utils import BaseTestCase
+
+
+class CommandTest(BaseTestCase):
+    def test_can_backfill(self):
+        # notices created before the columns were added
+        UserNotification.objects.create(
+            to_user='a@a.com', msg_type=MSG_TYPE_GROUP_MSG,
+            detail=group_msg_to_json(1, 'b@b.com', 'hi'))
+        UserNotification.objects.create(
+            to_user='a@a.com', msg_type=MSG_TYPE_GROUP_MSG, detail='2')
+        UserNotification.objects.create(
+            to_user='a@a.com', msg_type=MSG_TYPE_USER_MESSAGE,
+            detail='b@b.com')
+        UserNotification.objects.create(
+            to_user='a@a.com', msg_type=MSG_TYPE_REPO_SHARE,
+            detail=repo_share_msg_to_json('b@b.com', self.repo.id))
+
+        call_command('backfill_notice_columns', batch_size=2)
+
+        assert UserNotification.objects.filter(group_id=1, msg_from='b@b.com').count() == 1
+        assert UserNotification.objects.filter(group_id=2).count() == 1
+        assert UserNotification.objects.filter(
+            msg_type=MSG_TYPE_USER_MESSAGE, msg_from='b@b.com').count() == 1
+        assert UserNotification.objects.filter(repo_id=self.repo.id).count() == 1
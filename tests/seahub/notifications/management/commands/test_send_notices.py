@@ -1,5 +1,7 @@
 from django.core import mail
 from django.core.management import call_command
+from mock import patch
+from seaserv import seafile_api
 
 from seahub.notifications.models import (
     UserNotification, repo_share_msg_to_json, file_comment_msg_to_json)
@@ -43,3 +45,24 @@ class CommandTest(BaseTestCase):
         assert mail.outbox[0].to[0] == 'a@a.com'
         assert 'new comment from user %s' % self.user.username in mail.outbox[0].body
         assert '/foo' in mail.outbox[0].body
+
+    def test_repo_is_checked_once(self):
+        for u in (self.user.username, 'a@a.com', 'b@b.com'):
+            UserNotification.objects.add_repo_share_msg(
+                u, repo_share_msg_to_json('bar@bar.com', self.repo.id))
+
+        with patch('seahub.notifications.management.commands.send_notices.seafile_api.get_repo',
+                   wraps=seafile_api.get_repo) as mock_get_repo:
+            call_command('send_notices')
+
+        self.assertEqual(len(mail.outbox), 3)
+        assert mock_get_repo.call_count == 1
+
+    def test_notice_of_removed_repo_is_deleted(self):
+        UserNotification.objects.add_repo_share_msg(
+            self.user.username,
+            repo_share_msg_to_json('bar@bar.com', 'f' * 36))
+
+        call_command('send_notices')
+        self.assertEqual(len(mail.outbox), 0)
+        assert UserNotification.objects.count() == 0
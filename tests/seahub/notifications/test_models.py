@@ -1,5 +1,6 @@
 from seahub.notifications.models import (
-    UserNotification, repo_share_msg_to_json, file_comment_msg_to_json)
+    UserNotification, repo_share_msg_to_json, file_comment_msg_to_json,
+    group_msg_to_json, user_msg_to_json, MSG_TYPE_GROUP_MSG)
 from seahub.test_utils import BaseTestCase
 
 
@@ -12,3 +13,30 @@ class UserNotificationTest(BaseTestCase):
         msg = notice.format_file_comment_msg()
         assert msg is not None
         assert 'new comment from user' in msg
+
+    def test_detail_columns_are_filled(self):
+        detail = repo_share_msg_to_json('bar@bar.com', self.repo.id)
+        notice = UserNotification.objects.add_repo_share_msg('a@a.com', detail)
+        assert notice.repo_id == self.repo.id
+        assert notice.group_id is None
+
+    def test_seen_group_msg_notices(self):
+        UserNotification.objects.bulk_add_group_msg_notices(
+            ['a@a.com'], group_msg_to_json(1, 'b@b.com', 'hi'))
+        UserNotification.objects.bulk_add_group_msg_notices(
+            ['a@a.com'], group_msg_to_json(2, 'b@b.com', 'hi'))
+        UserNotification.objects.create(to_user='a@a.com',
+                                        msg_type=MSG_TYPE_GROUP_MSG,
+                                        detail='1', group_id=1)
+
+        assert UserNotification.objects.seen_group_msg_notices('a@a.com', 1) == 2
+        assert UserNotification.objects.filter(seen=False).count() == 1
+
+    def test_seen_user_msg_notices(self):
+        UserNotification.objects.add_user_message(
+            'a@a.com', user_msg_to_json('hi', 'b@b.com'))
+        UserNotification.objects.add_user_message(
+            'a@a.com', user_msg_to_json('hi', 'c@c.com'))
+
+        assert UserNotification.objects.seen_user_msg_notices('a@a.com', 'b@b.com') == 1
+        assert UserNotification.objects.get(msg_from='c@c.com').seen is False
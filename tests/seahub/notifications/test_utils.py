@@ -0,0 +1,37 @@
+from mock import patch
+
+from seahub.notifications.models import Notification
+from seahub.notifications import utils
+from seahub.notifications.utils import get_cur_topinfo, refresh_cache
+from seahub.test_utils import BaseTestCase
+
+
+class GetCurTopinfoTest(BaseTestCase):
+    def setUp(self):
+        refresh_cache()
+
+    def test_no_primary_notification_is_cached(self):
+        assert get_cur_topinfo() is None
+
+        with patch.object(utils.cache, 'get') as mock_get:
+            assert get_cur_topinfo() is None
+        assert mock_get.call_count == 0
+
+    def test_save_and_delete_refresh_topinfo(self):
+        assert get_cur_topinfo() is None
+
+        note = Notification.objects.create(message='hello', primary=True)
+        assert get_cur_topinfo().id == note.id
+
+        note.delete()
+        assert get_cur_topinfo() is None
+
+    def test_refresh_after_update(self):
+        note = Notification.objects.create(message='hello', primary=True)
+        assert get_cur_topinfo().id == note.id
+
+        Notification.objects.filter(id=note.id).update(message='world')
+        assert get_cur_topinfo().message == 'hello'
+
+        refresh_cache()
+        assert get_cur_topinfo().message == 'world'
@@ -0,0 +1,64 @@
+from django.core.urlresolvers import reverse
+from mock import patch
+import seaserv
+
+from seahub.password_session import handlers
+from seahub.signals import user_updated
+from seahub.test_utils import BaseTestCase
+
+
+class CheckPasswordHashTest(BaseTestCase):
+    def setUp(self):
+        self.login_as(self.user)
+        self.url = reverse('libraries')
+
+    @patch('seahub.password_session.middleware.get_password_hash',
+           wraps=handlers.get_password_hash)
+    def test_verified_session_skips_hash_check(self, mock_hash):
+        resp = self.client.get(self.url)
+        self.assertEqual(200, resp.status_code)
+        assert mock_hash.call_count == 0
+
+    @patch('seahub.password_session.middleware.get_password_hash',
+           wraps=handlers.get_password_hash)
+    def test_check_hash_again_after_user_updated(self, mock_hash):
+        user_updated.send(sender=None, email=self.user.username)
+
+        resp = self.client.get(self.url)
+        self.assertEqual(200, resp.status_code)
+        assert mock_hash.call_count == 1
+
+    @patch('seahub.password_session.middleware.get_password_hash',
+           wraps=handlers.get_password_hash)
+    def test_check_hash_again_after_interval(self, mock_hash):
+        with patch.object(handlers, 'CHECK_INTERVAL', 0):
+            resp = self.client.get(self.url)
+        self.assertEqual(200, resp.status_code)
+        assert mock_hash.call_count == 1
+
+    @patch('seahub.base.accounts.seaserv.get_emailuser_with_import',
+           wraps=seaserv.get_emailuser_with_import)
+    def test_verified_session_skips_user_lookup(self, mock_get_user):
+        self.client.get(self.url)
+        calls = mock_get_user.call_count
+
+        resp = self.client.get(self.url)
+        self.assertEqual(200, resp.status_code)
+        assert mock_get_user.call_count == calls
+
+        # loaded again after the user is updated
+        user_updated.send(sender=None, email=self.user.username)
+        resp = self.client.get(self.url)
+        self.assertEqual(200, resp.status_code)
+        assert mock_get_user.call_count > calls
+
+    def test_cached_user_keeps_attributes(self):
+        handlers.cache_user(self.admin)
+        user = handlers.get_cached_user(self.admin.username)
+        assert user.username == self.admin.username
+        assert user.is_staff
+        assert user.is_active
+        assert not hasattr(user, 'enc_password')
+
+        user_updated.send(sender=None, email=self.admin.username)
+        assert handlers.get_cached_user(self.admin.username) is None
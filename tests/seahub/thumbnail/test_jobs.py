@@ -0,0 +1,108 @@
+import threading
+
+from django.core.cache import cache
+from mock import patch
+
+from seahub.thumbnail import jobs
+from seahub.thumbnail.jobs import wait_thumbnail, get_thumbnail_state, \
+    submit_thumbnail_job, queue_thumbnail, DONE, FAILED, PENDING
+from seahub.test_utils import BaseTestCase
+
+
+class ThumbnailJobsTest(BaseTestCase):
+    def setUp(self):
+        self.file_id = '0' * 40
+        self.other_file_id = '1' * 40
+        cache.delete_many([jobs._cache_key(f, s)
+                           for f in (self.file_id, self.other_file_id)
+                           for s in (48, 96, 192)])
+
+    @patch('seahub.thumbnail.jobs.THUMBNAIL_SIZES', (48, 192))
+    @patch('seahub.thumbnail.jobs.thumbnail_exists')
+    @patch('seahub.thumbnail.jobs.create_thumbnails')
+    def test_one_job_for_concurrent_requests(self, mock_create, mock_exists):
+        created = set()
+        release = threading.Event()
+
+        def create(repo, file_id, filename, sizes):
+            release.wait(5)
+            created.update(sizes)
+            return 200
+        mock_create.side_effect = create
+        mock_exists.side_effect = lambda size, file_id: size in created
+
+        job = submit_thumbnail_job(self.repo.id, self.file_id, 'a.jpg', 48)
+        assert job is not None
+        assert set(job.sizes) == set([48, 192])
+        assert get_thumbnail_state(self.file_id, 48) == (PENDING, None)
+
+        # same job is returned while it is running
+        assert submit_thumbnail_job(self.repo.id, self.file_id, 'a.jpg',
+                                    192) is job
+
+        release.set()
+        assert wait_thumbnail(self.repo.id, self.file_id, 'a.jpg', 48) == \
+            (DONE, 200)
+        assert mock_create.call_count == 1
+        assert get_thumbnail_state(self.file_id, 192) == (DONE, 200)
+
+    @patch('seahub.thumbnail.jobs.THUMBNAIL_SIZES', (96,))
+    @patch('seahub.thumbnail.jobs.thumbnail_exists', return_value=False)
+    @patch('seahub.thumbnail.jobs.create_thumbnails', return_value=403)
+    def test_failure_is_remembered(self, mock_create, mock_exists):
+        assert wait_thumbnail(self.repo.id, self.file_id, 'a.jpg', 96) == \
+            (FAILED, 403)
+        assert wait_thumbnail(self.repo.id, self.file_id, 'a.jpg', 96) == \
+            (FAILED, 403)
+        assert mock_create.call_count == 1
+
+    @patch('seahub.thumbnail.jobs.THUMBNAIL_SIZES', (48,))
+    @patch('seahub.thumbnail.jobs.thumbnail_exists')
+    @patch('seahub.thumbnail.jobs.create_thumbnails')
+    def test_requested_thumbnail_skips_prefetch_queue(self, mock_create,
+                                                      mock_exists):
+        created = set()
+        release = threading.Event()
+
+        def create(repo, file_id, filename, sizes):
+            # the only prefetch worker is busy with the first file
+            if file_id == self.file_id:
+                release.wait(5)
+            created.add(file_id)
+            return 200
+        mock_create.side_effect = create
+        mock_exists.side_effect = lambda size, file_id: file_id in created
+
+        try:
+            queue_thumbnail(self.repo.id, self.file_id, 'a.jpg', 48)
+            job = queue_thumbnail(self.repo.id, self.other_file_id, 'b.jpg', 48)
+            assert job.prefetch is True
+
+            assert wait_thumbnail(self.repo.id, self.other_file_id, 'b.jpg',
+                                  48, timeout=5) == (DONE, 200)
+            assert job.prefetch is False
+        finally:
+            release.set()
+
+        assert wait_thumbnail(self.repo.id, self.file_id, 'a.jpg', 48,
+                              timeout=5) == (DONE, 200)
+        # promoted job is run once
+        assert [c[0][1] for c in mock_create.call_args_list].count(
+            self.other_file_id) == 1
+
+    @patch('seahub.thumbnail.jobs.THUMBNAIL_QUEUE_MAX', 1)
+    @patch('seahub.thumbnail.jobs.THUMBNAIL_SIZES', (48,))
+    @patch('seahub.thumbnail.jobs.thumbnail_exists', return_value=False)
+    @patch('seahub.thumbnail.jobs.create_thumbnails')
+    def test_prefetch_is_capped(self, mock_create, mock_exists):
+        release = threading.Event()
+        mock_create.side_effect = lambda *args: release.wait(5) and 200
+
+        try:
+            job = queue_thumbnail(self.repo.id, self.file_id, 'a.jpg', 48)
+            assert job is not None
+            assert queue_thumbnail(self.repo.id, self.other_file_id, 'b.jpg',
+                                   48) is None
+        finally:
+            release.set()
+        job.wait(5)
@@ -0,0 +1,137 @@
+import os
+import stat
+import time
+import shutil
+import tempfile
+from StringIO import StringIO
+
+from mock import patch
+from PIL import Image
+
+from seahub.thumbnail.utils import read_image, save_thumbnail, \
+    get_thumbnail_path, get_legacy_thumbnail_path, thumbnail_exists, \
+    migrate_legacy_thumbnails, evict_thumbnails
+from seahub.test_utils import BaseTestCase
+
+
+class CountingStream(object):
+    def __init__(self, data):
+        self.f = StringIO(data)
+        self.bytes_read = 0
+
+    def read(self, size):
+        chunk = self.f.read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def make_image(size, fmt='JPEG'):
+    f = StringIO()
+    Image.new('RGB', size, (255, 0, 0)).save(f, fmt)
+    return f.getvalue()
+
+
+class ReadImageTest(BaseTestCase):
+    def test_read_image(self):
+        image, status = read_image(CountingStream(make_image((300, 200))))
+        assert status == 200
+        assert image.size == (300, 200)
+
+    @patch('seahub.thumbnail.utils.READ_CHUNK_SIZE', 1024)
+    @patch('seahub.thumbnail.utils.THUMBNAIL_IMAGE_ORIGINAL_SIZE_LIMIT', 1)
+    def test_too_large_image_is_rejected_after_header(self):
+        data = make_image((2000, 2000), 'BMP')
+        stream = CountingStream(data)
+
+        image, status = read_image(stream)
+        assert image is None
+        assert status == 403
+        assert stream.bytes_read < len(data)
+
+
+class SaveThumbnailTest(BaseTestCase):
+    def setUp(self):
+        self.tmp_root = tempfile.mkdtemp()
+        self.patcher = patch('seahub.thumbnail.utils.THUMBNAIL_ROOT',
+                             self.tmp_root)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.tmp_root)
+
+    @patch('seahub.thumbnail.utils.THUMBNAIL_FILE_MODE', 0644)
+    def test_save_thumbnail(self):
+        file_id = 'a' * 40
+        save_thumbnail(Image.new('RGB', (48, 32)), 48, file_id)
+
+        path = get_thumbnail_path(48, file_id)
+        assert os.path.exists(path)
+        assert Image.open(path).size == (48, 32)
+        # no temp file left
+        assert os.listdir(os.path.dirname(path)) == [file_id]
+        # not the 0600 of a temp file, so a web server can serve it
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0644
+
+
+class ThumbnailStoreTest(BaseTestCase):
+    def setUp(self):
+        self.tmp_root = tempfile.mkdtemp()
+        self.patcher = patch('seahub.thumbnail.utils.THUMBNAIL_ROOT',
+                             self.tmp_root)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.tmp_root)
+
+    def write_file(self, path, size=100, atime=None):
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write('x' * size)
+        if atime is not None:
+            os.utime(path, (atime, atime))
+
+    def test_sharded_path(self):
+        file_id = 'abcd' + 'e' * 36
+        assert get_thumbnail_path(48, file_id) == os.path.join(
+            self.tmp_root, '48', 'ab', 'cd', file_id)
+
+    def test_legacy_thumbnail_is_moved(self):
+        file_id = 'b' * 40
+        self.write_file(get_legacy_thumbnail_path(48, file_id))
+
+        assert thumbnail_exists(48, file_id)
+        assert os.path.exists(get_thumbnail_path(48, file_id))
+        assert not os.path.exists(get_legacy_thumbnail_path(48, file_id))
+        assert not thumbnail_exists(192, file_id)
+
+    def test_migrate_legacy_thumbnails(self):
+        file_ids = ['c' * 40, 'd' * 40]
+        for file_id in file_ids:
+            self.write_file(get_legacy_thumbnail_path(48, file_id))
+        self.write_file(get_thumbnail_path(48, 'e' * 40))
+
+        assert migrate_legacy_thumbnails() == 2
+        for file_id in file_ids + ['e' * 40]:
+            assert os.path.exists(get_thumbnail_path(48, file_id))
+
+    def test_evict_least_recently_used(self):
+        now = time.time()
+        day = 24 * 60 * 60
+        for i, c in enumerate('01234'):
+            # '0' is the most recently used
+            self.write_file(get_thumbnail_path(48, c * 40), 100,
+                            now - i * day)
+
+        removed, freed, total = evict_thumbnails(350, 1)
+        assert (removed, freed, total) == (2, 200, 500)
+        for c in '012':
+            assert os.path.exists(get_thumbnail_path(48, c * 40))
+        for c in '34':
+            assert not os.path.exists(get_thumbnail_path(48, c * 40))
+
+    def test_no_eviction_within_budget(self):
+        self.write_file(get_thumbnail_path(48, 'f' * 40), 100)
+        assert evict_thumbnails(100) == (0, 0, 100)
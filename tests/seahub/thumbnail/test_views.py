@@ -0,0 +1,108 @@
+import os
+import json
+import tempfile
+
+from django.core.urlresolvers import reverse
+from mock import patch
+
+from seahub.share.models import FileShare
+from seahub.test_utils import BaseTestCase
+
+
+class ThumbnailGetTest(BaseTestCase):
+    def setUp(self):
+        self.login_as(self.user)
+
+        fd, self.thumbnail_file = tempfile.mkstemp()
+        with os.fdopen(fd, 'wb') as f:
+            f.write('thumbnail')
+
+        self.patchers = [
+            patch('seahub.thumbnail.views.thumbnail_exists',
+                  return_value=True),
+            patch('seahub.thumbnail.views.get_thumbnail_path',
+                  return_value=self.thumbnail_file),
+        ]
+        for p in self.patchers:
+            p.start()
+
+        self.url = reverse('thumbnail_get', args=[
+            self.repo.id, 48, self.file.lstrip('/')])
+
+    def tearDown(self):
+        for p in self.patchers:
+            p.stop()
+        os.unlink(self.thumbnail_file)
+
+    def test_get(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(200, resp.status_code)
+        assert ''.join(resp.streaming_content) == 'thumbnail'
+        assert resp['Content-Length'] == str(len('thumbnail'))
+        assert 'private' in resp['Cache-Control']
+        assert 'max-age=' in resp['Cache-Control']
+
+        # same etag for same file
+        etag = resp['ETag']
+        assert self.client.get(self.url)['ETag'] == etag
+
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, resp.status_code)
+        assert resp['ETag'] == etag
+
+    @patch('seahub.thumbnail.views.THUMBNAIL_SERVE_MODE', 'x-accel-redirect')
+    def test_x_accel_redirect(self):
+        with patch('seahub.thumbnail.views.THUMBNAIL_ROOT',
+                   os.path.dirname(self.thumbnail_file)):
+            resp = self.client.get(self.url)
+
+        self.assertEqual(200, resp.status_code)
+        assert resp.content == ''
+        assert resp['X-Accel-Redirect'] == '/thumbnail-internal/' + \
+            os.path.basename(self.thumbnail_file)
+        assert 'ETag' in resp
+
+    @patch('seahub.thumbnail.views.THUMBNAIL_SERVE_MODE', 'x-sendfile')
+    def test_x_sendfile(self):
+        resp = self.client.get(self.url)
+
+        self.assertEqual(200, resp.status_code)
+        assert resp['X-Sendfile'] == self.thumbnail_file
+
+
+class ShareLinkThumbnailStatusTest(BaseTestCase):
+    def create_link(self, password=None):
+        return FileShare.objects.create_dir_link(
+            self.user.username, self.repo.id, '/', password=password)
+
+    @patch('seahub.thumbnail.views.get_thumbnail_state',
+           return_value=('pending', None))
+    def test_pending(self, mock_state):
+        fs = self.create_link()
+        resp = self.client.get(
+            reverse('share_link_thumbnail_status', args=[fs.token]),
+            {'path': self.file, 'size': 48})
+
+        self.assertEqual(200, resp.status_code)
+        assert json.loads(resp.content) == {'status': 'pending'}
+
+    @patch('seahub.thumbnail.views.get_thumbnail_state',
+           return_value=('done', 200))
+    def test_done(self, mock_state):
+        fs = self.create_link()
+        resp = self.client.get(
+            reverse('share_link_thumbnail_status', args=[fs.token]),
+            {'path': self.file, 'size': 48})
+
+        self.assertEqual(200, resp.status_code)
+        json_resp = json.loads(resp.content)
+        assert json_resp['status'] == 'done'
+        assert fs.token in json_resp['encoded_thumbnail_src']
+
+    def test_password_protected_link(self):
+        fs = self.create_link(password='12345678')
+        resp = self.client.get(
+            reverse('share_link_thumbnail_status', args=[fs.token]),
+            {'path': self.file, 'size': 48})
+
+        self.assertEqual(403, resp.status_code)
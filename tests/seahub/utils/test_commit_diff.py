@@ -0,0 +1,42 @@
+from django.core.cache import cache
+from mock import patch
+
+from seahub.utils.commit_diff import get_commit_diff
+from seahub.test_utils import BaseTestCase
+
+
+class FakeDiffEntry(object):
+    def __init__(self, status, name, new_name=None):
+        self.status = status
+        self.name = name
+        self.new_name = new_name
+
+
+class GetCommitDiffTest(BaseTestCase):
+    def setUp(self):
+        cache.clear()
+
+    @patch('seahub.utils.commit_diff.seafserv_threaded_rpc.get_diff')
+    def test_diff_is_cached_by_commit(self, mock_get_diff):
+        mock_get_diff.return_value = [FakeDiffEntry('add', 'a.md'),
+                                      FakeDiffEntry('mov', 'b.md', 'c.md')]
+
+        diff = get_commit_diff(self.repo.id, '', 'commit-1')
+        assert get_commit_diff(self.repo.id, '', 'commit-1') == diff
+        assert mock_get_diff.call_count == 1
+
+        assert diff[1].status == 'mov'
+        assert diff[1].new_name == 'c.md'
+
+        get_commit_diff(self.repo.id, '', 'commit-2')
+        assert mock_get_diff.call_count == 2
+
+    @patch('seahub.utils.commit_diff.COMMIT_DIFF_CACHE_MAX_ENTRIES', 1)
+    @patch('seahub.utils.commit_diff.seafserv_threaded_rpc.get_diff')
+    def test_large_diff_is_not_cached(self, mock_get_diff):
+        mock_get_diff.return_value = [FakeDiffEntry('add', 'a.md'),
+                                      FakeDiffEntry('add', 'b.md')]
+
+        get_commit_diff(self.repo.id, '', 'commit-1')
+        get_commit_diff(self.repo.id, '', 'commit-1')
+        assert mock_get_diff.call_count == 2
@@ -0,0 +1,97 @@
+from mock import patch
+from seaserv import seafile_api
+
+from seahub.utils.dir_listing import DirListingCache, get_dir_listing, \
+    list_dir_for_user, clear_dir_listing_cache, page_dir_for_user, \
+    InvalidCursor
+from seahub.test_utils import BaseTestCase
+
+
+class DirListingCacheTest(BaseTestCase):
+    def test_bounded_by_number_of_dirents(self):
+        cache = DirListingCache(max_entries=3)
+        cache.set('a', ([1], [2]))
+        cache.set('b', ([3], []))
+        assert cache.get('a') is not None   # 'b' is now the oldest entry
+
+        cache.set('c', ([], [4]))
+        assert cache.get('b') is None
+        assert cache.get('a') is not None
+        assert cache.num_entries == 3
+
+    def test_too_large_listing_is_not_cached(self):
+        cache = DirListingCache(max_entries=1)
+        cache.set('a', ([1], [2]))
+        assert cache.get('a') is None
+
+
+class GetDirListingTest(BaseTestCase):
+    def setUp(self):
+        clear_dir_listing_cache()
+        self.file_name = self.file.strip('/')
+        self.folder_name = self.folder.strip('/')
+        self.dir_id = seafile_api.get_dir_id_by_path(self.repo.id, '/')
+
+    def test_listing_is_cached_by_dir_id(self):
+        with patch('seahub.utils.dir_listing.seafile_api.list_dir_by_dir_id',
+                   wraps=seafile_api.list_dir_by_dir_id) as mock_list:
+            dirs, files = get_dir_listing(self.repo, self.dir_id)
+            assert get_dir_listing(self.repo, self.dir_id) == (dirs, files)
+        assert mock_list.call_count == 1
+
+        assert self.folder_name in [d.obj_name for d in dirs]
+        assert self.file_name in [f.obj_name for f in files]
+
+    @patch('seahub.utils.dir_listing.is_pro_version')
+    def test_permission_is_laid_over(self, mock_is_pro_version):
+        mock_is_pro_version.return_value = False
+
+        dirs, files = list_dir_for_user(self.repo, '/', self.dir_id,
+                                        self.user.username, 'r')
+        assert [d.permission for d in dirs + files] == ['r'] * len(dirs + files)
+
+        # cached listing is not changed
+        cached_dirs, cached_files = get_dir_listing(self.repo, self.dir_id)
+        assert cached_files[0].permission is None
+
+
+@patch('seahub.utils.dir_listing.is_pro_version', return_value=False)
+class PageDirForUserTest(BaseTestCase):
+    def setUp(self):
+        clear_dir_listing_cache()
+        for name in ('b.md', 'a.md', 'C.md'):
+            self.create_file(repo_id=self.repo.id, parent_dir='/',
+                             filename=name, username=self.user.username)
+        self.create_folder(repo_id=self.repo.id, parent_dir='/',
+                           dirname='z-folder', username=self.user.username)
+        self.dir_id = seafile_api.get_dir_id_by_path(self.repo.id, '/')
+
+    def page(self, **kwargs):
+        return page_dir_for_user(self.repo, '/', self.dir_id,
+                                 self.user.username, 'rw', **kwargs)
+
+    def test_walk_pages_by_cursor(self, mock_is_pro_version):
+        names = []
+        cursor = None
+        while True:
+            page, cursor = self.page(cursor=cursor, limit=2)
+            assert len(page) <= 2
+            names += [d.obj_name for d in page]
+            if cursor is None:
+                break
+
+        assert names[0] == 'z-folder'   # dirs first
+        files = [n for n in names if n.endswith('.md')]
+        assert files[:3] == ['a.md', 'b.md', 'C.md']
+        assert len(names) == len(set(names))
+
+    def test_files_only(self, mock_is_pro_version):
+        page, cursor = self.page(request_type='f', limit=100)
+        assert cursor is None
+        assert all(not d.is_dir() for d in page)
+        assert all(d.permission == 'rw' for d in page)
+
+    def test_cursor_of_other_sort_is_invalid(self, mock_is_pro_version):
+        _, cursor = self.page(limit=1)
+        with self.assertRaises(InvalidCursor):
+            self.page(cursor=cursor, sort='mtime')
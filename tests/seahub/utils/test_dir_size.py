@@ -0,0 +1,38 @@
+from django.core.cache import cache
+from mock import patch
+from seaserv import seafile_api
+
+from seahub.utils.dir_listing import clear_dir_listing_cache
+from seahub.utils.dir_size import get_dir_size, get_dirents_size
+from seahub.test_utils import BaseTestCase
+
+
+class DirSizeTest(BaseTestCase):
+    def setUp(self):
+        cache.clear()
+        clear_dir_listing_cache()
+        self.file_name = self.file.strip('/')
+        self.folder_name = self.folder.strip('/')
+        self.repo = seafile_api.get_repo(self.repo.id)
+        self.dir_id = seafile_api.get_dir_id_by_path(self.repo.id, '/')
+
+    def test_dir_size_is_cached_by_dir_id(self):
+        with patch('seahub.utils.dir_size.seafile_api.get_dir_size',
+                   wraps=seafile_api.get_dir_size) as mock_get_dir_size:
+            size = get_dir_size(self.repo, self.dir_id)
+            assert get_dir_size(self.repo, self.dir_id) == size
+        assert mock_get_dir_size.call_count == 1
+
+    def test_get_dirents_size(self):
+        file_size = seafile_api.get_file_size(
+            self.repo.store_id, self.repo.version,
+            seafile_api.get_file_id_by_path(self.repo.id, self.file))
+        folder_id = seafile_api.get_dir_id_by_path(self.repo.id, self.folder)
+        folder_size = seafile_api.get_dir_size(self.repo.store_id,
+                                               self.repo.version, folder_id)
+
+        total_size, not_found = get_dirents_size(
+            self.repo, self.dir_id,
+            [self.file_name, self.folder_name, 'not-exist'])
+        assert total_size == file_size + folder_size
+        assert not_found == ['not-exist']
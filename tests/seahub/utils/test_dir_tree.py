@@ -0,0 +1,58 @@
+from multiprocessing.pool import ThreadPool
+
+from mock import patch
+from seaserv import seafile_api
+
+from seahub.utils.dir_listing import clear_dir_listing_cache
+from seahub.utils.dir_tree import DirTreeWalker
+from seahub.test_utils import BaseTestCase
+
+
+@patch('seahub.utils.dir_listing.is_pro_version', return_value=False)
+class DirTreeWalkerTest(BaseTestCase):
+    def setUp(self):
+        clear_dir_listing_cache()
+        username = self.user.username
+        self.create_folder(repo_id=self.repo.id, parent_dir='/',
+                           dirname='a', username=username)
+        self.create_folder(repo_id=self.repo.id, parent_dir='/',
+                           dirname='b', username=username)
+        self.create_folder(repo_id=self.repo.id, parent_dir='/a',
+                           dirname='c', username=username)
+        self.dir_id = seafile_api.get_dir_id_by_path(self.repo.id, '/')
+
+    def walk(self, **kwargs):
+        return DirTreeWalker(self.repo, '/', self.dir_id, self.user.username,
+                             'rw', **kwargs)
+
+    def test_walk_without_resolving_paths(self, mock_is_pro_version):
+        walker = self.walk()
+        with patch('seaserv.seafile_api.get_dir_id_by_path') as mock_get_id:
+            dirs = [(p, d.obj_name) for p, d in walker]
+        assert mock_get_id.call_count == 0
+
+        assert ('/', 'a') in dirs
+        assert ('/', 'b') in dirs
+        assert ('/a', 'c') in dirs
+        assert walker.truncated is False
+
+    def test_max_depth(self, mock_is_pro_version):
+        dirs = [d.obj_name for p, d in self.walk(max_depth=1)]
+        assert 'a' in dirs
+        assert 'c' not in dirs
+
+    def test_max_depth_zero(self, mock_is_pro_version):
+        assert list(self.walk(max_depth=0)) == []
+
+    def test_pool_is_reused(self, mock_is_pro_version):
+        with patch('seahub.utils.dir_tree.ThreadPool',
+                   wraps=ThreadPool) as mock_pool:
+            for i in range(2):
+                dirs = [d.obj_name for p, d in self.walk(workers=2)]
+                assert sorted(dirs) == ['a', 'b', 'c']
+        assert mock_pool.call_count <= 1
+
+    def test_max_nodes(self, mock_is_pro_version):
+        walker = self.walk(max_nodes=1)
+        assert len(list(walker)) == 1
+        assert walker.truncated is True
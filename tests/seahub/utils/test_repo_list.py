@@ -0,0 +1,79 @@
+from mock import patch
+from seaserv import seafile_api
+
+from seahub.utils.repo_list import BoundedMemo, RepoList
+from seahub.test_utils import BaseTestCase
+
+
+class BoundedMemoTest(BaseTestCase):
+    def test_evicts_least_recently_used(self):
+        memo = BoundedMemo(size=2)
+        memo.set('a', 1)
+        memo.set('b', 2)
+        assert memo.get('a') == 1   # 'b' is now the oldest entry
+
+        memo.set('c', 3)
+        assert 'b' not in memo
+        assert memo.get('a') == 1
+        assert memo.get('c') == 3
+        assert len(memo) == 2
+
+    def test_get_or_set_calls_func_once(self):
+        memo = BoundedMemo()
+        calls = []
+
+        def func():
+            calls.append(1)
+            return None
+
+        assert memo.get_or_set('a', func) is None
+        assert memo.get_or_set('a', func) is None
+        assert len(calls) == 1
+
+
+class RepoListTest(BaseTestCase):
+    def setUp(self):
+        self.group2 = self.create_group(group_name='test_group2',
+                                        username=self.user.username)
+
+    def tearDown(self):
+        self.remove_group()
+        self.remove_group(self.group2.id)
+        self.remove_repo()
+
+    def test_owned(self):
+        repo_list = RepoList(self.fake_request)
+        assert self.repo.id in [r.id for r in repo_list.owned()]
+        assert repo_list.get_permission(self.repo.id) == 'rw'
+        assert repo_list.get_owner(self.repo.id) == self.user.username
+
+    def test_group_repo_is_resolved_once(self):
+        for g in (self.group, self.group2):
+            seafile_api.set_group_repo(self.repo.id, g.id,
+                                       self.user.username, 'rw')
+
+        repo_list = RepoList(self.fake_request)
+        with patch('seahub.utils.repo_list.seafile_api.get_repo',
+                   wraps=seafile_api.get_repo) as mock_get_repo:
+            rows = repo_list.group([self.group, self.group2])
+
+        assert len(rows) == 2
+        assert sorted([grp.id for grp, _, _ in rows]) == \
+            sorted([self.group.id, self.group2.id])
+        for grp, r, perm in rows:
+            assert r.id == self.repo.id
+            assert perm == 'rw'
+        assert mock_get_repo.call_count == 1
+
+    def test_group_reuses_owned_repos(self):
+        seafile_api.set_group_repo(self.repo.id, self.group.id,
+                                   self.user.username, 'r')
+
+        repo_list = RepoList(self.fake_request)
+        repo_list.owned()
+        with patch('seahub.utils.repo_list.seafile_api.get_repo') as mock_get_repo:
+            rows = repo_list.group([self.group])
+
+        assert len(rows) == 1
+        assert rows[0][2] == 'rw'
+        assert mock_get_repo.call_count == 0
@@ -0,0 +1,151 @@
+from django.test import TestCase
+
+from seahub.utils.rpc import install_rpc_memo, start_rpc_memo, end_rpc_memo
+
+
+class FakeRpcClient(object):
+    def __init__(self):
+        self.calls = []
+
+    def get_repo(self, repo_id):
+        self.calls.append(('get_repo', repo_id))
+        return {'id': repo_id}
+
+    def list_dir_by_path(self, repo_id, path):
+        self.calls.append(('list_dir_by_path', repo_id))
+        return []
+
+    def post_file(self, repo_id, path):
+        self.calls.append(('post_file', repo_id))
+        return 0
+
+
+class OtherFakeRpcClient(object):
+    def __init__(self):
+        self.calls = []
+
+    def get_repo(self, repo_id):
+        self.calls.append(('get_repo', repo_id))
+        return None
+
+    def is_passwd_set(self, repo_id, username):
+        self.calls.append(('is_passwd_set', repo_id))
+        return False
+
+    def set_passwd(self, repo_id, username, passwd):
+        self.calls.append(('set_passwd', repo_id))
+        return 0
+
+
+class FakeCcnetRpcClient(object):
+    def __init__(self):
+        self.calls = []
+
+    def get_group(self, group_id):
+        self.calls.append(('get_group', group_id))
+        return {'id': group_id}
+
+    def group_add_member(self, group_id, user_name, member_name):
+        self.calls.append(('group_add_member', group_id))
+        return 0
+
+    def quit_group(self, group_id, user_name):
+        self.calls.append(('quit_group', group_id))
+        return 0
+
+    def org_add_share(self, org_id, repo_id, from_user, to_user, permission):
+        self.calls.append(('org_add_share', repo_id))
+        return 0
+
+
+class RPCMemoTest(TestCase):
+    def setUp(self):
+        self.rpc = FakeRpcClient()
+        install_rpc_memo(self.rpc, ('get_repo', ))
+
+    def tearDown(self):
+        end_rpc_memo()
+
+    def test_no_memo_outside_request(self):
+        self.rpc.get_repo('r1')
+        self.rpc.get_repo('r1')
+        assert len(self.rpc.calls) == 2
+
+    def test_memoize_in_request(self):
+        start_rpc_memo()
+        assert self.rpc.get_repo('r1') == {'id': 'r1'}
+        assert self.rpc.get_repo('r1') == {'id': 'r1'}
+        self.rpc.get_repo('r2')
+        assert self.rpc.calls == [('get_repo', 'r1'), ('get_repo', 'r2')]
+
+    def test_result_is_copied(self):
+        start_rpc_memo()
+        self.rpc.get_repo('r1')['name'] = 'changed'
+        assert 'name' not in self.rpc.get_repo('r1')
+
+    def test_not_listed_methods_are_not_memoized(self):
+        start_rpc_memo()
+        self.rpc.list_dir_by_path('r1', '/')
+        self.rpc.list_dir_by_path('r1', '/')
+        assert len(self.rpc.calls) == 2
+
+    def test_mutating_call_invalidates(self):
+        start_rpc_memo()
+        self.rpc.get_repo('r1')
+        self.rpc.get_repo('r2')
+        self.rpc.post_file('r1', '/a.txt')
+        self.rpc.get_repo('r1')
+        self.rpc.get_repo('r2')
+        assert self.rpc.calls == [('get_repo', 'r1'), ('get_repo', 'r2'),
+                                     ('post_file', 'r1'), ('get_repo', 'r1')]
+
+    def test_new_request_starts_empty(self):
+        start_rpc_memo()
+        self.rpc.get_repo('r1')
+        end_rpc_memo()
+        start_rpc_memo()
+        self.rpc.get_repo('r1')
+        assert len(self.rpc.calls) == 2
+
+    def test_clients_do_not_share_results(self):
+        other = OtherFakeRpcClient()
+        install_rpc_memo(other, ('get_repo', 'is_passwd_set'))
+
+        start_rpc_memo()
+        assert self.rpc.get_repo('r1') == {'id': 'r1'}
+        assert other.get_repo('r1') is None
+        assert len(other.calls) == 1
+
+    def test_mutation_on_one_client_invalidates_others(self):
+        other = OtherFakeRpcClient()
+        install_rpc_memo(other, ('is_passwd_set', ))
+
+        start_rpc_memo()
+        self.rpc.get_repo('r1')
+        other.is_passwd_set('r1', 'u')
+        other.is_passwd_set('r1', 'u')
+        other.set_passwd('r1', 'u', 'secret')
+        other.is_passwd_set('r1', 'u')
+        self.rpc.get_repo('r1')
+        assert other.calls == [('is_passwd_set', 'r1'), ('set_passwd', 'r1'),
+                               ('is_passwd_set', 'r1')]
+        assert len(self.rpc.calls) == 2
+
+    def test_sharing_and_membership_calls_invalidate(self):
+        ccnet = FakeCcnetRpcClient()
+        install_rpc_memo(ccnet, ('get_group', ))
+
+        start_rpc_memo()
+        for mutate in (lambda: ccnet.group_add_member(1, 'a', 'b'),
+                       lambda: ccnet.quit_group(1, 'b')):
+            ccnet.get_group(1)
+            ccnet.get_group(1)
+            mutate()
+        ccnet.get_group(1)
+        assert [c for c in ccnet.calls if c[0] == 'get_group'] == \
+            [('get_group', 1)] * 3
+
+        self.rpc.get_repo('r1')
+        ccnet.org_add_share(1, 'r1', 'a', 'b', 'rw')
+        self.rpc.get_repo('r1')
+        assert self.rpc.calls == [('get_repo', 'r1'), ('get_repo', 'r1')]
@@ -0,0 +1,86 @@
+import cPickle as pickle
+
+from mock import patch
+from seaserv import ccnet_threaded_rpc
+
+from seahub.group.signals import add_user_to_group, group_members_changed, \
+    group_updated
+from seahub.utils.user_context import get_user_groups, CachedGroup, LazyList
+from seahub.test_utils import BaseTestCase
+
+
+class GetUserGroupsTest(BaseTestCase):
+    def setUp(self):
+        self.clear_cache()
+        self.user2 = self.create_user()
+
+    def tearDown(self):
+        self.remove_group()
+        self.remove_user(self.user2.username)
+        self.remove_repo()
+
+    def test_groups_are_cached(self):
+        assert self.group.id in [g.id for g in
+                                 get_user_groups(self.user.username)]
+
+        with patch('seahub.utils.user_context.seaserv.get_personal_groups_by_user') as mock_get:
+            groups = get_user_groups(self.user.username)
+        assert mock_get.call_count == 0
+        assert self.group.group_name in [g.group_name for g in groups]
+
+    def test_add_user_to_group_clears_cache(self):
+        assert get_user_groups(self.user2.username) == []
+
+        ccnet_threaded_rpc.group_add_member(self.group.id, self.user.username,
+                                            self.user2.username)
+        add_user_to_group.send(sender=None, group_staff=self.user.username,
+                               group_id=self.group.id,
+                               added_user=self.user2.username)
+        assert [g.id for g in get_user_groups(self.user2.username)] == \
+            [self.group.id]
+
+    def test_remove_member_clears_cache(self):
+        ccnet_threaded_rpc.group_add_member(self.group.id, self.user.username,
+                                            self.user2.username)
+        assert len(get_user_groups(self.user2.username)) == 1
+
+        ccnet_threaded_rpc.group_remove_member(self.group.id,
+                                               self.user.username,
+                                               self.user2.username)
+        group_members_changed.send(sender=None, group_id=self.group.id,
+                                   usernames=[self.user2.username])
+        assert get_user_groups(self.user2.username) == []
+
+    def test_rename_clears_cache(self):
+        get_user_groups(self.user.username)
+
+        ccnet_threaded_rpc.set_group_name(self.group.id, 'renamed')
+        group_updated.send(sender=None, group_id=self.group.id)
+        assert 'renamed' in [g.group_name for g in
+                             get_user_groups(self.user.username)]
+
+
+class CachedGroupTest(BaseTestCase):
+    def tearDown(self):
+        self.remove_group()
+        self.remove_repo()
+
+    def test_pickle(self):
+        g = pickle.loads(pickle.dumps(CachedGroup(self.group)))
+        assert g.id == self.group.id
+        assert g.props.group_name == self.group.group_name
+
+
+class LazyListTest(BaseTestCase):
+    def test_only_evaluated_when_used(self):
+        calls = []
+
+        def func():
+            calls.append(1)
+            return [3, 1, 2]
+
+        groups = LazyList(func)
+        assert calls == []
+        assert sorted(groups) == [1, 2, 3]
+        assert len(groups) == 3
+        assert calls == [1]
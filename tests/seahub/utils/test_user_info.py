@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from mock import patch
+
+from seahub.avatar.models import Avatar
+from seahub.profile.models import Profile
+from seahub.utils.user_info import get_user_infos
+from seahub.test_utils import BaseTestCase
+
+
+class GetUserInfosTest(BaseTestCase):
+    def setUp(self):
+        cache.clear()
+        Profile.objects.add_or_update(self.user.username, 'test nickname')
+
+    def test_get_user_infos(self):
+        with self.assertNumQueries(2):
+            infos = get_user_infos([self.user.username, self.admin.username,
+                                    self.user.username, ''])
+
+        assert len(infos) == 2
+        info = infos[self.user.username]
+        assert info['name'] == 'test nickname'
+        assert info['contact_email'] == self.user.username
+        assert info['login_id'] == ''
+        assert info['avatar_is_default'] is True
+
+        assert infos[self.admin.username]['name'] == \
+            self.admin.username.split('@')[0]
+
+    def test_avatar_urls_are_cached(self):
+        get_user_infos([self.user.username], 32)
+
+        # only profiles are read
+        with self.assertNumQueries(1):
+            infos = get_user_infos([self.user.username], 32)
+        assert infos[self.user.username]['avatar_url']
+
+    @patch.object(Avatar, 'thumbnail_exists', return_value=True)
+    @patch.object(Avatar, 'avatar_url', return_value='/media/avatars/a.png')
+    def test_avatar_of_mixed_case_email(self, mock_url, mock_exists):
+        Avatar(emailuser=self.user.username, primary=True,
+               avatar='avatars/a.png').save()
+        email = self.user.username.capitalize()
+
+        info = get_user_infos([email], 32)[email]
+        assert info['avatar_url'] == '/media/avatars/a.png'
+        assert info['avatar_is_default'] is False
@@ -0,0 +1,63 @@
+from django.core.urlresolvers import reverse
+from seaserv import get_commit, seafile_api
+
+from seahub.share.models import FileShare, UploadLinkShare
+from seahub.test_utils import BaseTestCase
+from seahub.views import get_repo_dirents, get_dir_links, \
+    get_file_download_link
+
+
+class GetRepoDirentsTest(BaseTestCase):
+    def setUp(self):
+        self.file_path = self.file
+        self.folder_path = self.folder
+        repo = seafile_api.get_repo(self.repo.id)   # with new head commit
+        self.commit = get_commit(repo.id, repo.version, repo.head_cmmt_id)
+
+    def tearDown(self):
+        self.remove_repo()
+
+    def test_links_are_annotated(self):
+        username = self.user.username
+        fs = FileShare.objects.create_file_link(username, self.repo.id,
+                                                self.file_path)
+        ds = FileShare.objects.create_dir_link(username, self.repo.id,
+                                               self.folder_path)
+        us = UploadLinkShare.objects.create_upload_link_share(
+            username, self.repo.id, self.folder_path)
+
+        file_list, dir_list, _ = get_repo_dirents(self.fake_request, self.repo,
+                                                  self.commit, '/')
+        f = [x for x in file_list if '/' + x.obj_name == self.file_path][0]
+        d = [x for x in dir_list if '/' + x.obj_name == self.folder_path][0]
+
+        assert f.sharetoken == fs.token
+        assert d.sharetoken == ds.token
+        assert d.uploadtoken == us.token
+        assert f.view_link == reverse('view_lib_file',
+                                      args=[self.repo.id, self.file_path])
+        assert f.dl_link == get_file_download_link(self.repo.id, f.obj_id,
+                                                   self.file_path)
+
+    def test_only_links_of_paths_are_fetched(self):
+        username = self.user.username
+        FileShare.objects.create_dir_link(username, self.repo.id,
+                                          self.folder_path)
+        FileShare.objects.create_file_link(username, self.repo.id,
+                                           self.file_path)
+        # link in a sub dir is not needed to list '/'
+        FileShare.objects.create_file_link(username, self.repo.id,
+                                           self.folder_path + '/sub.md')
+        UploadLinkShare.objects.create_upload_link_share(
+            username, self.repo.id, self.folder_path)
+
+        fileshares, uploadlinks = get_dir_links(
+            username, self.repo.id, [self.file_path, self.folder_path + '/'])
+        assert sorted(fileshares.keys()) == sorted(
+            [self.file_path, self.folder_path + '/'])
+        assert uploadlinks.keys() == [self.folder_path + '/']
+
+        fileshares, uploadlinks = get_dir_links(username, self.repo.id,
+                                                [self.file_path])
+        assert fileshares.keys() == [self.file_path]
+        assert uploadlinks == {}